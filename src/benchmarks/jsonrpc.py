@@ -0,0 +1,455 @@
+"""Нагрузочный бенчмарк JSON-RPC методов web и mobile API.
+
+Запускается против поднятого приложения и локальной базы, заполненной generate_load_data:
+
+    $ cd src
+    $ python -m benchmarks.jsonrpc run --username admin --password admin --duration 60
+    $ python -m benchmarks.jsonrpc compare benchmarks/results/<before>.json benchmarks/results/<after>.json
+"""
+import os
+
+import django
+
+# Инициализируем Django до импорта моделей:
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pocket_storage.settings")
+django.setup()
+
+import asyncio  # noqa: E402
+import dataclasses  # noqa: E402
+import datetime as dt  # noqa: E402
+import json  # noqa: E402
+import math  # noqa: E402
+import pathlib  # noqa: E402
+import random  # noqa: E402
+import subprocess  # noqa: E402
+import time  # noqa: E402
+import typing as tp  # noqa: E402
+import uuid  # noqa: E402
+
+import click  # noqa: E402
+import httpx  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from pocket_storage import models  # noqa: E402
+from pocket_storage.storage_unit_qrcode import make_qrcode_content  # noqa: E402
+
+WEB_URL = "/api/v1/web/jsonrpc"
+MOBILE_URL = "/api/v1/mobile/jsonrpc"
+RESULTS_DIR = pathlib.Path(__file__).parent / "results"
+
+
+@dataclasses.dataclass
+class Dataset:
+    """Выборка реальных значений из базы для параметров запросов."""
+
+    storage_unit_ids: list[str]
+    qrcode_contents: list[str]
+    product_ids: list[str]
+    barcodes: list[str]
+    category_ids: list[str]
+    warehouse_ids: list[str]
+    employee_ids: list[str]
+    search_strings: list[str]
+
+
+@dataclasses.dataclass
+class Scenario:
+    url: str
+    method: str
+    weight: int
+    make_params: tp.Callable[[random.Random, Dataset], dict]
+    auth: bool = False
+
+    @property
+    def name(self) -> str:
+        entrypoint = "web" if self.url == WEB_URL else "mobile"
+        return f"{entrypoint}.{self.method}"
+
+
+def _page(rng: random.Random, count: bool = False) -> dict:
+    return {"page": rng.randint(1, 5), "per_page": 20, "count": count}
+
+
+SCENARIOS = [
+    # Сканирование на ТСД - основная нагрузка
+    Scenario(
+        MOBILE_URL,
+        "get_storage_unit_with_qrcode",
+        30,
+        lambda rng, ds: {"qrcode_content": rng.choice(ds.qrcode_contents)},
+    ),
+    Scenario(
+        MOBILE_URL,
+        "get_storage_unit_with_id",
+        10,
+        lambda rng, ds: {"id": rng.choice(ds.storage_unit_ids)},
+    ),
+    Scenario(
+        MOBILE_URL,
+        "get_product_with_barcode",
+        15,
+        lambda rng, ds: {"barcode": rng.choice(ds.barcodes)},
+    ),
+    Scenario(
+        MOBILE_URL,
+        "get_storage_units",
+        8,
+        lambda rng, ds: {
+            "pagination": _page(rng),
+            "filters": {"category_ids": [rng.choice(ds.category_ids)]},
+        },
+    ),
+    Scenario(
+        MOBILE_URL,
+        "get_storage_units",
+        4,
+        lambda rng, ds: {
+            "pagination": _page(rng),
+            "filters": {"search_query": rng.choice(ds.search_strings)},
+        },
+    ),
+    Scenario(
+        MOBILE_URL,
+        "get_products",
+        6,
+        lambda rng, ds: {
+            "pagination": _page(rng),
+            "search": rng.choice(ds.search_strings),
+        },
+    ),
+    Scenario(
+        MOBILE_URL,
+        "create_storage_unit_with_product_barcode",
+        3,
+        lambda rng, ds: {
+            "barcode": rng.choice(ds.barcodes),
+            "ext_id": f"B-{uuid.UUID(int=rng.getrandbits(128)).hex[:20]}",
+        },
+    ),
+    # Бэк-офис
+    Scenario(
+        WEB_URL,
+        "get_products",
+        5,
+        lambda rng, ds: {
+            "pagination": _page(rng, count=True),
+            "filters": {"category_id": rng.choice(ds.category_ids)},
+        },
+        auth=True,
+    ),
+    Scenario(
+        WEB_URL,
+        "get_products",
+        3,
+        lambda rng, ds: {
+            "pagination": _page(rng),
+            "filters": {"search": rng.choice(ds.search_strings)},
+        },
+        auth=True,
+    ),
+    Scenario(
+        WEB_URL,
+        "get_storage_units",
+        5,
+        lambda rng, ds: {
+            "product_id": rng.choice(ds.product_ids),
+            "pagination": _page(rng, count=True),
+            "filters": {"warehouse_ids": [rng.choice(ds.warehouse_ids)]},
+        },
+        auth=True,
+    ),
+    Scenario(
+        WEB_URL,
+        "get_storage_unit_operations",
+        4,
+        lambda rng, ds: {
+            "storage_unit_id": rng.choice(ds.storage_unit_ids),
+            "pagination": _page(rng),
+        },
+        auth=True,
+    ),
+    Scenario(
+        WEB_URL,
+        "get_employees",
+        3,
+        lambda rng, ds: {"pagination": _page(rng, count=True)},
+        auth=True,
+    ),
+    Scenario(
+        WEB_URL,
+        "get_employee",
+        2,
+        lambda rng, ds: {"employee_id": rng.choice(ds.employee_ids)},
+        auth=True,
+    ),
+    Scenario(
+        WEB_URL,
+        "add_product",
+        2,
+        lambda rng, ds: {
+            "product_data": {
+                "name": "Товар бенчмарка",
+                "SKU": f"B-{uuid.UUID(int=rng.getrandbits(128)).hex[:20]}",
+                "category_id": rng.choice(ds.category_ids),
+            },
+        },
+        auth=True,
+    ),
+]
+
+
+def _sample(model: tp.Type[models.BaseModel], columns: str, size: int) -> list[tuple]:
+    """Случайная выборка строк без полного сканирования таблицы."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [table])
+        row = cursor.fetchone()
+        estimated_rows = max(row[0] if row else 0, 1)
+        percent = min(100.0, size * 1000 / estimated_rows)
+        cursor.execute(
+            f"SELECT {columns} FROM {table} TABLESAMPLE SYSTEM (%s) LIMIT %s",
+            [percent, size],
+        )
+        return cursor.fetchall()
+
+
+def load_dataset(size: int) -> Dataset:
+    storage_unit_ids = [str(row[0]) for row in _sample(models.StorageUnit, "id", size)]
+    products = _sample(models.Product, "id, barcode, name", size)
+    dataset = Dataset(
+        storage_unit_ids=storage_unit_ids,
+        qrcode_contents=[
+            make_qrcode_content(models.StorageUnit(id=storage_unit_id))
+            for storage_unit_id in storage_unit_ids
+        ],
+        product_ids=[str(product_id) for product_id, _, _ in products],
+        barcodes=[barcode for _, barcode, _ in products if barcode],
+        category_ids=[str(row[0]) for row in _sample(models.ProductCategory, "id", size)],
+        warehouse_ids=[str(row[0]) for row in _sample(models.Warehouse, "id", size)],
+        employee_ids=[str(row[0]) for row in _sample(models.Employee, "id", size)],
+        search_strings=[name.split()[0] for _, _, name in products],
+    )
+
+    empty = [name for name, values in dataclasses.asdict(dataset).items() if not values]
+    if empty:
+        raise click.ClickException(
+            f"В базе нет данных для {', '.join(empty)}, запустите generate_load_data"
+        )
+
+    return dataset
+
+
+async def _login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    resp = await client.post(
+        WEB_URL,
+        json={
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "login",
+            "params": {"username": username, "password": password},
+        },
+    )
+    body = resp.json()
+    if "error" in body:
+        raise click.ClickException(f"Не удалось войти: {body['error']}")
+
+    return body["result"]["session_key"]
+
+
+async def _run_load(
+    base_url: str,
+    dataset: Dataset,
+    session_key: str | None,
+    duration: float,
+    concurrency: int,
+    seed: int,
+) -> tuple[dict[str, list[float]], dict[str, int], float]:
+    scenarios = [s for s in SCENARIOS if session_key or not s.auth]
+    weights = [s.weight for s in scenarios]
+    latencies: dict[str, list[float]] = {s.name: [] for s in scenarios}
+    errors: dict[str, int] = {s.name: 0 for s in scenarios}
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def worker(worker_id: int, deadline: float):
+            rng = random.Random(f"{seed}:{worker_id}")
+            while time.monotonic() < deadline:
+                scenario = rng.choices(scenarios, weights)[0]
+                headers = {"X-session-key": session_key} if scenario.auth else {}
+                payload = {
+                    "jsonrpc": "2.0",
+                    "id": 0,
+                    "method": scenario.method,
+                    "params": scenario.make_params(rng, dataset),
+                }
+                started_at = time.perf_counter()
+                try:
+                    resp = await client.post(scenario.url, json=payload, headers=headers)
+                    failed = resp.status_code != 200 or "error" in resp.json()
+                except httpx.HTTPError:
+                    failed = True
+                latencies[scenario.name].append(time.perf_counter() - started_at)
+                errors[scenario.name] += failed
+
+        started_at = time.monotonic()
+        deadline = started_at + duration
+        await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+        elapsed = time.monotonic() - started_at
+
+    return latencies, errors, elapsed
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга, в миллисекундах."""
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1] * 1000
+
+
+def _summarize(latencies: dict[str, list[float]], errors: dict[str, int], elapsed: float):
+    methods = {}
+    for name, values in sorted(latencies.items()):
+        if not values:
+            continue
+        values = sorted(values)
+        methods[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(_percentile(values, 50), 2),
+            "p95_ms": round(_percentile(values, 95), 2),
+            "p99_ms": round(_percentile(values, 99), 2),
+        }
+
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "total_requests": total,
+        "total_errors": sum(errors.values()),
+        "rps": round(total / elapsed, 2),
+        "methods": methods,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _print_table(methods: dict[str, dict]):
+    click.echo(
+        f"{'method':<55} {'req':>7} {'err':>5} {'rps':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for name, stats in methods.items():
+        click.echo(
+            f"{name:<55} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8} "
+            f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}"
+        )
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option("--url", default="http://localhost:8000", help="Адрес приложения")
+@click.option("--username", default=None, help="Пользователь для web API")
+@click.option("--password", default=None)
+@click.option("--duration", default=30.0, help="Длительность в секундах")
+@click.option("--concurrency", default=16, help="Количество одновременных клиентов")
+@click.option("--dataset-size", default=1000, help="Сколько значений брать из каждой таблицы")
+@click.option("--seed", default=0)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    default=None,
+    help="Файл с результатами, по умолчанию benchmarks/results/<время>-<коммит>.json",
+)
+def run(url, username, password, duration, concurrency, dataset_size, seed, output):
+    """Прогнать смешанную нагрузку и сохранить результаты."""
+    dataset = load_dataset(dataset_size)
+
+    async def main():
+        session_key = None
+        if username is not None:
+            async with httpx.AsyncClient(base_url=url) as client:
+                session_key = await _login(client, username, password)
+        else:
+            click.echo("Пользователь не указан, методы web API пропущены")
+
+        return await _run_load(url, dataset, session_key, duration, concurrency, seed)
+
+    latencies, errors, elapsed = asyncio.run(main())
+    summary = _summarize(latencies, errors, elapsed)
+
+    revision = _git_revision()
+    started_at = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+    output = output or RESULTS_DIR / f"{started_at}-{revision}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "revision": revision,
+                "started_at": started_at,
+                "options": {
+                    "duration": duration,
+                    "concurrency": concurrency,
+                    "dataset_size": dataset_size,
+                    "seed": seed,
+                },
+                **summary,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+    _print_table(summary["methods"])
+    click.echo(
+        f"Всего: {summary['total_requests']} запросов, {summary['rps']} rps, "
+        f"ошибок: {summary['total_errors']}"
+    )
+    click.echo(f"Результаты сохранены в {output}")
+
+
+@cli.command()
+@click.argument("baseline", type=click.Path(exists=True, path_type=pathlib.Path))
+@click.argument("current", type=click.Path(exists=True, path_type=pathlib.Path))
+@click.option(
+    "--threshold",
+    default=10.0,
+    help="Рост p95 в процентах, который считается регрессией",
+)
+def compare(baseline, current, threshold):
+    """Сравнить два прогона и завершиться с ошибкой при регрессии p95."""
+    before = json.loads(baseline.read_text())
+    after = json.loads(current.read_text())
+    click.echo(f"{before['revision']} -> {after['revision']}")
+
+    regressions = []
+    for name, stats in after["methods"].items():
+        old = before["methods"].get(name)
+        if old is None:
+            click.echo(f"{name:<55} новый метод")
+            continue
+
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            change = (stats[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0
+            changes.append(f"{metric} {old[metric]} -> {stats[metric]} ({change:+.1f}%)")
+            if metric == "p95_ms" and change > threshold:
+                regressions.append(name)
+
+        click.echo(f"{name:<55} " + ", ".join(changes))
+
+    if regressions:
+        raise click.ClickException(f"Регрессия p95: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    cli()
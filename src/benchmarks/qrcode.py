@@ -0,0 +1,67 @@
+"""Сравнение форматов содержимого QR-кодов: длина, размер QR и время кодирования/разбора.
+
+    $ cd src
+    $ python -m benchmarks.qrcode --count 10000
+"""
+import os
+
+import django
+
+# Инициализируем Django до импорта моделей:
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pocket_storage.settings")
+django.setup()
+
+import time  # noqa: E402
+import typing as tp  # noqa: E402
+import uuid  # noqa: E402
+
+import click  # noqa: E402
+import qrcode  # noqa: E402
+
+from pocket_storage import models  # noqa: E402
+from pocket_storage.storage_unit_qrcode import (  # noqa: E402
+    make_legacy_qrcode_content,
+    make_qrcode_content,
+    parse_qrcode_content,
+)
+
+FORMATS: dict[str, tp.Callable[[models.StorageUnit], str]] = {
+    "jwt": make_legacy_qrcode_content,
+    "compact": make_qrcode_content,
+}
+
+
+def _per_call_us(func: tp.Callable, args: list) -> float:
+    started_at = time.perf_counter()
+    for arg in args:
+        func(arg)
+    return (time.perf_counter() - started_at) / len(args) * 1_000_000
+
+
+@click.command()
+@click.option("--count", default=10_000, help="Количество кодов на формат")
+def main(count: int):
+    storage_units = [models.StorageUnit(id=uuid.uuid4()) for _ in range(count)]
+
+    click.echo(
+        f"{'формат':<10} {'символов':>9} {'версия QR':>10} {'модулей':>8} "
+        f"{'кодирование, мкс':>17} {'разбор, мкс':>12}"
+    )
+    for name, make_content in FORMATS.items():
+        encode_us = _per_call_us(make_content, storage_units)
+        contents = [make_content(storage_unit) for storage_unit in storage_units]
+        decode_us = _per_call_us(parse_qrcode_content, contents)
+
+        qr = qrcode.QRCode()
+        qr.add_data(contents[0])
+        qr.make(fit=True)
+        modules = len(qr.modules)
+
+        click.echo(
+            f"{name:<10} {len(contents[0]):>9} {qr.version:>10} {f'{modules}x{modules}':>8} "
+            f"{encode_us:>17.1f} {decode_us:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
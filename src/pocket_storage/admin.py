@@ -1,12 +1,15 @@
+import functools
+import json
 import typing as tp
-from base64 import b64encode
-from . import storage_unit_qrcode
+
+from . import qrcode_labels, search, storage_unit_qrcode
 
 from admin_auto_filters.filters import AutocompleteFilter
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.http import HttpResponse
 from django.urls import reverse
 from django.utils.html import format_html
-from django.utils.safestring import mark_safe
 
 from pocket_storage import models
 
@@ -38,6 +41,43 @@ def admin_attrs(
     return inner
 
 
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списков админки для больших таблиц.
+
+    Вместо COUNT(*) сначала берется оценка количества строк из плана запроса (EXPLAIN),
+    точный подсчет выполняется, только если строк по оценке немного.
+    """
+
+    estimate_threshold = 100_000
+
+    @functools.cached_property
+    def count(self) -> int:
+        estimate = self._estimate_count()
+        if estimate < self.estimate_threshold:
+            return super().count
+
+        return estimate
+
+    def _estimate_count(self) -> int:
+        [explain] = json.loads(self.object_list.order_by().explain(format="json"))
+        return int(explain["Plan"]["Plan Rows"])
+
+
+class IndexedSearchMixin(object):
+    """Поиск в списке и автодополнении через search.py вместо OR по search_fields.
+
+    search_fields остаются, чтобы админка показывала строку поиска.
+    """
+
+    search_function: tp.Callable[[models.QuerySet, str], models.QuerySet]
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+
+        return self.search_function(queryset, search_term), False
+
+
 class ParentProductCategoryLinkMixin(object):
     @admin_attrs(short_description="Родительская категория")
     def parent_link(self, obj):
@@ -110,12 +150,13 @@ class ProductCategoryModelAdmin(ParentProductCategoryLinkMixin, admin.ModelAdmin
         "parent_link",
     )
     list_display_links = ("name",)
+    list_select_related = ("parent",)
     search_fields = ("id", "name", "parent__name")
     list_filter = [ProductCategoryParentFilter]
 
 
 @admin.register(models.Product)
-class ProductModelAdmin(ProductCategoryLinkMixin, admin.ModelAdmin):
+class ProductModelAdmin(IndexedSearchMixin, ProductCategoryLinkMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "name",
@@ -123,22 +164,23 @@ class ProductModelAdmin(ProductCategoryLinkMixin, admin.ModelAdmin):
         "barcode",
         "category_link",
     )
+    list_select_related = ("category",)
     search_fields = (
         "id",
         "name",
         "SKU",
         "barcode",
     )
+    search_function = staticmethod(search.search_products)
+    readonly_fields = ("version",)
     list_filter = (ProductCategoryFilter,)
-
-
-def image_from_bytes(image_content: tp.Union[bytes, memoryview]) -> str:
-    b64_content = b64encode(image_content).decode("utf8")
-    return mark_safe(f'<img src = "data: image/png; base64, {b64_content}">')  # noqa
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(models.StorageUnit)
 class StorageUnitModelAdmin(
+    IndexedSearchMixin,
     ProductLinkMixin,
     WarehouseLinkMixin,
     admin.ModelAdmin,
@@ -149,6 +191,7 @@ class StorageUnitModelAdmin(
         "product_link",
         "warehouse_link",
     )
+    list_select_related = ("product", "warehouse")
 
     search_fields = (
         "id",
@@ -157,16 +200,50 @@ class StorageUnitModelAdmin(
         "product__SKU",
         "product__barcode",
     )
+    search_function = staticmethod(search.search_storage_units)
 
-    readonly_fields = ("qrcode_img",)
+    readonly_fields = ("qrcode_img", "version")
 
     list_filter = (
         ProductFilter,
         WarehouseFilter,
     )
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    actions = ("print_labels",)
+    # Этикетки рисуются в потоке запроса, большие выборки - командой generate_labels
+    max_print_labels = 10 * qrcode_labels.LabelsLayout().per_page
+
     @admin.display(description="QR-код")
     def qrcode_img(self, obj: models.StorageUnit) -> tp.Optional[str]:
-        content = storage_unit_qrcode.make_qrcode(obj)
+        content = storage_unit_qrcode.make_qrcode_content(obj)
+        url = reverse(
+            "storage_unit_qrcode_image",
+            args=[obj.id, storage_unit_qrcode.qrcode_image_key(content)],
+        )
 
-        return image_from_bytes(content)
+        # В картинке модуль QR - один пиксель, растягиваем без сглаживания
+        return format_html(
+            '<img src="{}" width="296" height="296" style="image-rendering: pixelated">',
+            url,
+        )
+
+    @admin.action(description="Печать этикеток с QR-кодами")
+    def print_labels(self, request, queryset):
+        count = queryset.count()
+        if count > self.max_print_labels:
+            self.message_user(
+                request,
+                f"Выбрано единиц хранения: {count}, в админке можно напечатать не больше "
+                f"{self.max_print_labels}. Для больших выборок используйте команду generate_labels",
+                messages.WARNING,
+            )
+            return None
+
+        return HttpResponse(
+            qrcode_labels.labels_pdf(queryset),
+            content_type="application/pdf",
+            headers={"Content-Disposition": 'attachment; filename="labels.pdf"'},
+        )
@@ -5,6 +5,7 @@ from starlette.requests import Request
 
 from pocket_storage import auth
 from . import errors
+from .idempotency import Idempotency
 from .pagination import PaginationParams, PaginationInfinityScrollParams, AnyPagination
 
 
@@ -43,3 +44,18 @@ def get_mutual_exclusive_pagination(
         raise fastapi_jsonrpc.InvalidParams
 
     return pagination or pagination_scroll or PaginationParams()
+
+
+def get_idempotency(
+    idempotency_key: str
+    | None = fastapi_jsonrpc.Body(
+        None,
+        title="Ключ идемпотентности",
+        description=(
+            "Уникальный для каждого действия, например UUID. Повторный вызов с тем же "
+            "ключом возвращает результат первого, не выполняя действие еще раз"
+        ),
+        max_length=128,
+    ),
+) -> Idempotency:
+    return Idempotency(fastapi_jsonrpc.get_jsonrpc_method(), idempotency_key)
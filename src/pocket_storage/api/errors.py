@@ -1,4 +1,5 @@
 from fastapi_jsonrpc import BaseError
+from pydantic import BaseModel
 
 
 class WrongCredentials(BaseError):
@@ -16,6 +17,11 @@ class WarehouseAlreadyExists(BaseError):
     MESSAGE = "Warehouse already exists"
 
 
+class WarehouseNotFound(BaseError):
+    CODE = 2002
+    MESSAGE = "Warehouse not found"
+
+
 class ProductCategoryAlreadyExists(BaseError):
     CODE = 3001
     MESSAGE = "Product category already exists"
@@ -36,6 +42,22 @@ class ProductNotFound(BaseError):
     MESSAGE = "Product not found"
 
 
+class ProductVersionConflict(BaseError):
+    CODE = 4004
+    MESSAGE = "Product was changed by someone else"
+
+    class DataModel(BaseModel):
+        version: int
+
+
+class ProductImportInvalidFile(BaseError):
+    CODE = 4003
+    MESSAGE = "Product import file is invalid"
+
+    class DataModel(BaseModel):
+        reason: str
+
+
 class EmployeePositionAlreadyExists(BaseError):
     CODE = 5001
     MESSAGE = "Employee position already exists"
@@ -59,3 +81,47 @@ class StorageUnitAlreadyExists(BaseError):
 class StorageUnitNotFound(BaseError):
     CODE = 7002
     MESSAGE = "Storage unit not found"
+
+
+class StorageUnitTransitionNotAllowed(BaseError):
+    CODE = 7003
+    MESSAGE = "Storage unit transition not allowed"
+
+    class DataModel(BaseModel):
+        storage_unit_id: str
+        state: str
+        action: str
+
+
+class StorageUnitsNotFound(BaseError):
+    CODE = 7004
+    MESSAGE = "Storage units not found"
+
+    class DataModel(BaseModel):
+        storage_unit_ids: list[str]
+
+
+class StorageUnitVersionConflict(BaseError):
+    CODE = 7005
+    MESSAGE = "Storage unit was changed by someone else"
+
+    class DataModel(BaseModel):
+        version: int
+
+
+class ServiceOverloaded(BaseError):
+    CODE = 9001
+    MESSAGE = "Service overloaded, retry later"
+
+    class DataModel(BaseModel):
+        limit: str
+
+
+class StatementTimeout(BaseError):
+    CODE = 9002
+    MESSAGE = "Query timed out or was canceled"
+
+
+class IdempotencyKeyInProgress(BaseError):
+    CODE = 9003
+    MESSAGE = "Request with this idempotency key is still in progress, retry later"
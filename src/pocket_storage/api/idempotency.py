@@ -0,0 +1,83 @@
+"""Ключи идемпотентности для изменяющих методов mobile API.
+
+Терминал, не дождавшийся ответа, повторяет вызов с тем же ключом. Первый вызов
+занимает ключ в memcached на время выполнения, а по завершении сохраняет под ним
+результат на IDEMPOTENCY_KEY_TIMEOUT секунд. Повторный вызов возвращает сохраненный
+результат одним обращением к кэшу, не выполняя метод еще раз, а пока первый
+выполняется - получает ошибку IdempotencyKeyInProgress.
+
+Ошибки не сохраняются: после ошибки вызов с тем же ключом выполняется заново.
+Если memcached недоступен, методы выполняются как без ключа.
+"""
+import hashlib
+import typing as tp
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from fastapi.encoders import jsonable_encoder
+
+from . import errors
+
+# Сколько секунд ключ считается занятым выполняющимся вызовом. С запасом больше
+# таймаута запроса: если процесс упал посреди вызова, ключ освободится сам.
+IN_PROGRESS_TIMEOUT = 120
+
+_IN_PROGRESS = "in_progress"
+
+
+class Idempotency:
+    """Ключ идемпотентности одного вызова метода.
+
+    Использование::
+
+        with idempotency as saved:
+            if saved is not None:
+                return saved
+            ...
+            return idempotency.save(result)
+    """
+
+    def __init__(self, method: str, key: str | None):
+        self.method = method
+        self.key = key
+        self._reserved = False
+
+    @property
+    def cache_key(self) -> str:
+        # Ключ клиента может содержать символы, недопустимые в ключах memcached
+        digest = hashlib.sha256(self.key.encode()).hexdigest()
+        return f"mobile:idempotency:{self.method}:{digest}"
+
+    def __enter__(self) -> tp.Any | None:
+        """Сохраненный результат повторного вызова или None, если метод нужно выполнить."""
+        if self.key is None:
+            return None
+
+        if cache.add(self.cache_key, _IN_PROGRESS, IN_PROGRESS_TIMEOUT):
+            self._reserved = True
+            return None
+
+        saved = cache.get(self.cache_key)
+        if saved == _IN_PROGRESS:
+            raise errors.IdempotencyKeyInProgress
+        if saved is None:
+            # memcached недоступен или ключ только что истек
+            return None
+
+        return saved["result"]
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self._reserved:
+            cache.delete(self.cache_key)
+
+    def save(self, result: tp.Any) -> tp.Any:
+        """Сохранить результат после фиксации транзакции и вернуть его."""
+        if self.key is not None:
+            data = {"result": jsonable_encoder(result)}
+            cache_key = self.cache_key
+            transaction.on_commit(
+                lambda: cache.set(cache_key, data, settings.IDEMPOTENCY_KEY_TIMEOUT)
+            )
+
+        return result
@@ -0,0 +1,147 @@
+import asyncio
+import collections
+import contextlib
+import json
+import time
+
+import django.db
+import fastapi_jsonrpc
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from starlette.requests import Request
+
+from pocket_storage import auth, instrumentation, profiling, statement_timeout
+from . import errors
+
+# Вызовы в обработке по ключам RPC_CONCURRENCY_LIMITS. Меняется только в event loop
+_in_flight: collections.Counter[str] = collections.Counter()
+
+DISCONNECT_POLL_INTERVAL = 1.0
+
+# Метка method для вызовов несуществующих методов
+UNKNOWN_METHOD = "unknown"
+
+
+def _method_label(ctx: fastapi_jsonrpc.JsonRpcContext) -> str:
+    # Middleware вызывается до выбора метода: имя приходит от клиента как есть,
+    # а в метки метрик должны попадать только имена методов точки входа
+    method = ctx.request.method
+    for route in ctx.entrypoint.routes:
+        if isinstance(route, fastapi_jsonrpc.MethodRoute) and route.name == method:
+            return method
+
+    return UNKNOWN_METHOD
+
+
+def _response_size(raw_response: dict | None) -> int:
+    if raw_response is None:
+        return 0
+
+    # Так же, как сериализует ответ starlette.responses.JSONResponse
+    content = json.dumps(raw_response, ensure_ascii=False, separators=(",", ":"))
+    return len(content.encode("utf-8"))
+
+
+async def _should_profile(ctx: fastapi_jsonrpc.JsonRpcContext) -> bool:
+    if profiling.PROFILE_HEADER in ctx.http_request.headers:
+        # По заголовку профилируются только вызовы администраторов
+        session_key = ctx.http_request.headers.get("X-session-key")
+        return session_key is not None and await sync_to_async(auth.is_staff_session)(
+            session_key
+        )
+
+    return profiling.is_sampled()
+
+
+def instrument(entrypoint: str) -> fastapi_jsonrpc.JsonRpcMiddleware:
+    """Метрики и лог по каждому вызову метода точки входа entrypoint."""
+
+    @contextlib.asynccontextmanager
+    async def middleware(ctx: fastapi_jsonrpc.JsonRpcContext):
+        stats = instrumentation.CallStats(entrypoint=entrypoint, method=_method_label(ctx))
+        stats.profile = await _should_profile(ctx)
+        token = instrumentation.current_call.set(stats)
+        try:
+            yield
+        finally:
+            instrumentation.current_call.reset(token)
+            stats.wall_time = time.perf_counter() - stats.started_at
+
+            raw_response = ctx.raw_response
+            if raw_response is not None and "error" in raw_response:
+                stats.status = str(raw_response["error"].get("code"))
+
+            if stats.profile_id is not None:
+                ctx.http_response.headers[profiling.PROFILE_ID_HEADER] = stats.profile_id
+
+            if settings.RPC_RESPONSE_SIZE_METRIC:
+                stats.response_size = _response_size(raw_response)
+            instrumentation.record_call(stats)
+
+            if stats.is_slow:
+                instrumentation.log_slow_call(stats, ctx.request.params)
+                if settings.SLOW_CALL_EXPLAIN:
+                    ctx.background_tasks.add_task(
+                        instrumentation.explain_slowest_select, stats
+                    )
+
+    return middleware
+
+
+def limit_concurrency(entrypoint: str) -> fastapi_jsonrpc.JsonRpcMiddleware:
+    """Сразу отклонять вызов ошибкой ServiceOverloaded, если превышен лимит
+    одновременных вызовов точки входа или метода (settings.RPC_CONCURRENCY_LIMITS).
+    """
+
+    @contextlib.asynccontextmanager
+    async def middleware(ctx: fastapi_jsonrpc.JsonRpcContext):
+        limits = settings.RPC_CONCURRENCY_LIMITS
+        keys = [
+            key
+            for key in (entrypoint, f"{entrypoint}.{ctx.request.method}")
+            if key in limits
+        ]
+
+        for key in keys:
+            if _in_flight[key] >= limits[key]:
+                raise errors.ServiceOverloaded(data={"limit": key})
+
+        _in_flight.update(keys)
+        try:
+            yield
+        finally:
+            _in_flight.subtract(keys)
+
+    return middleware
+
+
+async def _cancel_on_disconnect(request: Request, stats: instrumentation.CallStats):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+    statement_timeout.cancel(stats)
+
+
+def cancel_queries(entrypoint: str) -> fastapi_jsonrpc.JsonRpcMiddleware:
+    """Таймаут SQL-запросов метода и их отмена при отключении клиента.
+
+    Подключается после instrument: использует CallStats текущего вызова.
+    """
+
+    @contextlib.asynccontextmanager
+    async def middleware(ctx: fastapi_jsonrpc.JsonRpcContext):
+        stats = instrumentation.current_call.get()
+        stats.statement_timeout_ms = statement_timeout.get_timeout_ms(
+            entrypoint, ctx.request.method
+        )
+        watcher = asyncio.create_task(_cancel_on_disconnect(ctx.http_request, stats))
+        try:
+            yield
+        except django.db.OperationalError as exc:
+            if stats.canceled or statement_timeout.is_query_canceled(exc):
+                raise errors.StatementTimeout from exc
+            raise
+        finally:
+            watcher.cancel()
+
+    return middleware
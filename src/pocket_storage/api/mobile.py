@@ -1,24 +1,121 @@
 import uuid
 
 import django.db
-import jwt
+import fastapi_jsonrpc
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.utils import timezone
 from fastapi import Depends, Body
 from fastapi_jsonrpc import Entrypoint
-from django.db.models import Q
 
-from . import pagination, dependencies, errors
+from . import pagination, dependencies, errors, middlewares
+from .idempotency import Idempotency
+from .relations import load_relations
 from .schemas import mobile as schemas
-from .. import models
-from ..storage_unit_qrcode import parse_qrcode_content
+from .. import models, search, transitions, versioning
+from ..executor import Priority, priority
+from ..storage_unit_qrcode import InvalidQrCodeContent, get_storage_unit_id
 
 api_v1 = Entrypoint(
     "/api/v1/mobile/jsonrpc",
     name="web",
     summary="Mobile JSON_RPC entrypoint",
+    errors=[
+        *Entrypoint.default_errors,
+        errors.ServiceOverloaded,
+        errors.StatementTimeout,
+    ],
+    middlewares=[
+        middlewares.instrument("mobile"),
+        middlewares.limit_concurrency("mobile"),
+        middlewares.cancel_queries("mobile"),
+    ],
 )
 
 
+def _storage_unit_cache_key(storage_unit_id: uuid.UUID | str) -> str:
+    # v2: в схеме появилась версия, записи старого формата не читаются
+    return f"mobile:storage_unit:v2:{storage_unit_id}"
+
+
+def _get_storage_unit(storage_unit_id: uuid.UUID | str) -> schemas.StorageUnitSchema:
+    """Единица хранения для поиска сканером, с кэшем на STORAGE_UNIT_CACHE_TIMEOUT секунд."""
+    cache_key = _storage_unit_cache_key(storage_unit_id)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return schemas.StorageUnitSchema.parse_obj(cached)
+
+    storage_unit = load_relations(
+        models.StorageUnit.objects, schemas.StorageUnitSchema
+    ).get_or_none(id=storage_unit_id)
+
+    if not storage_unit:
+        raise errors.StorageUnitNotFound
+
+    result = schemas.StorageUnitSchema.from_model(storage_unit)
+    cache.set(cache_key, result.dict(), settings.STORAGE_UNIT_CACHE_TIMEOUT)
+    return result
+
+
+def _invalidate_storage_unit(storage_unit_id: uuid.UUID):
+    transaction.on_commit(lambda: cache.delete(_storage_unit_cache_key(storage_unit_id)))
+
+
+def _invalidate_storage_units(storage_unit_ids: list[uuid.UUID]):
+    keys = [_storage_unit_cache_key(storage_unit_id) for storage_unit_id in storage_unit_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+# Максимальное количество переходов в одном вызове apply_storage_unit_transitions
+MAX_TRANSITIONS_BATCH = 1000
+
+
+def _apply_transitions(
+    employee_id: uuid.UUID, items: list[transitions.Transition]
+) -> list[schemas.StorageUnitOperationSchema]:
+    if not models.Employee.objects.filter(id=employee_id).exists():
+        raise errors.EmployeeNotFound
+
+    # Внешние ключи отложенные: без проверки несуществующий склад обнаружится
+    # только при COMMIT в виде IntegrityError
+    warehouse_ids = {item.warehouse_id for item in items if item.warehouse_id is not None}
+    if (
+        warehouse_ids
+        and models.Warehouse.objects.filter(id__in=warehouse_ids).count() != len(warehouse_ids)
+    ):
+        raise errors.WarehouseNotFound
+
+    try:
+        operations = transitions.apply_transitions(employee_id, items)
+    except transitions.StorageUnitsNotFound as exc:
+        raise errors.StorageUnitsNotFound(
+            data={"storage_unit_ids": [str(item) for item in exc.storage_unit_ids]}
+        )
+    except transitions.TransitionNotAllowed as exc:
+        raise errors.StorageUnitTransitionNotAllowed(
+            data={
+                "storage_unit_id": str(exc.storage_unit_id),
+                "state": exc.state.value,
+                "action": exc.action.value,
+            }
+        )
+
+    _invalidate_storage_units([item.storage_unit_id for item in operations])
+    return [schemas.StorageUnitOperationSchema.from_model(item) for item in operations]
+
+
+def _apply_transition(
+    employee_id: uuid.UUID, item: transitions.Transition
+) -> schemas.StorageUnitOperationSchema:
+    try:
+        [operation] = _apply_transitions(employee_id, [item])
+    except errors.StorageUnitsNotFound:
+        raise errors.StorageUnitNotFound
+
+    return operation
+
+
 @api_v1.method(
     tags=["mobile"],
     summary="Получить список единиц хранения",
@@ -31,9 +128,7 @@ def get_storage_units(
         schemas.StorageUnitFilters(), title="Фильтрация"
     ),
 ) -> pagination.PaginatedResponse[schemas.StorageUnitSchema]:
-    query = models.StorageUnit.objects.select_related(
-        "product", "product__category"
-    ).order_by("-product__name", "-ext_id")
+    query = models.StorageUnit.objects.order_by("-product__name", "-ext_id")
 
     query = filters.filter_query(query)
     paginator = pagination.TypedPaginator(schemas.StorageUnitSchema, query)
@@ -48,17 +143,11 @@ def get_storage_units(
         errors.StorageUnitNotFound,
     ],
 )
+@priority(Priority.LATENCY_CRITICAL)
 def get_storage_unit_with_id(
     storage_unit_id: uuid.UUID = Body(..., title="ID единицы хранения", alias="id"),
 ) -> schemas.StorageUnitSchema:
-    storage_unit = models.StorageUnit.objects.select_related(
-        "product", "product__category"
-    ).get_or_none(id=storage_unit_id)
-
-    if not storage_unit:
-        raise errors.StorageUnitNotFound
-
-    return schemas.StorageUnitSchema.from_model(storage_unit)
+    return _get_storage_unit(storage_unit_id)
 
 
 @api_v1.method(
@@ -68,22 +157,16 @@ def get_storage_unit_with_id(
         errors.StorageUnitNotFound,
     ],
 )
+@priority(Priority.LATENCY_CRITICAL)
 def get_storage_unit_with_qrcode(
     qrcode_content: str = Body(..., title="Содержимое QR-кода"),
 ) -> schemas.StorageUnitSchema:
     try:
-        qrcode_payload = parse_qrcode_content(qrcode_content)
-    except jwt.exceptions.InvalidTokenError:
+        storage_unit_id = get_storage_unit_id(qrcode_content)
+    except InvalidQrCodeContent:
         raise errors.StorageUnitNotFound
 
-    storage_unit = models.StorageUnit.objects.select_related(
-        "product", "product__category"
-    ).get_or_none(id=qrcode_payload.storage_unit_id)
-
-    if not storage_unit:
-        raise errors.StorageUnitNotFound
-
-    return schemas.StorageUnitSchema.from_model(storage_unit)
+    return _get_storage_unit(storage_unit_id)
 
 
 @api_v1.method(
@@ -94,7 +177,7 @@ def get_product_categories(
     parent_id: uuid.UUID
     | None = Body(None, title="Фильтрация по ID родительской категории"),
 ) -> list[schemas.ProductCategorySchema]:
-    query = models.ProductCategory.objects.select_related("parent")
+    query = models.ProductCategory.objects.all()
     if parent_id is not None:
         query = query.filter(parent_id=parent_id)
 
@@ -104,28 +187,82 @@ def get_product_categories(
     ]
 
 
+def _update_ext_id_versioned(
+    storage_unit_id: uuid.UUID, ext_id: str, version: int
+) -> models.StorageUnit:
+    try:
+        updated = versioning.update_versioned(
+            models.StorageUnit.objects,
+            storage_unit_id,
+            version,
+            ext_id=ext_id,
+            updated_at=timezone.now(),
+        )
+    except versioning.VersionConflict as exc:
+        raise errors.StorageUnitVersionConflict(data={"version": exc.current_version})
+    if not updated:
+        raise errors.StorageUnitNotFound
+
+    _invalidate_storage_unit(storage_unit_id)
+    storage_unit = load_relations(
+        models.StorageUnit.objects, schemas.StorageUnitSchema
+    ).get_or_none(id=storage_unit_id)
+    if not storage_unit:
+        raise errors.StorageUnitNotFound
+
+    return storage_unit
+
+
+def _update_ext_id_locked(storage_unit_id: uuid.UUID, ext_id: str) -> models.StorageUnit:
+    with transaction.atomic():
+        storage_unit = load_relations(
+            models.StorageUnit.objects.select_for_update(of=("self",), no_key=True),
+            schemas.StorageUnitSchema,
+        ).get_or_none(id=storage_unit_id)
+        if not storage_unit:
+            raise errors.StorageUnitNotFound
+
+        storage_unit.ext_id = ext_id
+        storage_unit.updated_at = timezone.now()
+        storage_unit.save()
+        _invalidate_storage_unit(storage_unit.id)
+
+    return storage_unit
+
+
 @api_v1.method(
     tags=["mobile"],
     summary="Изменить номер ячейки для единицы хранения",
     errors=[
         errors.StorageUnitNotFound,
+        errors.StorageUnitVersionConflict,
+        errors.IdempotencyKeyInProgress,
     ],
 )
 def update_storage_unit_ext_id(
     storage_unit_id: uuid.UUID = Body(..., title="ID единицы хранения"),
     ext_id: str = Body(..., title="Новый номер ячейки"),
+    version: int
+    | None = Body(
+        None,
+        title="Версия единицы хранения",
+        description=(
+            "Если передана, единица хранения изменяется без блокировки и только если "
+            "ее версия не изменилась, иначе - ошибка с текущей версией"
+        ),
+    ),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
 ) -> schemas.StorageUnitSchema:
-    with transaction.atomic():
-        storage_unit = models.StorageUnit.objects.select_for_update(
-            of=("self",), no_key=True
-        ).get_or_none(id=storage_unit_id)
-        if not storage_unit:
-            raise errors.StorageUnitNotFound
+    with idempotency as saved:
+        if saved is not None:
+            return saved
 
-        storage_unit.ext_id = ext_id
-        storage_unit.save()
+        if version is not None:
+            storage_unit = _update_ext_id_versioned(storage_unit_id, ext_id, version)
+        else:
+            storage_unit = _update_ext_id_locked(storage_unit_id, ext_id)
 
-    return schemas.StorageUnitSchema.from_model(storage_unit)
+        return idempotency.save(schemas.StorageUnitSchema.from_model(storage_unit))
 
 
 @api_v1.method(
@@ -133,22 +270,29 @@ def update_storage_unit_ext_id(
     summary="Удалить единицу хранения",
     errors=[
         errors.StorageUnitNotFound,
+        errors.IdempotencyKeyInProgress,
     ],
 )
 def delete_storage_unit(
-    storage_unit_id: uuid.UUID = Body(..., title="ID единицы хранения")
+    storage_unit_id: uuid.UUID = Body(..., title="ID единицы хранения"),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
 ) -> bool:
     """Всегда возвращает либо True, либо одну из возможных ошибок."""
-    with transaction.atomic():
-        storage_unit = models.StorageUnit.objects.select_for_update(
-            of=("self",), no_key=True
-        ).get_or_none(id=storage_unit_id)
-        if not storage_unit:
-            raise errors.StorageUnitNotFound
+    with idempotency as saved:
+        if saved is not None:
+            return saved
+
+        with transaction.atomic():
+            storage_unit = models.StorageUnit.objects.select_for_update(
+                of=("self",), no_key=True
+            ).get_or_none(id=storage_unit_id)
+            if not storage_unit:
+                raise errors.StorageUnitNotFound
 
-        storage_unit.delete()
+            storage_unit.delete()
+            _invalidate_storage_unit(storage_unit_id)
 
-    return True
+        return idempotency.save(True)
 
 
 @api_v1.method(
@@ -169,13 +313,7 @@ def get_products(
 ) -> pagination.PaginatedResponse[schemas.ProductSchema]:
     query = models.Product.objects.order_by("name")
     if search_str:
-        query = query.filter(
-            Q(
-                Q(name__icontains=search_str)
-                | Q(SKU__icontains=search_str)
-                | Q(barcode__icontains=search_str)
-            ),
-        )
+        query = search.search_products(query, search_str)
 
     paginator = pagination.TypedPaginator(schemas.ProductSchema, query)
     return paginator.get_response(any_pagination)
@@ -188,10 +326,11 @@ def get_products(
         errors.ProductNotFound,
     ],
 )
+@priority(Priority.LATENCY_CRITICAL)
 def get_product_with_barcode(
     barcode: str = Body(..., title="Штрих-код товара"),
 ) -> schemas.ProductSchema:
-    product = models.Product.objects.select_related("category").get_or_none(
+    product = load_relations(models.Product.objects, schemas.ProductSchema).get_or_none(
         barcode=barcode
     )
 
@@ -204,50 +343,225 @@ def get_product_with_barcode(
 @api_v1.method(
     tags=["mobile"],
     summary="Создать единицу хранения с id товара",
-    errors=[errors.ProductNotFound, errors.StorageUnitAlreadyExists],
+    errors=[
+        errors.ProductNotFound,
+        errors.StorageUnitAlreadyExists,
+        errors.IdempotencyKeyInProgress,
+    ],
 )
 def create_storage_unit_with_product_id(
     product_id: uuid.UUID = Body(..., title="ID товара"),
     ext_id: str = Body(..., title="Номер ячейки"),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
 ) -> schemas.StorageUnitSchema:
-    product = models.Product.objects.get_or_none(id=product_id)
-    if not product:
-        raise errors.ProductNotFound
+    with idempotency as saved:
+        if saved is not None:
+            return saved
 
-    # TODO: с этим надо аккуратно
-    warehouse = models.Warehouse.objects.first()
-
-    try:
-        storage_unit = models.StorageUnit.objects.create(
-            product=product, warehouse=warehouse, ext_id=ext_id
+        product = models.Product.objects.select_related("category").get_or_none(
+            id=product_id
         )
-    except django.db.IntegrityError:
-        raise errors.StorageUnitAlreadyExists
+        if not product:
+            raise errors.ProductNotFound
+
+        # TODO: с этим надо аккуратно
+        warehouse = models.Warehouse.objects.first()
 
-    return schemas.StorageUnitSchema.from_model(storage_unit)
+        try:
+            storage_unit = models.StorageUnit.objects.create(
+                product=product, warehouse=warehouse, ext_id=ext_id
+            )
+        except django.db.IntegrityError:
+            raise errors.StorageUnitAlreadyExists
+
+        return idempotency.save(schemas.StorageUnitSchema.from_model(storage_unit))
 
 
 @api_v1.method(
     tags=["mobile"],
     summary="Создать единицу хранения по штрих-коду товара",
-    errors=[errors.ProductNotFound, errors.StorageUnitAlreadyExists],
+    errors=[
+        errors.ProductNotFound,
+        errors.StorageUnitAlreadyExists,
+        errors.IdempotencyKeyInProgress,
+    ],
 )
 def create_storage_unit_with_product_barcode(
     barcode: str = Body(..., title="Штрих-код товара"),
     ext_id: str = Body(..., title="Номер ячейки"),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
 ) -> schemas.StorageUnitSchema:
-    product = models.Product.objects.get_or_none(barcode=barcode)
-    if not product:
-        raise errors.ProductNotFound
+    with idempotency as saved:
+        if saved is not None:
+            return saved
 
-    # TODO: с этим надо аккуратно
-    warehouse = models.Warehouse.objects.first()
+        product = models.Product.objects.select_related("category").get_or_none(
+            barcode=barcode
+        )
+        if not product:
+            raise errors.ProductNotFound
 
-    try:
-        storage_unit = models.StorageUnit.objects.create(
-            product=product, warehouse=warehouse, ext_id=ext_id
+        # TODO: с этим надо аккуратно
+        warehouse = models.Warehouse.objects.first()
+
+        try:
+            storage_unit = models.StorageUnit.objects.create(
+                product=product, warehouse=warehouse, ext_id=ext_id
+            )
+        except django.db.IntegrityError:
+            raise errors.StorageUnitAlreadyExists
+
+        return idempotency.save(schemas.StorageUnitSchema.from_model(storage_unit))
+
+
+@api_v1.method(
+    tags=["mobile"],
+    summary="Разместить единицу хранения на складе",
+    errors=[
+        errors.EmployeeNotFound,
+        errors.WarehouseNotFound,
+        errors.StorageUnitNotFound,
+        errors.StorageUnitTransitionNotAllowed,
+        errors.IdempotencyKeyInProgress,
+    ],
+)
+def move_storage_unit(
+    employee_id: uuid.UUID = Body(..., title="ID сотрудника"),
+    storage_unit_id: uuid.UUID = Body(..., title="ID единицы хранения"),
+    warehouse_id: uuid.UUID = Body(..., title="ID склада назначения"),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
+) -> schemas.StorageUnitOperationSchema:
+    """Допустимо из состояний new и stored, переводит в stored."""
+    with idempotency as saved:
+        if saved is not None:
+            return saved
+
+        return idempotency.save(
+            _apply_transition(
+                employee_id,
+                transitions.Transition(storage_unit_id, transitions.Action.MOVE, warehouse_id),
+            )
+        )
+
+
+@api_v1.method(
+    tags=["mobile"],
+    summary="Зарезервировать единицу хранения",
+    errors=[
+        errors.EmployeeNotFound,
+        errors.StorageUnitNotFound,
+        errors.StorageUnitTransitionNotAllowed,
+        errors.IdempotencyKeyInProgress,
+    ],
+)
+def reserve_storage_unit(
+    employee_id: uuid.UUID = Body(..., title="ID сотрудника"),
+    storage_unit_id: uuid.UUID = Body(..., title="ID единицы хранения"),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
+) -> schemas.StorageUnitOperationSchema:
+    """Допустимо из состояний new и stored, переводит в reserved."""
+    with idempotency as saved:
+        if saved is not None:
+            return saved
+
+        return idempotency.save(
+            _apply_transition(
+                employee_id,
+                transitions.Transition(storage_unit_id, transitions.Action.RESERVE),
+            )
+        )
+
+
+@api_v1.method(
+    tags=["mobile"],
+    summary="Отобрать единицу хранения",
+    errors=[
+        errors.EmployeeNotFound,
+        errors.StorageUnitNotFound,
+        errors.StorageUnitTransitionNotAllowed,
+        errors.IdempotencyKeyInProgress,
+    ],
+)
+def pick_storage_unit(
+    employee_id: uuid.UUID = Body(..., title="ID сотрудника"),
+    storage_unit_id: uuid.UUID = Body(..., title="ID единицы хранения"),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
+) -> schemas.StorageUnitOperationSchema:
+    """Допустимо из состояний stored и reserved, переводит в picked."""
+    with idempotency as saved:
+        if saved is not None:
+            return saved
+
+        return idempotency.save(
+            _apply_transition(
+                employee_id,
+                transitions.Transition(storage_unit_id, transitions.Action.PICK),
+            )
+        )
+
+
+@api_v1.method(
+    tags=["mobile"],
+    summary="Списать единицу хранения",
+    errors=[
+        errors.EmployeeNotFound,
+        errors.StorageUnitNotFound,
+        errors.StorageUnitTransitionNotAllowed,
+        errors.IdempotencyKeyInProgress,
+    ],
+)
+def write_off_storage_unit(
+    employee_id: uuid.UUID = Body(..., title="ID сотрудника"),
+    storage_unit_id: uuid.UUID = Body(..., title="ID единицы хранения"),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
+) -> schemas.StorageUnitOperationSchema:
+    """Допустимо из любого состояния, кроме written_off."""
+    with idempotency as saved:
+        if saved is not None:
+            return saved
+
+        return idempotency.save(
+            _apply_transition(
+                employee_id,
+                transitions.Transition(storage_unit_id, transitions.Action.WRITE_OFF),
+            )
         )
-    except django.db.IntegrityError:
-        raise errors.StorageUnitAlreadyExists
 
-    return schemas.StorageUnitSchema.from_model(storage_unit)
+
+@api_v1.method(
+    tags=["mobile"],
+    summary="Применить пакет действий с единицами хранения",
+    errors=[
+        errors.EmployeeNotFound,
+        errors.WarehouseNotFound,
+        errors.StorageUnitsNotFound,
+        errors.StorageUnitTransitionNotAllowed,
+        errors.IdempotencyKeyInProgress,
+    ],
+)
+def apply_storage_unit_transitions(
+    employee_id: uuid.UUID = Body(..., title="ID сотрудника"),
+    items: list[schemas.StorageUnitTransitionSchema] = Body(
+        ...,
+        title="Действия",
+        description="Каждая единица хранения - не больше одного раза",
+        min_items=1,
+        max_items=MAX_TRANSITIONS_BATCH,
+        alias="transitions",
+    ),
+    idempotency: Idempotency = Depends(dependencies.get_idempotency),
+) -> list[schemas.StorageUnitOperationSchema]:
+    """Пакет применяется целиком или, при первой же ошибке, не применяется вовсе.
+
+    Число запросов к базе не зависит от размера пакета.
+    """
+    if len({item.storage_unit_id for item in items}) != len(items):
+        raise fastapi_jsonrpc.InvalidParams
+
+    with idempotency as saved:
+        if saved is not None:
+            return saved
+
+        return idempotency.save(
+            _apply_transitions(employee_id, [item.to_transition() for item in items])
+        )
@@ -1,10 +1,13 @@
+import collections
 import typing as tp
 
-from django.db.models import QuerySet
+from django.db.models import Count, QuerySet
 from pydantic import Field, BaseModel
 from pydantic.generics import GenericModel
 from pydantic.main import ModelMetaclass
 
+from .relations import load_relations
+
 _ItemsT = tp.TypeVar("_ItemsT")
 
 
@@ -57,7 +60,8 @@ _ST = tp.TypeVar("_ST")  # Schema Type
 class TypedPaginator(tp.Generic[_ST]):
     def __init__(self, schema: tp.Type[_ST], query: QuerySet):
         self.schema = schema
-        self.query = query
+        # Связи, объявленные в схеме, подгружаются здесь, до вычисления query
+        self.query = load_relations(query, schema)
         self._check_query_is_ordered()
 
     def get_response(
@@ -117,6 +121,14 @@ class TypedPaginator(tp.Generic[_ST]):
 
 
 class TypedPaginatorWithCustomParams(TypedPaginator):
+    """Пагинатор с дополнительными полями ответа, посчитанными по всей выборке.
+
+    Количество объектов считается тем же запросом, что и дополнительные поля:
+    на ответ уходит запрос страницы и не больше одного запроса на поля каждого вида.
+    Оконные функции в запросе страницы не используются: с ними Postgres сортирует
+    всю выборку, а не читает первые строки по индексу.
+    """
+
     def __init__(
         self, schema: tp.Type[_ST], query: QuerySet, paginated_response: tp.Any
     ):
@@ -125,22 +137,56 @@ class TypedPaginatorWithCustomParams(TypedPaginator):
         ), "paginated_response должен наследоваться от pydantic.generics.GenericModel"
         super().__init__(schema, query)
         self._custom_params = {}
+        self._group_counts = {}
         self._paginated_response = paginated_response
 
+    def _check_params(self, params: tp.Iterable[str]):
+        for param in params:
+            assert (
+                param in self._paginated_response.__fields__
+            ), "custom_params должны соответствовать paginated_response"
+
     def set_custom_params(self, custom_params: dict[str, tp.Any]):
         """Параметры для добавления к основным.
 
         **custom_params подставляются в query.aggregate
         """
         assert isinstance(custom_params, dict)
-        for param in custom_params.keys():
-            assert (
-                param in self._paginated_response.__fields__
-            ), "custom_params должны соответствовать paginated_response"
+        self._check_params(custom_params)
         self._custom_params = custom_params
 
-    def _get_custom_params(self) -> dict[str, tp.Any]:
-        return self.query.aggregate(**self._custom_params)
+    def set_group_counts(self, group_counts: dict[str, str]):
+        """Количество объектов по значениям полей: {параметр ответа: поле модели}.
+
+        Считаются одним GROUP BY по всем полям сразу и только при count=true,
+        total_size получается суммой.
+        """
+        assert isinstance(group_counts, dict)
+        self._check_params(group_counts)
+        self._group_counts = group_counts
+
+    def _get_custom_params(self, count: bool) -> dict[str, tp.Any]:
+        aggregates = dict(self._custom_params)
+        if count and not self._group_counts:
+            aggregates["total_size"] = Count("pk")
+
+        if not aggregates:
+            return {}
+
+        return self.query.order_by().aggregate(**aggregates)
+
+    def _get_group_counts(self) -> dict[str, tp.Any]:
+        fields = list(self._group_counts.values())
+        rows = self.query.order_by().values(*fields).annotate(_count=Count("pk"))
+
+        params = {param: collections.Counter() for param in self._group_counts}
+        total_size = 0
+        for row in rows:
+            total_size += row["_count"]
+            for param, field in self._group_counts.items():
+                params[param][row[field]] += row["_count"]
+
+        return {"total_size": total_size, **{k: dict(v) for k, v in params.items()}}
 
     def get_response(
         self,
@@ -153,8 +199,6 @@ class TypedPaginatorWithCustomParams(TypedPaginator):
         :param model_args: доп. аргументы для метода `.from_model`
         :return: ответ с постраничной навигацией
         """
-        total_size = None
-
         if isinstance(pagination, PaginationParams):
             bottom = (pagination.page - 1) * pagination.per_page
             top = bottom + pagination.per_page
@@ -163,10 +207,9 @@ class TypedPaginatorWithCustomParams(TypedPaginator):
             bottom = pagination.offset
             top = pagination.offset + pagination.limit
 
-        if self._custom_params:
-            custom_params = self._get_custom_params()
-        else:
-            custom_params = self._custom_params
+        custom_params = self._get_custom_params(pagination.count)
+        if self._group_counts and pagination.count:
+            custom_params.update(self._get_group_counts())
 
         orphans = 1
         items = [
@@ -179,10 +222,7 @@ class TypedPaginatorWithCustomParams(TypedPaginator):
             # Удаляем вычитанные orphans объекты
             items = items[:-orphans]
 
-        if "total_size" in custom_params:
-            total_size = custom_params.pop("total_size")
-        elif pagination.count:
-            total_size = self.query.count()
+        total_size = custom_params.pop("total_size", None)
 
         return self._paginated_response[self.schema](
             items=items,
@@ -0,0 +1,56 @@
+"""Загрузка связанных объектов по объявлениям в схемах ответа.
+
+Схема объявляет связи, к которым обращается её from_model:
+
+    class ProductSchema(BaseModel):
+        relations: Relations = {"category": ProductCategorySchema}
+
+Ключ - путь к связи от модели схемы (можно через "__"), значение - схема связанного
+объекта (её relations подгружаются рекурсивно) или None.
+"""
+import typing as tp
+
+from django.db.models import Model, QuerySet
+from pydantic import BaseModel
+
+Relations = tp.ClassVar[dict[str, tp.Optional[tp.Type[BaseModel]]]]
+
+_QueryT = tp.TypeVar("_QueryT", bound=QuerySet)
+
+
+def iter_relation_paths(schema: tp.Type[BaseModel], prefix: str = "") -> tp.Iterator[str]:
+    for name, related_schema in getattr(schema, "relations", {}).items():
+        path = f"{prefix}{name}"
+        yield path
+        if related_schema is not None:
+            yield from iter_relation_paths(related_schema, prefix=f"{path}__")
+
+
+def _is_single_valued(model: tp.Type[Model], path: str) -> bool:
+    """Все связи на пути - прямые ForeignKey/OneToOne, т.е. подходят для select_related."""
+    for name in path.split("__"):
+        field = model._meta.get_field(name)
+        if field.many_to_many or field.one_to_many:
+            return False
+        model = field.related_model
+
+    return True
+
+
+def load_relations(query: _QueryT, schema: tp.Type[BaseModel]) -> _QueryT:
+    """Добавить к query select_related/prefetch_related для всех связей схемы."""
+    select_related = []
+    prefetch_related = []
+    for path in iter_relation_paths(schema):
+        if _is_single_valued(query.model, path):
+            select_related.append(path)
+        else:
+            prefetch_related.append(path)
+
+    if select_related:
+        query = query.select_related(*select_related)
+
+    if prefetch_related:
+        query = query.prefetch_related(*prefetch_related)
+
+    return query
@@ -1,9 +1,10 @@
+import datetime as dt
 import uuid
-from django.db.models import Q
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator
 
-from pocket_storage import models
+from pocket_storage import models, search, transitions
+from pocket_storage.api.relations import Relations
 
 
 class StorageUnitSchema(BaseModel):
@@ -15,6 +16,9 @@ class StorageUnitSchema(BaseModel):
     product_category_id: uuid.UUID = Field(..., title="ID категории товара")
     product_category_name: str = Field(..., title="Название категории товара")
     ext_id: str | None = Field(None, title="Номер ячейки")
+    version: int = Field(..., title="Версия", description="Для оптимистичного изменения")
+
+    relations: Relations = {"product__category": None}
 
     @classmethod
     def from_model(cls, storage_unit: models.StorageUnit):
@@ -27,6 +31,7 @@ class StorageUnitSchema(BaseModel):
             product_category_id=storage_unit.product.category.id,
             product_category_name=storage_unit.product.category.name,
             ext_id=storage_unit.ext_id,
+            version=storage_unit.version,
         )
 
 
@@ -42,12 +47,7 @@ class StorageUnitFilters(BaseModel):
         filter_kwargs = self.dict(exclude_none=True)
 
         if search_query := filter_kwargs.pop("search_query", None):
-            query = query.filter(
-                Q(product__name__icontains=search_query)
-                | Q(product__SKU__icontains=search_query)
-                | Q(product__barcode__icontains=search_query)
-                | Q(ext_id__icontains=search_query)
-            )
+            query = search.search_storage_units(query, search_query)
 
         return query.filter(**filter_kwargs)
 
@@ -73,6 +73,8 @@ class ProductSchema(BaseModel):
     barcode: str | None = Field(None, title="Штрих-код товара (если есть)")
     category: ProductCategorySchema | None = Field(None, title="Категория товара")
 
+    relations: Relations = {"category": ProductCategorySchema}
+
     @classmethod
     def from_model(cls, product: models.Product):
         return cls(
@@ -82,3 +84,44 @@ class ProductSchema(BaseModel):
             barcode=product.barcode,
             category=ProductCategorySchema.from_model(product.category),
         )
+
+
+class StorageUnitTransitionSchema(BaseModel):
+    storage_unit_id: uuid.UUID = Field(..., title="ID единицы хранения")
+    action: transitions.Action = Field(..., title="Действие")
+    warehouse_id: uuid.UUID | None = Field(
+        None, title="ID склада назначения", description="Только для действия move"
+    )
+
+    @root_validator(skip_on_failure=True)
+    def check_warehouse(cls, values):
+        if (values["action"] == transitions.Action.MOVE) != (values["warehouse_id"] is not None):
+            raise ValueError("warehouse_id is required for move and only for move")
+        return values
+
+    def to_transition(self) -> transitions.Transition:
+        return transitions.Transition(
+            storage_unit_id=self.storage_unit_id,
+            action=self.action,
+            warehouse_id=self.warehouse_id,
+        )
+
+
+class StorageUnitOperationSchema(BaseModel):
+    id: uuid.UUID = Field(..., title="ID действия")
+    storage_unit_id: uuid.UUID = Field(..., title="ID единицы хранения")
+    employee_id: uuid.UUID = Field(..., title="ID сотрудника")
+    initial_state: models.StorageUnitState = Field(..., title="Начальное состояние")
+    final_state: models.StorageUnitState = Field(..., title="Конечное состояние")
+    created_at: dt.datetime = Field(..., title="Дата/Время совершения действия")
+
+    @classmethod
+    def from_model(cls, operation: models.StorageUnitOperation):
+        return cls(
+            id=operation.id,
+            storage_unit_id=operation.storage_unit_id,
+            employee_id=operation.employee_id,
+            initial_state=operation.initial_state,
+            final_state=operation.final_state,
+            created_at=operation.created_at,
+        )
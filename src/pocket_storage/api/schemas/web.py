@@ -1,13 +1,18 @@
 import datetime as dt
+import typing as tp
 import uuid
 
 from django.contrib.auth.models import User
 from django.contrib.postgres.search import SearchVector
 from pydantic import BaseModel
 from pydantic import Field
-from django.db.models import Q
 
-from pocket_storage import models
+from pocket_storage import models, search
+from pocket_storage import product_import
+from pocket_storage.api.pagination import PaginatedResponse
+from pocket_storage.api.relations import Relations
+
+_ItemsT = tp.TypeVar("_ItemsT")
 
 
 class UserSchema(BaseModel):
@@ -81,6 +86,9 @@ class ProductSchema(BaseModel):
     SKU: str = Field(..., title="SKU товара")
     barcode: str | None = Field(None, title="Штрих-код товара (если есть)")
     category: ProductCategorySchema | None = Field(None, title="Категория товара")
+    version: int = Field(..., title="Версия", description="Для оптимистичного изменения")
+
+    relations: Relations = {"category": ProductCategorySchema}
 
     @classmethod
     def from_model(cls, product: models.Product):
@@ -90,6 +98,36 @@ class ProductSchema(BaseModel):
             SKU=product.SKU,
             barcode=product.barcode,
             category=ProductCategorySchema.from_model(product.category),
+            version=product.version,
+        )
+
+
+class ProductImportErrorSchema(BaseModel):
+    record: int = Field(
+        ...,
+        title="Номер записи CSV",
+        description="Без заголовка, начиная с 1. Запись со значением в кавычках может занимать "
+        "несколько строк файла",
+    )
+    message: str = Field(..., title="Описание ошибки")
+
+
+class ProductImportResultSchema(BaseModel):
+    created: int = Field(..., title="Создано товаров")
+    updated: int = Field(..., title="Обновлено товаров")
+    errors: list[ProductImportErrorSchema] = Field(
+        ..., title="Записи, не прошедшие проверку"
+    )
+
+    @classmethod
+    def from_result(cls, result: product_import.ImportResult):
+        return cls(
+            created=result.created,
+            updated=result.updated,
+            errors=[
+                ProductImportErrorSchema(record=error.record, message=error.message)
+                for error in result.errors
+            ],
         )
 
 
@@ -120,13 +158,7 @@ class ProductFilters(BaseModel):
 
     def filter_query(self, query: models.QuerySet):
         if self.search_str:
-            query = query.filter(
-                Q(
-                    Q(name__icontains=self.search_str)
-                    | Q(SKU__icontains=self.search_str)
-                    | Q(barcode__icontains=self.search_str)
-                ),
-            )
+            query = search.search_products(query, self.search_str)
 
         if self.category_id:
             query = query.filter(category_id=self.category_id)
@@ -160,6 +192,8 @@ class EmployeeSchema(BaseModel):
     middle_name: str | None = Field(None, title="Отчество")
     position: EmployeePositionSchema = Field(..., title="Должность")
 
+    relations: Relations = {"position": EmployeePositionSchema}
+
     @classmethod
     def from_model(cls, employee: models.Employee):
         return cls(
@@ -214,6 +248,19 @@ class StorageUnitFilters(BaseModel):
         return query.filter(**filter_kwargs)
 
 
+class StorageUnitsPaginatedResponse(PaginatedResponse[_ItemsT], tp.Generic[_ItemsT]):
+    state_counts: dict[models.StorageUnitState, int] | None = Field(
+        None,
+        title="Количество по состояниям",
+        description="Считается по всей выборке, только при count=true",
+    )
+    warehouse_counts: dict[uuid.UUID, int] | None = Field(
+        None,
+        title="Количество по складам",
+        description="Считается по всей выборке, только при count=true",
+    )
+
+
 class StorageUnitSchema(BaseModel):
     id: uuid.UUID = Field(..., title="ID единицы хранения")
     product: ShortProductSchema = Field(..., title="Товар")
@@ -226,6 +273,11 @@ class StorageUnitSchema(BaseModel):
         ..., title="Обновлено", description="Дата/Время обновления записи"
     )
 
+    relations: Relations = {
+        "product": ShortProductSchema,
+        "warehouse": WarehouseSchema,
+    }
+
     @classmethod
     def from_model(cls, storage_unit: models.StorageUnit):
         return cls(
@@ -248,6 +300,8 @@ class StorageUnitOperationSchema(BaseModel):
     final_state: models.StorageUnitState = Field(..., title="Окончательное состояние")
     created_at: dt.datetime = Field(..., title="Дата/Время совершения действия")
 
+    relations: Relations = {"employee": EmployeeSchema}
+
     @classmethod
     def from_model(cls, operation: models.StorageUnitOperation):
         return cls(
@@ -258,3 +312,39 @@ class StorageUnitOperationSchema(BaseModel):
             final_state=operation.final_state,
             created_at=operation.created_at,
         )
+
+
+class ProductStockSchema(BaseModel):
+    """Остаток товара на одном складе в одном состоянии."""
+
+    warehouse: WarehouseSchema = Field(..., title="Склад")
+    state: models.StorageUnitState = Field(..., title="Состояние")
+    count: int = Field(..., title="Количество единиц хранения")
+
+    relations: Relations = {"warehouse": None}
+
+    @classmethod
+    def from_model(cls, stock: models.StockAggregate):
+        return cls(
+            warehouse=WarehouseSchema.from_model(stock.warehouse),
+            state=stock.state,
+            count=stock.count,
+        )
+
+
+class WarehouseStockSchema(BaseModel):
+    """Остаток одного товара на складе в одном состоянии."""
+
+    product: ShortProductSchema = Field(..., title="Товар")
+    state: models.StorageUnitState = Field(..., title="Состояние")
+    count: int = Field(..., title="Количество единиц хранения")
+
+    relations: Relations = {"product": None}
+
+    @classmethod
+    def from_model(cls, stock: models.StockAggregate):
+        return cls(
+            product=ShortProductSchema.from_model(stock.product),
+            state=stock.state,
+            count=stock.count,
+        )
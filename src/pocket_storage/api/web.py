@@ -1,3 +1,4 @@
+import io
 import uuid
 
 import django.db
@@ -8,9 +9,14 @@ from fastapi_jsonrpc import Entrypoint
 
 from pocket_storage import auth
 from pocket_storage import models
+from pocket_storage import product_import
+from pocket_storage import versioning
+from pocket_storage.executor import Priority, priority
 from . import dependencies
 from . import errors
+from . import middlewares
 from . import pagination
+from .relations import load_relations
 from .schemas import web as schemas
 
 api_v1 = Entrypoint(
@@ -19,6 +25,13 @@ api_v1 = Entrypoint(
     summary="Web JSON_RPC entrypoint",
     errors=[
         errors.AccessDenied,
+        errors.ServiceOverloaded,
+        errors.StatementTimeout,
+    ],
+    middlewares=[
+        middlewares.instrument("web"),
+        middlewares.limit_concurrency("web"),
+        middlewares.cancel_queries("web"),
     ],
 )
 
@@ -144,9 +157,7 @@ def rename_product_category(
             category = (
                 models.ProductCategory.objects.select_for_update(
                     of=("self",), no_key=True
-                )
-                .select_related("parent")
-                .get(id=category_id)
+                ).get(id=category_id)
             )
         except models.ProductCategory.DoesNotExist:
             raise errors.ProductCategoryNotFound
@@ -170,7 +181,7 @@ def get_product_categories(
     parent_id: uuid.UUID
     | None = Body(None, title="Фильтрация по ID родительской категории"),
 ) -> list[schemas.ProductCategorySchema]:
-    query = models.ProductCategory.objects.select_related("parent")
+    query = models.ProductCategory.objects.all()
     if parent_id is not None:
         query = query.filter(parent_id=parent_id)
 
@@ -214,6 +225,42 @@ def add_product(
     return schemas.ProductSchema.from_model(product)
 
 
+def _update_product_versioned(
+    product_id: uuid.UUID, version: int, update_kwargs: dict
+) -> schemas.ProductSchema:
+    category_id = update_kwargs.get("category_id")
+    if (
+        category_id is not None
+        and not models.ProductCategory.objects.filter(id=category_id).exists()
+    ):
+        raise errors.ProductCategoryNotFound
+
+    try:
+        updated = versioning.update_versioned(
+            models.Product.objects,
+            product_id,
+            version,
+            updated_at=timezone.now(),
+            **update_kwargs,
+        )
+    except versioning.VersionConflict as exc:
+        raise errors.ProductVersionConflict(data={"version": exc.current_version})
+    except django.db.IntegrityError as exc:
+        if "violates unique constraint" in str(exc):
+            raise errors.ProductAlreadyExists
+        raise
+    if not updated:
+        raise errors.ProductNotFound
+
+    product = load_relations(models.Product.objects, schemas.ProductSchema).get_or_none(
+        id=product_id
+    )
+    if not product:
+        raise errors.ProductNotFound
+
+    return schemas.ProductSchema.from_model(product)
+
+
 @api_v1.method(
     tags=["web", "products"],
     summary="Редактировать товар",
@@ -221,6 +268,7 @@ def add_product(
         errors.ProductNotFound,
         errors.ProductAlreadyExists,
         errors.ProductCategoryNotFound,
+        errors.ProductVersionConflict,
     ],
 )
 def update_product(
@@ -229,15 +277,26 @@ def update_product(
     product_data: schemas.ProductUpdateSchema = Body(
         ..., title="Данные для изменения товара"
     ),
+    version: int
+    | None = Body(
+        None,
+        title="Версия товара",
+        description=(
+            "Если передана, товар изменяется без блокировки и только если его версия "
+            "не изменилась, иначе - ошибка с текущей версией"
+        ),
+    ),
 ) -> schemas.ProductSchema:
     update_kwargs = product_data.dict(exclude_none=True)
+    if version is not None:
+        return _update_product_versioned(product_id, version, update_kwargs)
+
     with transaction.atomic():
         try:
-            product = (
-                models.Product.objects.select_for_update(of=("self",), no_key=True)
-                .select_related("category")
-                .get(id=product_id)
-            )
+            product = load_relations(
+                models.Product.objects.select_for_update(of=("self",), no_key=True),
+                schemas.ProductSchema,
+            ).get(id=product_id)
         except models.Product.DoesNotExist:
             raise errors.ProductNotFound
 
@@ -274,6 +333,30 @@ def update_product(
     return schemas.ProductSchema.from_model(product)
 
 
+@api_v1.method(
+    tags=["web", "products"],
+    summary="Импортировать товары из CSV",
+    errors=[
+        errors.ProductImportInvalidFile,
+    ],
+)
+@priority(Priority.BULK)
+def import_products(
+    _: auth.Session = Depends(dependencies.get_session),
+    csv_content: str = Body(
+        ...,
+        title="Содержимое CSV-файла",
+        description="Колонки: name,SKU,barcode,category_id. Существующие товары обновляются по SKU",
+    ),
+) -> schemas.ProductImportResultSchema:
+    try:
+        result = product_import.import_products(io.StringIO(csv_content))
+    except product_import.ProductImportError as exc:
+        raise errors.ProductImportInvalidFile(data={"reason": str(exc)})
+
+    return schemas.ProductImportResultSchema.from_result(result)
+
+
 @api_v1.method(
     tags=["web", "products"],
     summary="Получить товар по ID",
@@ -283,7 +366,9 @@ def get_product(
     product_id: uuid.UUID = Body(..., title="ID товара", alias="id"),
 ) -> schemas.ProductSchema:
     try:
-        product = models.Product.objects.select_related("category").get(id=product_id)
+        product = load_relations(models.Product.objects, schemas.ProductSchema).get(
+            id=product_id
+        )
     except models.Product.DoesNotExist:
         raise errors.ProductNotFound
 
@@ -294,6 +379,7 @@ def get_product(
     tags=["web", "product"],
     summary="Получить список продуктов",
 )
+@priority(Priority.BULK)
 def get_products(
     _: auth.Session = Depends(dependencies.get_session),
     any_pagination: pagination.AnyPagination = Depends(
@@ -383,9 +469,9 @@ def get_employee(
     _: auth.Session = Depends(dependencies.get_session),
     employee_id: uuid.UUID = Body(..., title="ID сотрудника"),
 ) -> schemas.EmployeeSchema:
-    employee = models.Employee.objects.select_related("position").get_or_none(
-        id=employee_id
-    )
+    employee = load_relations(
+        models.Employee.objects, schemas.EmployeeSchema
+    ).get_or_none(id=employee_id)
 
     if not employee:
         raise errors.EmployeeNotFound
@@ -397,6 +483,7 @@ def get_employee(
     tags=["web", "employees"],
     summary="Получить список сотрудников",
 )
+@priority(Priority.BULK)
 def get_employees(
     _: auth.Session = Depends(dependencies.get_session),
     any_pagination: pagination.AnyPagination = Depends(
@@ -406,9 +493,7 @@ def get_employees(
         schemas.EmployeeFilters(), title="Фильтрация"
     ),
 ) -> pagination.PaginatedResponse[schemas.EmployeeSchema]:
-    query = models.Employee.objects.select_related("position").order_by(
-        "last_name", "first_name", "middle_name"
-    )
+    query = models.Employee.objects.order_by("last_name", "first_name", "middle_name")
     query = filters.filter_query(query)
 
     paginator = pagination.TypedPaginator(schemas.EmployeeSchema, query)
@@ -431,9 +516,10 @@ def update_employee(
     ),
 ) -> schemas.EmployeeSchema:
     with transaction.atomic():
-        employee = models.Employee.objects.select_for_update(of=("self",)).get_or_none(
-            id=employee_id
-        )
+        employee = load_relations(
+            models.Employee.objects.select_for_update(of=("self",)),
+            schemas.EmployeeSchema,
+        ).get_or_none(id=employee_id)
 
         if not employee:
             raise errors.EmployeeNotFound
@@ -464,6 +550,7 @@ def update_employee(
     summary="Получить список единиц хранения продукта",
     errors=[errors.ProductNotFound],
 )
+@priority(Priority.BULK)
 def get_storage_units(
     _: auth.Session = Depends(dependencies.get_session),
     any_pagination: pagination.AnyPagination = Depends(
@@ -473,19 +560,64 @@ def get_storage_units(
     filters: schemas.StorageUnitFilters = Body(
         schemas.StorageUnitFilters(), title="Фильтрация"
     ),
-) -> pagination.PaginatedResponse[schemas.StorageUnitSchema]:
+) -> schemas.StorageUnitsPaginatedResponse[schemas.StorageUnitSchema]:
     product = models.Product.objects.get_or_none(id=product_id)
     if not product:
         raise errors.ProductNotFound
 
-    query = (
-        models.StorageUnit.objects.select_related("product", "warehouse")
-        .order_by("warehouse", "-updated_at")
-        .filter(product_id=product_id)
+    query = models.StorageUnit.objects.filter(product_id=product_id).order_by(
+        "warehouse", "-updated_at"
     )
     query = filters.filter_query(query)
 
-    paginator = pagination.TypedPaginator(schemas.StorageUnitSchema, query)
+    paginator = pagination.TypedPaginatorWithCustomParams(
+        schemas.StorageUnitSchema, query, schemas.StorageUnitsPaginatedResponse
+    )
+    paginator.set_group_counts(
+        {"state_counts": "state", "warehouse_counts": "warehouse_id"}
+    )
+    return paginator.get_response(any_pagination)
+
+
+@api_v1.method(
+    tags=["web", "stock"],
+    summary="Получить остатки товара по складам",
+    errors=[errors.ProductNotFound],
+)
+def get_product_stock(
+    _: auth.Session = Depends(dependencies.get_session),
+    product_id: uuid.UUID = Body(..., title="ID товара"),
+) -> list[schemas.ProductStockSchema]:
+    if not models.Product.objects.filter(id=product_id).exists():
+        raise errors.ProductNotFound
+
+    query = models.StockAggregate.objects.filter(product_id=product_id, count__gt=0)
+    stock = load_relations(query, schemas.ProductStockSchema).order_by(
+        "warehouse__name", "state"
+    )
+    return [schemas.ProductStockSchema.from_model(item) for item in stock]
+
+
+@api_v1.method(
+    tags=["web", "stock"],
+    summary="Получить остатки товаров на складе",
+    errors=[errors.WarehouseNotFound],
+)
+def get_warehouse_stock(
+    _: auth.Session = Depends(dependencies.get_session),
+    any_pagination: pagination.AnyPagination = Depends(
+        dependencies.get_mutual_exclusive_pagination
+    ),
+    warehouse_id: uuid.UUID = Body(..., title="ID склада"),
+) -> pagination.PaginatedResponse[schemas.WarehouseStockSchema]:
+    if not models.Warehouse.objects.filter(id=warehouse_id).exists():
+        raise errors.WarehouseNotFound
+
+    query = models.StockAggregate.objects.filter(
+        warehouse_id=warehouse_id, count__gt=0
+    ).order_by("product__name", "product_id", "state")
+
+    paginator = pagination.TypedPaginator(schemas.WarehouseStockSchema, query)
     return paginator.get_response(any_pagination)
 
 
@@ -494,6 +626,7 @@ def get_storage_units(
     summary="Получить список действий с единицей хранения товара",
     errors=[errors.StorageUnitNotFound],
 )
+@priority(Priority.BULK)
 def get_storage_unit_operations(
     _: auth.Session = Depends(dependencies.get_session),
     any_pagination: pagination.AnyPagination = Depends(
@@ -1,8 +1,7 @@
 import asyncio
+import functools
 import logging
-from concurrent.futures import ThreadPoolExecutor
 
-import django.db
 import fastapi_jsonrpc
 from asgiref.sync import sync_to_async
 from django.conf import settings
@@ -10,26 +9,41 @@ from django.core.asgi import get_asgi_application as get_django_asgi_app
 from django.core.signals import request_started, request_finished
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
-from starlette.requests import Request
-from starlette.responses import RedirectResponse
+from starlette.responses import PlainTextResponse, RedirectResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from . import instrumentation, metrics, profiling, statement_timeout
+from .executor import DjangoThreadPoolExecutor, get_priority
 from .api.web import api_v1 as web_api_v1
 from .api.mobile import api_v1 as mobile_api_v1
 
 logger = logging.getLogger(__name__)
 
 
-class DjangoThreadPoolExecutor(ThreadPoolExecutor):
-    def submit(self, fn, *args, **kwargs):
-        def func():
-            django.db.reset_queries()
-            django.db.close_old_connections()
-            return fn(*args, **kwargs)
+default_executor = DjangoThreadPoolExecutor(
+    max_workers=settings.THREADS, min_workers=settings.THREADS_MIN
+)
+default_executor.export_metrics()
+
+
+async def call_sync_in_default_executor(call, *args, **kwargs):
+    """Замена fastapi_jsonrpc.call_sync_async: синхронные методы выполняются в default_executor."""
+    if asyncio.iscoroutinefunction(call):
+        return await call(*args, **kwargs)
 
-        return super().submit(func)
+    func = functools.partial(call, *args, **kwargs)
+    stats = instrumentation.current_call.get()
+    if stats is not None and stats.profile:
+        func = functools.partial(profiling.run_profiled, stats, func)
 
+    if stats is not None and stats.statement_timeout_ms:
+        func = functools.partial(
+            statement_timeout.run_with_statement_timeout, stats.statement_timeout_ms, func
+        )
 
-default_executor = DjangoThreadPoolExecutor(max_workers=settings.THREADS)
+    return await asyncio.wrap_future(
+        default_executor.submit_with_priority(get_priority(call), func)
+    )
 
 
 app = fastapi_jsonrpc.API(
@@ -53,20 +67,38 @@ async def on_startup():
     loop = asyncio.get_running_loop()
     logger.info("Setup ThreadPoolExecutor: max_workers=%s", settings.THREADS)
     loop.set_default_executor(default_executor)
+    if settings.THREADS_ADAPTIVE:
+        logger.info("Adaptive ThreadPoolExecutor: min_workers=%s", settings.THREADS_MIN)
+        default_executor.start_adaptive_sizing(
+            target_wait=settings.THREADS_TARGET_WAIT_MS / 1000,
+            db_connections_reserve=settings.DB_CONNECTIONS_RESERVE,
+        )
+    fastapi_jsonrpc.call_sync_async = call_sync_in_default_executor
 
 
-@app.middleware("http")
-async def django_request_signals(request: Request, call_next):
-    await sync_to_async(request_started.send)(sender=app.__class__, scope=request.scope)
+class DjangoRequestSignalsMiddleware:
+    """Сигналы Django request_started/request_finished вокруг каждого HTTP-запроса.
 
-    try:
-        response = await call_next(request)
-    finally:
-        await sync_to_async(request_finished.send)(
-            sender=app.__class__, scope=request.scope
-        )
+    Чистый ASGI middleware: BaseHTTPMiddleware (@app.middleware) подменяет receive,
+    и Request.is_disconnected() за ним не видит отключения клиента.
+    """
 
-    return response
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        await sync_to_async(request_started.send)(sender=self.__class__, scope=scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await sync_to_async(request_finished.send)(sender=self.__class__, scope=scope)
+
+
+app.add_middleware(DjangoRequestSignalsMiddleware)
 
 
 app.mount("/app", get_django_asgi_app())
@@ -83,3 +115,10 @@ app.bind_entrypoint(mobile_api_v1)
 @app.get("/", include_in_schema=False)
 def redirect_to_docs() -> RedirectResponse:
     return RedirectResponse("/docs")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -53,3 +53,11 @@ def get_session(session_key: str) -> Session | None:
     return Session(
         key=session_key, data=parse_raw_as(SessionData, django_session.session_data)
     )
+
+
+def is_staff_session(session_key: str) -> bool:
+    session = get_session(session_key)
+    if session is None:
+        return False
+
+    return User.objects.filter(id=session.data.user_id, is_staff=True).exists()
@@ -0,0 +1,281 @@
+"""Пул потоков для синхронного кода (JSON-RPC методов и Django ORM).
+
+Задачи ждут в собственной очереди пула и передаются потокам, пока число выполняющихся
+задач меньше лимита. Очереди у каждого приоритета свои, следующая задача выбирается
+взвешенным round-robin, а BULK-задачи не занимают последний свободный поток.
+В адаптивном режиме лимит меняется между min_workers и max_workers: растет, пока
+задачи долго ждут потока, и снижается, когда пул простаивает или в Postgres
+заканчиваются свободные соединения.
+"""
+import collections
+import contextvars
+import dataclasses
+import enum
+import logging
+import threading
+import time
+import typing as tp
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import django.db
+
+from . import instrumentation, metrics
+
+logger = logging.getLogger(__name__)
+
+ADJUST_INTERVAL = 5.0
+
+
+class Priority(str, enum.Enum):
+    # Короткие запросы сканера: поиск по QR-коду, штрихкоду, ID
+    LATENCY_CRITICAL = "latency_critical"
+    DEFAULT = "default"
+    # Тяжелые списки с поиском и подсчетом, импорт
+    BULK = "bulk"
+
+
+PRIORITY_WEIGHTS = {
+    Priority.LATENCY_CRITICAL: 8,
+    Priority.DEFAULT: 3,
+    Priority.BULK: 1,
+}
+
+_T = tp.TypeVar("_T", bound=tp.Callable)
+
+
+def priority(value: Priority) -> tp.Callable[[_T], _T]:
+    """Приоритет JSON-RPC метода в пуле (декоратор, ставится под @api_v1.method)."""
+
+    def decorator(func: _T) -> _T:
+        func.priority = value
+        return func
+
+    return decorator
+
+
+def get_priority(func: tp.Callable) -> Priority:
+    return getattr(func, "priority", Priority.DEFAULT)
+
+
+queue_depth = metrics.Gauge(
+    "pocket_storage_executor_queue_depth",
+    "Задачи, ожидающие свободного потока",
+)
+active_workers = metrics.Gauge(
+    "pocket_storage_executor_active_workers",
+    "Выполняющиеся задачи",
+)
+workers_limit = metrics.Gauge(
+    "pocket_storage_executor_workers_limit",
+    "Текущий лимит одновременно выполняющихся задач",
+)
+task_wait = metrics.Histogram(
+    "pocket_storage_executor_task_wait_seconds",
+    "Время ожидания задачи в очереди пула",
+    ("priority",),
+)
+
+
+@dataclasses.dataclass
+class _Task:
+    future: Future
+    context: contextvars.Context
+    fn: tp.Callable
+    args: tuple
+    kwargs: dict
+    priority: Priority
+    submitted_at: float = dataclasses.field(default_factory=time.perf_counter)
+
+
+def db_connections_headroom(reserve: int) -> int:
+    """Сколько еще соединений можно открыть к Postgres, оставив reserve свободными."""
+    try:
+        with django.db.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT current_setting('max_connections')::int - count(*) FROM pg_stat_activity"
+            )
+            [free] = cursor.fetchone()
+    finally:
+        django.db.connection.close()
+
+    return free - reserve
+
+
+def next_limit(
+    limit: int,
+    *,
+    min_workers: int,
+    max_workers: int,
+    avg_wait: float,
+    target_wait: float,
+    db_headroom: int,
+) -> int:
+    if db_headroom < 0:
+        return max(min_workers, limit - 1)
+
+    if avg_wait > target_wait and db_headroom > 0:
+        return min(max_workers, limit + 1)
+
+    if avg_wait < target_wait / 4:
+        return max(min_workers, limit - 1)
+
+    return limit
+
+
+class DjangoThreadPoolExecutor(ThreadPoolExecutor):
+    def __init__(self, max_workers: int, min_workers: int | None = None):
+        super().__init__(max_workers=max_workers, thread_name_prefix="django")
+        self.min_workers = min(min_workers or max_workers, max_workers)
+        self.limit = max_workers
+        self._pending: dict[Priority, collections.deque[_Task]] = {
+            value: collections.deque() for value in Priority
+        }
+        # Накопленный вес очередей для взвешенного round-robin
+        self._credits = dict.fromkeys(Priority, 0)
+        self._active = 0
+        self._active_bulk = 0
+        self._wait_total = 0.0
+        self._wait_count = 0
+        self._lock = threading.Lock()
+        self._stop_adjusting = threading.Event()
+
+    def export_metrics(self):
+        """Отдавать в /metrics состояние этого пула."""
+        queue_depth.set_function(lambda: sum(map(len, self._pending.values())))
+        active_workers.set_function(lambda: self._active)
+        workers_limit.set_function(lambda: self.limit)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.submit_with_priority(Priority.DEFAULT, fn, *args, **kwargs)
+
+    def submit_with_priority(self, priority: Priority, fn, *args, **kwargs):
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+
+        task = _Task(Future(), contextvars.copy_context(), fn, args, kwargs, priority)
+        with self._lock:
+            self._pending[priority].append(task)
+
+        self._dispatch()
+        return task.future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self._stop_adjusting.set()
+        with self._lock:
+            pending = [task for queue in self._pending.values() for task in queue]
+            for queue in self._pending.values():
+                queue.clear()
+
+        for task in pending:
+            task.future.cancel()
+
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def _next_task(self) -> _Task | None:
+        """Smooth weighted round-robin по непустым очередям, вызывается под self._lock."""
+        if self._active >= self.limit:
+            return None
+
+        candidates = [value for value, queue in self._pending.items() if queue]
+        if Priority.BULK in candidates and self._active_bulk >= max(1, self.limit - 1):
+            candidates.remove(Priority.BULK)
+
+        if not candidates:
+            return None
+
+        for value in candidates:
+            self._credits[value] += PRIORITY_WEIGHTS[value]
+
+        chosen = max(candidates, key=self._credits.__getitem__)
+        self._credits[chosen] -= sum(PRIORITY_WEIGHTS[value] for value in candidates)
+
+        return self._pending[chosen].popleft()
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                task = self._next_task()
+                if task is None:
+                    return
+
+                self._active += 1
+                if task.priority is Priority.BULK:
+                    self._active_bulk += 1
+
+            super().submit(self._run, task)
+
+    def _run(self, task: _Task):
+        try:
+            if not task.future.set_running_or_notify_cancel():
+                return
+
+            wait = time.perf_counter() - task.submitted_at
+            task_wait.observe(wait, priority=task.priority.value)
+            with self._lock:
+                self._wait_total += wait
+                self._wait_count += 1
+
+            try:
+                result = task.context.run(self._call, task, wait)
+            except BaseException as exc:
+                task.future.set_exception(exc)
+            else:
+                task.future.set_result(result)
+        finally:
+            with self._lock:
+                self._active -= 1
+                if task.priority is Priority.BULK:
+                    self._active_bulk -= 1
+
+            self._dispatch()
+
+    @staticmethod
+    def _call(task: _Task, wait: float):
+        instrumentation.record_queue_wait(wait)
+        django.db.reset_queries()
+        django.db.close_old_connections()
+        try:
+            return task.fn(*task.args, **task.kwargs)
+        finally:
+            instrumentation.release_connection()
+
+    def start_adaptive_sizing(self, target_wait: float, db_connections_reserve: int):
+        """Запустить фоновую подстройку лимита между min_workers и max_workers."""
+        self.limit = self.min_workers
+        threading.Thread(
+            target=self._adjust_forever,
+            args=(target_wait, db_connections_reserve),
+            name="django-executor-sizing",
+            daemon=True,
+        ).start()
+
+    def _adjust_forever(self, target_wait: float, db_connections_reserve: int):
+        while not self._stop_adjusting.wait(ADJUST_INTERVAL):
+            try:
+                self._adjust(target_wait, db_connections_reserve)
+            except Exception:
+                logger.exception("Не удалось пересчитать размер пула потоков")
+
+    def _adjust(self, target_wait: float, db_connections_reserve: int):
+        with self._lock:
+            avg_wait = self._wait_total / self._wait_count if self._wait_count else 0.0
+            self._wait_total = 0.0
+            self._wait_count = 0
+
+        limit = next_limit(
+            self.limit,
+            min_workers=self.min_workers,
+            max_workers=self._max_workers,
+            avg_wait=avg_wait,
+            target_wait=target_wait,
+            db_headroom=db_connections_headroom(db_connections_reserve),
+        )
+        if limit != self.limit:
+            logger.info(
+                "Лимит пула потоков %s -> %s (ожидание %.1f мс)",
+                self.limit,
+                limit,
+                avg_wait * 1000,
+            )
+            self.limit = limit
+            self._dispatch()
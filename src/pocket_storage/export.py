@@ -0,0 +1,98 @@
+"""Потоковая выгрузка товаров и единиц хранения в CSV/JSONL."""
+import csv
+import datetime as dt
+import enum
+import json
+import typing as tp
+import uuid
+
+from django.db import transaction
+
+from pocket_storage import models
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+class ExportKind(str, enum.Enum):
+    PRODUCTS = "products"
+    STORAGE_UNITS = "storage_units"
+
+
+_EXPORT_FIELDS: dict[ExportKind, tuple[str, ...]] = {
+    ExportKind.PRODUCTS: (
+        "id",
+        "name",
+        "SKU",
+        "barcode",
+        "category_id",
+        "category__name",
+        "crated_at",
+        "updated_at",
+    ),
+    ExportKind.STORAGE_UNITS: (
+        "id",
+        "ext_id",
+        "state",
+        "product_id",
+        "product__SKU",
+        "warehouse_id",
+        "warehouse__name",
+        "created_at",
+        "updated_at",
+    ),
+}
+
+_EXPORT_MODELS: dict[ExportKind, tp.Type[models.BaseModel]] = {
+    ExportKind.PRODUCTS: models.Product,
+    ExportKind.STORAGE_UNITS: models.StorageUnit,
+}
+
+
+def _serialize_value(value: tp.Any) -> tp.Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+
+    if isinstance(value, dt.datetime):
+        return value.isoformat()
+
+    return value
+
+
+def export_rows(
+    kind: ExportKind,
+    stream: tp.TextIO,
+    export_format: ExportFormat = ExportFormat.CSV,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Выгрузить все записи в stream, не держа их в памяти.
+
+    Строки читаются серверным курсором порциями по chunk_size и сразу пишутся в stream.
+    Курсор открывается внутри транзакции, иначе Postgres материализует WITH HOLD курсор целиком.
+
+    :return: количество выгруженных строк
+    """
+    fields = _EXPORT_FIELDS[kind]
+    query = _EXPORT_MODELS[kind].objects.order_by("pk").values_list(*fields)
+
+    if export_format == ExportFormat.CSV:
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        write_row = writer.writerow
+    else:
+
+        def write_row(row):
+            stream.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False))
+            stream.write("\n")
+
+    count = 0
+    with transaction.atomic():
+        for row in query.iterator(chunk_size=chunk_size):
+            write_row([_serialize_value(value) for value in row])
+            count += 1
+
+    return count
@@ -0,0 +1,240 @@
+"""Сбор времени и SQL-запросов по вызовам JSON-RPC методов.
+
+CallStats текущего вызова хранится в contextvar: его создает middleware точки входа
+(api.middlewares.instrument), а дополняют обертка над выполнением SQL и пул потоков,
+в котором выполняется метод.
+"""
+import contextvars
+import dataclasses
+import logging
+import threading
+import time
+import typing as tp
+
+import django.db
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+slow_calls_logger = logging.getLogger("pocket_storage.slow_calls")
+
+_CALL_LABELS = ("entrypoint", "method")
+
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_QUERIES_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+calls_total = metrics.Counter(
+    "pocket_storage_rpc_calls_total",
+    "Количество вызовов JSON-RPC методов",
+    _CALL_LABELS + ("status",),
+)
+call_duration = metrics.Histogram(
+    "pocket_storage_rpc_call_duration_seconds",
+    "Полное время обработки вызова",
+    _CALL_LABELS,
+)
+queue_wait = metrics.Histogram(
+    "pocket_storage_rpc_queue_wait_seconds",
+    "Время ожидания свободного потока в пуле",
+    _CALL_LABELS,
+)
+db_duration = metrics.Histogram(
+    "pocket_storage_rpc_db_duration_seconds",
+    "Суммарное время SQL-запросов вызова",
+    _CALL_LABELS,
+)
+db_queries = metrics.Histogram(
+    "pocket_storage_rpc_db_queries",
+    "Количество SQL-запросов на вызов",
+    _CALL_LABELS,
+    buckets=_QUERIES_BUCKETS,
+)
+response_size = metrics.Histogram(
+    "pocket_storage_rpc_response_size_bytes",
+    "Размер сериализованного ответа",
+    _CALL_LABELS,
+    buckets=_SIZE_BUCKETS,
+)
+
+
+@dataclasses.dataclass
+class Statement:
+    sql: str
+    # None для executemany: такие запросы не переисполняются в EXPLAIN
+    params: tp.Any
+    duration: float
+
+
+@dataclasses.dataclass
+class CallStats:
+    entrypoint: str
+    method: str
+    started_at: float = dataclasses.field(default_factory=time.perf_counter)
+    wall_time: float = 0.0
+    queue_wait: float = 0.0
+    db_time: float = 0.0
+    queries: int = 0
+    response_size: int = 0
+    status: str = "ok"
+    statements: list[Statement] = dataclasses.field(default_factory=list)
+    # Снимать профиль метода (см. profiling), после сохранения - id профиля
+    profile: bool = False
+    profile_id: str | None = None
+    # Соединение, на котором выполнялись запросы вызова, и флаг отмены (см. statement_timeout)
+    statement_timeout_ms: int = 0
+    connection: tp.Any = None
+    canceled: bool = False
+    # Защищает connection: соединение освобождается в потоке пула, отменяется из event loop
+    connection_lock: threading.Lock = dataclasses.field(default_factory=threading.Lock)
+
+    @property
+    def is_slow(self) -> bool:
+        threshold = settings.SLOW_CALL_THRESHOLD_MS
+        return threshold > 0 and self.wall_time * 1000 >= threshold
+
+
+current_call: contextvars.ContextVar[CallStats | None] = contextvars.ContextVar(
+    "current_call", default=None
+)
+
+
+def record_queue_wait(seconds: float):
+    stats = current_call.get()
+    if stats is not None:
+        stats.queue_wait += seconds
+
+
+def release_connection():
+    """Забыть соединение вызова, когда метод вернул управление.
+
+    После этого поток и его соединение выполняют уже другой вызов, и запоздалая
+    отмена (statement_timeout.cancel) не должна его прервать.
+    """
+    stats = current_call.get()
+    if stats is not None:
+        with stats.connection_lock:
+            stats.connection = None
+
+
+def record_call(stats: CallStats):
+    labels = {"entrypoint": stats.entrypoint, "method": stats.method}
+    calls_total.inc(status=stats.status, **labels)
+    call_duration.observe(stats.wall_time, **labels)
+    queue_wait.observe(stats.queue_wait, **labels)
+    db_duration.observe(stats.db_time, **labels)
+    db_queries.observe(stats.queries, **labels)
+    if settings.RPC_RESPONSE_SIZE_METRIC:
+        response_size.observe(stats.response_size, **labels)
+
+    logger.info(
+        "rpc_call entrypoint=%s method=%s status=%s wall_ms=%.1f queue_ms=%.1f "
+        "db_ms=%.1f queries=%d response_bytes=%d",
+        stats.entrypoint,
+        stats.method,
+        stats.status,
+        stats.wall_time * 1000,
+        stats.queue_wait * 1000,
+        stats.db_time * 1000,
+        stats.queries,
+        stats.response_size,
+    )
+
+
+def params_shape(value: tp.Any) -> tp.Any:
+    """Структура параметров вызова без значений: в лог не должны попадать данные клиентов."""
+    if isinstance(value, dict):
+        return {key: params_shape(item) for key, item in value.items()}
+
+    if isinstance(value, list):
+        return [params_shape(value[0]), f"x{len(value)}"] if value else []
+
+    return type(value).__name__
+
+
+def log_slow_call(stats: CallStats, params: tp.Any):
+    statements = "".join(
+        f"\n  {statement.duration * 1000:.1f}ms {statement.sql}"
+        for statement in stats.statements
+    )
+    slow_calls_logger.warning(
+        "slow_call entrypoint=%s method=%s wall_ms=%.1f db_ms=%.1f queries=%d params=%s%s",
+        stats.entrypoint,
+        stats.method,
+        stats.wall_time * 1000,
+        stats.db_time * 1000,
+        stats.queries,
+        params_shape(params),
+        statements,
+    )
+
+
+def _slowest_select(stats: CallStats) -> Statement | None:
+    selects = [
+        statement
+        for statement in stats.statements
+        if statement.params is not None
+        and statement.sql.lstrip().upper().startswith("SELECT")
+        and "FOR UPDATE" not in statement.sql.upper()
+    ]
+    return max(selects, key=lambda statement: statement.duration, default=None)
+
+
+def explain_slowest_select(stats: CallStats):
+    """EXPLAIN (ANALYZE, BUFFERS) самого долгого SELECT вызова.
+
+    ANALYZE выполняет запрос повторно, поэтому вызывается в фоне после отправки ответа
+    и только для SELECT без блокировок.
+    """
+    statement = _slowest_select(stats)
+    if statement is None:
+        return
+
+    django.db.close_old_connections()
+    try:
+        with django.db.connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement.sql}", statement.params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+    except django.db.Error:
+        slow_calls_logger.exception("Не удалось выполнить EXPLAIN для %s", stats.method)
+        return
+
+    slow_calls_logger.warning(
+        "slow_call_explain entrypoint=%s method=%s duration_ms=%.1f\n%s\n%s",
+        stats.entrypoint,
+        stats.method,
+        statement.duration * 1000,
+        statement.sql,
+        plan,
+    )
+
+
+def _instrument_query(execute, sql, params, many, context):
+    stats = current_call.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    if stats.canceled:
+        raise django.db.OperationalError("canceling statement due to client disconnect")
+
+    stats.connection = context["connection"]
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started_at
+        stats.db_time += duration
+        stats.queries += 1
+        stats.statements.append(Statement(sql, None if many else params, duration))
+
+
+def _install_query_wrapper(sender, connection, **kwargs):
+    # Сигнал приходит при каждом переподключении, а обертки живут в объекте соединения
+    if _instrument_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_instrument_query)
+
+
+connection_created.connect(_install_query_wrapper)
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from pocket_storage import export
+
+
+class Command(BaseCommand):
+    help = "Выгрузить товары или единицы хранения в CSV/JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "kind",
+            choices=[kind.value for kind in export.ExportKind],
+        )
+        parser.add_argument(
+            "--format",
+            choices=[export_format.value for export_format in export.ExportFormat],
+            default=export.ExportFormat.CSV.value,
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Путь к файлу, по умолчанию - stdout",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=export.DEFAULT_CHUNK_SIZE,
+            help="Сколько строк вычитывать из курсора за раз",
+        )
+
+    def handle(self, *args, **options):
+        kind = export.ExportKind(options["kind"])
+        export_format = export.ExportFormat(options["format"])
+
+        if options["output"] == "-":
+            count = export.export_rows(
+                kind, sys.stdout, export_format, options["chunk_size"]
+            )
+        else:
+            with open(options["output"], "w", encoding="utf-8", newline="") as stream:
+                count = export.export_rows(
+                    kind, stream, export_format, options["chunk_size"]
+                )
+
+        self.stderr.write(f"Выгружено строк: {count}")
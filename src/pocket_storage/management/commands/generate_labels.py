@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from pocket_storage import models, qrcode_labels
+
+
+class Command(BaseCommand):
+    help = "Сформировать листы этикеток с QR-кодами единиц хранения для печати"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            required=True,
+            help="PDF-файл или каталог для PNG-страниц",
+        )
+        parser.add_argument(
+            "--format",
+            choices=[labels_format.value for labels_format in qrcode_labels.LabelsFormat],
+            default=qrcode_labels.LabelsFormat.PDF.value,
+        )
+        parser.add_argument(
+            "--warehouse",
+            help="Только единицы хранения склада с этим ID",
+        )
+        parser.add_argument(
+            "--ids",
+            nargs="+",
+            help="Только единицы хранения с этими ID",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Количество процессов для отрисовки QR-кодов, по умолчанию - по числу CPU",
+        )
+
+    def handle(self, *args, **options):
+        storage_units = models.StorageUnit.objects.all()
+        if options["warehouse"]:
+            storage_units = storage_units.filter(warehouse_id=options["warehouse"])
+        if options["ids"]:
+            storage_units = storage_units.filter(id__in=options["ids"])
+
+        pages = qrcode_labels.write_labels(
+            storage_units,
+            Path(options["output"]),
+            qrcode_labels.LabelsFormat(options["format"]),
+            processes=options["processes"],
+        )
+
+        self.stderr.write(f"Сформировано страниц: {pages}")
@@ -0,0 +1,272 @@
+import datetime as dt
+import random
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from pocket_storage import models
+from pocket_storage import operation_partitions
+from pocket_storage import pg_copy
+
+_PRODUCT_KINDS = [
+    "Краска",
+    "Эмаль",
+    "Грунтовка",
+    "Шпатлевка",
+    "Штукатурка",
+    "Клей",
+    "Герметик",
+    "Обои",
+    "Ламинат",
+    "Плитка",
+    "Саморезы",
+    "Дюбели",
+]
+_PRODUCT_ADJECTIVES = [
+    "акриловая",
+    "латексная",
+    "фасадная",
+    "интерьерная",
+    "влагостойкая",
+    "универсальная",
+    "быстросохнущая",
+    "морозостойкая",
+]
+_PRODUCT_COLORS = ["белая", "серая", "красная", "синяя", "зеленая", "бежевая"]
+_POSITIONS = ["Кладовщик", "Комплектовщик", "Старший смены", "Водитель погрузчика"]
+_FIRST_NAMES = ["Иван", "Петр", "Анна", "Мария", "Олег", "Елена", "Сергей", "Ольга"]
+_LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Кузнецов", "Смирнов", "Попов"]
+
+# Коды типов объектов для детерминированных ID, см. _Generator.make_id
+_WAREHOUSE, _CATEGORY, _PRODUCT, _POSITION, _EMPLOYEE, _STORAGE_UNIT, _OPERATION = range(7)
+
+
+class _Generator:
+    """Детерминированный генератор строк: одинаковые seed и until дают одинаковые данные.
+
+    ID вычисляются по номеру объекта, поэтому не нужно держать в памяти
+    миллионы ID товаров, чтобы ссылаться на них из единиц хранения.
+    У каждой таблицы свой генератор случайных чисел, чтобы поток строк можно было
+    воспроизвести повторно (см. _generate_operations).
+    """
+
+    def __init__(self, seed: int, name: str, until: dt.datetime, days: int):
+        self.rng = random.Random(f"{seed}:{name}")
+        self.id_prefix = random.Random(seed).getrandbits(56)
+        self.until = until
+        self.period_seconds = days * 24 * 60 * 60
+
+    def make_id(self, kind: int, index: int) -> uuid.UUID:
+        return uuid.UUID(int=(self.id_prefix << 72) | (kind << 64) | index)
+
+    def random_datetime(self) -> dt.datetime:
+        return self.until - dt.timedelta(seconds=self.rng.randrange(self.period_seconds))
+
+    def skewed_index(self, size: int) -> int:
+        """Небольшая часть объектов выбирается заметно чаще остальных, как в реальных данных."""
+        return int(size * self.rng.random() ** 3)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сгенерировать данные в объемах, близких к production, для нагрузочного тестирования. "
+        "Запускается на пустой базе"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--warehouses", type=int, default=5)
+        parser.add_argument("--category-depth", type=int, default=3)
+        parser.add_argument(
+            "--category-fanout",
+            type=int,
+            default=5,
+            help="Количество подкатегорий у каждой категории",
+        )
+        parser.add_argument("--products", type=int, default=10_000)
+        parser.add_argument("--storage-units", type=int, default=100_000)
+        parser.add_argument("--employees", type=int, default=200)
+        parser.add_argument(
+            "--operations-per-unit",
+            type=int,
+            default=2,
+            help="Среднее количество действий с одной единицей хранения",
+        )
+        parser.add_argument(
+            "--until",
+            type=dt.date.fromisoformat,
+            default=timezone.localdate(),
+            help="Дата, до которой распределяются даты создания записей (YYYY-MM-DD)",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=pg_copy.DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        until = dt.datetime.combine(
+            options["until"], dt.time(), tzinfo=timezone.get_current_timezone()
+        )
+        batch_size = options["batch_size"]
+
+        def make_generator(name):
+            return _Generator(options["seed"], name, until, options["days"])
+
+        def copy(model, fields, rows):
+            count = pg_copy.copy_rows(model, fields, rows, batch_size=batch_size)
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {count}")
+
+        gen = make_generator("warehouses")
+        copy(
+            models.Warehouse,
+            ("id", "name"),
+            (
+                (gen.make_id(_WAREHOUSE, i), f"Склад {i + 1}")
+                for i in range(options["warehouses"])
+            ),
+        )
+
+        leaf_categories = self._generate_categories(
+            make_generator("categories"),
+            copy,
+            options["category_depth"],
+            options["category_fanout"],
+        )
+
+        gen = make_generator("products")
+        copy(
+            models.Product,
+            ("id", "name", "SKU", "barcode", "category", "crated_at"),
+            (
+                (
+                    gen.make_id(_PRODUCT, i),
+                    " ".join(
+                        (
+                            gen.rng.choice(_PRODUCT_KINDS),
+                            gen.rng.choice(_PRODUCT_ADJECTIVES),
+                            gen.rng.choice(_PRODUCT_COLORS),
+                            str(i),
+                        )
+                    ),
+                    f"GEN-{i:010d}",
+                    str(2_000_000_000_000 + i),
+                    gen.rng.choice(leaf_categories),
+                    gen.random_datetime(),
+                )
+                for i in range(options["products"])
+            ),
+        )
+
+        gen = make_generator("employees")
+        copy(
+            models.EmployeePosition,
+            ("id", "name"),
+            ((gen.make_id(_POSITION, i), name) for i, name in enumerate(_POSITIONS)),
+        )
+        copy(
+            models.Employee,
+            ("id", "first_name", "last_name", "middle_name", "position"),
+            (
+                (
+                    gen.make_id(_EMPLOYEE, i),
+                    gen.rng.choice(_FIRST_NAMES),
+                    gen.rng.choice(_LAST_NAMES),
+                    None,
+                    gen.make_id(_POSITION, gen.rng.randrange(len(_POSITIONS))),
+                )
+                for i in range(options["employees"])
+            ),
+        )
+
+        copy(
+            models.StorageUnit,
+            (
+                "id",
+                "ext_id",
+                "product",
+                "warehouse",
+                "state",
+                "created_at",
+                "updated_at",
+            ),
+            self._generate_storage_units(make_generator("storage_units"), options),
+        )
+        # Действия идут в месячные партиции, а не в DEFAULT
+        operation_partitions.create_partitions(
+            (until - dt.timedelta(days=options["days"])).date(),
+            operation_partitions.add_months(until.date(), 1),
+        )
+        copy(
+            models.StorageUnitOperation,
+            (
+                "id",
+                "storage_unit",
+                "employee",
+                "initial_state",
+                "final_state",
+                "created_at",
+            ),
+            self._generate_operations(
+                make_generator("storage_units"), make_generator("operations"), options
+            ),
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    @staticmethod
+    def _generate_categories(gen: _Generator, copy, depth: int, fanout: int):
+        """Дерево категорий глубиной depth, у каждой категории fanout подкатегорий."""
+        rows = []
+        parents = [None]
+        for level in range(1, depth + 1):
+            children = []
+            for parent_index, parent_id in enumerate(parents):
+                for i in range(fanout):
+                    category_id = gen.make_id(_CATEGORY, len(rows))
+                    rows.append(
+                        (category_id, f"Категория {level}.{parent_index}.{i}", parent_id)
+                    )
+                    children.append(category_id)
+            parents = children
+
+        copy(models.ProductCategory, ("id", "name", "parent"), rows)
+        return parents
+
+    @staticmethod
+    def _generate_storage_units(gen: _Generator, options):
+        states = [state.value for state in models.StorageUnitState]
+        for i in range(options["storage_units"]):
+            warehouse_index = gen.rng.randrange(options["warehouses"])
+            created_at = gen.random_datetime()
+            yield (
+                gen.make_id(_STORAGE_UNIT, i),
+                f"{warehouse_index}-{i:010d}",
+                gen.make_id(_PRODUCT, gen.skewed_index(options["products"])),
+                gen.make_id(_WAREHOUSE, warehouse_index),
+                gen.rng.choice(states),
+                created_at,
+                created_at + dt.timedelta(hours=gen.rng.randrange(1, 24 * 30))
+                if gen.rng.random() < 0.5
+                else None,
+            )
+
+    @classmethod
+    def _generate_operations(cls, unit_gen: _Generator, gen: _Generator, options):
+        # Поток единиц хранения воспроизводится заново (с тем же seed),
+        # чтобы действия шли после создания единицы хранения без хранения дат в памяти
+        states = [state.value for state in models.StorageUnitState]
+        operation_index = 0
+        units = cls._generate_storage_units(unit_gen, options)
+        for unit_id, _, _, _, _, created_at, _ in units:
+            for _ in range(gen.rng.randrange(2 * options["operations_per_unit"] + 1)):
+                created_at += dt.timedelta(minutes=gen.rng.randrange(1, 24 * 60))
+                yield (
+                    gen.make_id(_OPERATION, operation_index),
+                    unit_id,
+                    gen.make_id(_EMPLOYEE, gen.rng.randrange(options["employees"])),
+                    gen.rng.choice(states),
+                    gen.rng.choice(states),
+                    created_at,
+                )
+                operation_index += 1
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pocket_storage import product_import
+
+
+class Command(BaseCommand):
+    help = "Импортировать товары из CSV (name,SKU,barcode,category_id)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к CSV-файлу в кодировке UTF-8")
+
+    def handle(self, *args, **options):
+        with open(options["path"], encoding="utf-8", newline="") as stream:
+            try:
+                result = product_import.import_products(stream)
+            except product_import.ProductImportError as exc:
+                raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(f"Запись {error.record}: {error.message}")
+
+        self.stdout.write(
+            f"Создано: {result.created}, обновлено: {result.updated}, "
+            f"ошибок: {len(result.errors)}"
+        )
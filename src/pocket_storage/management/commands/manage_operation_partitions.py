@@ -0,0 +1,56 @@
+import datetime as dt
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pocket_storage import operation_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Создать партиции истории действий на будущие месяцы и выгрузить в архив "
+        "партиции старше срока хранения. Запускается по расписанию, например раз в сутки"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.OPERATIONS_PARTITIONS_AHEAD,
+            help="На сколько месяцев вперед создавать партиции",
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.OPERATIONS_RETENTION_MONTHS,
+            help="Сколько месяцев, включая текущий, хранить в базе; 0 - не архивировать",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=settings.OPERATIONS_ARCHIVE_DIR,
+            help="Каталог для выгрузки старых партиций",
+        )
+
+    def handle(self, *args, **options):
+        current_month = operation_partitions.month_start(
+            timezone.now().astimezone(dt.timezone.utc).date()
+        )
+
+        created = operation_partitions.create_partitions(
+            current_month,
+            operation_partitions.add_months(current_month, options["ahead"]),
+        )
+        for name in created:
+            self.stderr.write(f"Создана партиция {name}")
+
+        if options["retention_months"] > 0:
+            archived = operation_partitions.archive_partitions(
+                operation_partitions.add_months(
+                    current_month, 1 - options["retention_months"]
+                ),
+                Path(options["archive_dir"]),
+            )
+            for path in archived:
+                self.stderr.write(f"Партиция выгружена в {path}")
@@ -0,0 +1,182 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Минимальная реализация счетчиков, гистограмм и gauge без внешних зависимостей.
+Все метрики регистрируются в REGISTRY и отдаются приложением по /metrics.
+"""
+import math
+import threading
+import typing as tp
+
+_LabelValues = tuple[str, ...]
+
+DEFAULT_TIME_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tp.Sequence[str], values: tp.Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list["_Metric"] = []
+
+    def register(self, metric: "_Metric"):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render_samples())
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type: str
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tp.Sequence[str] = (),
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _label_values(self, labels: dict[str, str]) -> _LabelValues:
+        assert set(labels) == set(self.labelnames), f"{self.name}: ожидаются метки {self.labelnames}"
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render_samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render_samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """Текущее значение. Можно задать set_function - тогда значение читается при отдаче метрик."""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[_LabelValues, float] = {}
+        self._function: tp.Callable[[], float] | None = None
+
+    def set(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: tp.Callable[[], float]):
+        assert not self.labelnames, "set_function поддерживается только для gauge без меток"
+        self._function = function
+
+    def render_samples(self) -> list[str]:
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+
+        with self._lock:
+            values = list(self._values.items())
+
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: tp.Sequence[float] = DEFAULT_TIME_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # метки -> (количество по бакетам, сумма, количество)
+        self._values: dict[_LabelValues, tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render_samples(self) -> list[str]:
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+
+        samples = []
+        labelnames = self.labelnames + ("le",)
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(labelnames, key + (_format_value(bound),))
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = _format_labels(self.labelnames, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {count}")
+
+        return samples
@@ -0,0 +1,60 @@
+# Generated by Django 4.1.3 on 2026-10-19 19:21
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Django 4.1 оборачивает OpClass функционального индекса в скобки:
+# (UPPER("name") gin_trgm_ops) - Postgres такое не принимает. Поэтому индексы
+# создаются явным SQL, а состояние моделей меняется через AddIndex.
+# CONCURRENTLY нельзя выполнять в транзакции, в том числе в неявной транзакции
+# запроса из нескольких команд, поэтому по одной команде на RunSQL.
+INDEXES = (
+    ("product", "pocket_storage_product", "name", "product_name_trgm"),
+    ("product", "pocket_storage_product", "SKU", "product_sku_trgm"),
+    ("product", "pocket_storage_product", "barcode", "product_barcode_trgm"),
+    ("storageunit", "pocket_storage_storageunit", "ext_id", "storageunit_ext_id_trgm"),
+)
+
+
+def _create_index(table: str, column: str, name: str) -> migrations.RunSQL:
+    return migrations.RunSQL(
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+        f'ON "{table}" USING gin (UPPER("{column}") gin_trgm_ops)',
+        f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+    )
+
+
+def _add_index(model_name: str, column: str, name: str) -> migrations.AddIndex:
+    return migrations.AddIndex(
+        model_name=model_name,
+        index=django.contrib.postgres.indexes.GinIndex(
+            django.contrib.postgres.indexes.OpClass(
+                django.db.models.functions.text.Upper(column), name="gin_trgm_ops"
+            ),
+            name=name,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся CONCURRENTLY, без блокировки записи в таблицы
+    atomic = False
+
+    dependencies = [
+        ("pocket_storage", "0006_alter_storageunit_ext_id"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                _add_index(model_name, column, name)
+                for model_name, _, column, name in INDEXES
+            ],
+            database_operations=[
+                _create_index(table, column, name) for _, table, column, name in INDEXES
+            ],
+        ),
+    ]
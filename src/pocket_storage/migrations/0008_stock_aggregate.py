@@ -0,0 +1,136 @@
+# Generated by Django 4.1.3 on 2026-10-19 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Триггеры уровня оператора с таблицами переходов: массовые INSERT (в том числе COPY),
+# UPDATE и DELETE меняют агрегаты одним запросом на оператор, а не на строку.
+# Строки агрегатов обновляются в порядке ключа, чтобы параллельные транзакции
+# не взаимоблокировались.
+_UPSERT = """
+    INSERT INTO pocket_storage_stockaggregate AS stock (product_id, warehouse_id, state, count)
+    SELECT product_id, warehouse_id, state, sum(delta)
+    FROM ({changes}) AS changes
+    GROUP BY product_id, warehouse_id, state
+    HAVING sum(delta) <> 0
+    ORDER BY product_id, warehouse_id, state
+    ON CONFLICT (product_id, warehouse_id, state)
+    DO UPDATE SET count = stock.count + EXCLUDED.count;
+"""
+
+_NEW_ROWS = "SELECT product_id, warehouse_id, state, 1 AS delta FROM new_rows"
+_OLD_ROWS = "SELECT product_id, warehouse_id, state, -1 AS delta FROM old_rows"
+_CHANGED_ROWS = f"{_NEW_ROWS} UNION ALL {_OLD_ROWS}"
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION pocket_storage_stockaggregate_insert() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    {_UPSERT.format(changes=_NEW_ROWS)}
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION pocket_storage_stockaggregate_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    {_UPSERT.format(changes=_CHANGED_ROWS)}
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION pocket_storage_stockaggregate_delete() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    {_UPSERT.format(changes=_OLD_ROWS)}
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER stockaggregate_insert
+AFTER INSERT ON pocket_storage_storageunit
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION pocket_storage_stockaggregate_insert();
+
+CREATE TRIGGER stockaggregate_update
+AFTER UPDATE ON pocket_storage_storageunit
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION pocket_storage_stockaggregate_update();
+
+CREATE TRIGGER stockaggregate_delete
+AFTER DELETE ON pocket_storage_storageunit
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION pocket_storage_stockaggregate_delete();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER stockaggregate_insert ON pocket_storage_storageunit;
+DROP TRIGGER stockaggregate_update ON pocket_storage_storageunit;
+DROP TRIGGER stockaggregate_delete ON pocket_storage_storageunit;
+DROP FUNCTION pocket_storage_stockaggregate_insert();
+DROP FUNCTION pocket_storage_stockaggregate_update();
+DROP FUNCTION pocket_storage_stockaggregate_delete();
+"""
+
+# Блокировка не дает параллельным транзакциям изменить единицы хранения между
+# подсчетом и включением триггеров
+FILL = """
+LOCK TABLE pocket_storage_storageunit IN SHARE ROW EXCLUSIVE MODE;
+INSERT INTO pocket_storage_stockaggregate (product_id, warehouse_id, state, count)
+SELECT product_id, warehouse_id, state, count(*)
+FROM pocket_storage_storageunit
+GROUP BY product_id, warehouse_id, state;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pocket_storage", "0007_search_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockAggregate",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[("new", "новая")],
+                        max_length=32,
+                        verbose_name="Состояние",
+                    ),
+                ),
+                ("count", models.IntegerField(default=0, verbose_name="Количество")),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock",
+                        to="pocket_storage.product",
+                        verbose_name="Товар",
+                    ),
+                ),
+                (
+                    "warehouse",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock",
+                        to="pocket_storage.warehouse",
+                        verbose_name="Склад",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Остаток",
+                "verbose_name_plural": "Остатки",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="stockaggregate",
+            constraint=models.UniqueConstraint(
+                fields=("product", "warehouse", "state"),
+                name="stockaggregate_product_warehouse_state",
+            ),
+        ),
+        migrations.RunSQL(FILL, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
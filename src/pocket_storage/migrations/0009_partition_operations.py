@@ -0,0 +1,129 @@
+# Generated by Django 4.1.3 on 2026-10-19 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Таблица пересоздается секционированной по месяцам created_at (UTC) и данные
+# переносятся в нее одним INSERT под эксклюзивной блокировкой. Создаются партиции
+# с месяца самого старого действия до трех месяцев вперед и DEFAULT-партиция.
+# Дальше партиции ведет команда manage_operation_partitions.
+PARTITION = """
+LOCK TABLE pocket_storage_storageunitoperation IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE pocket_storage_storageunitoperation
+    RENAME TO pocket_storage_storageunitoperation_plain;
+
+CREATE TABLE pocket_storage_storageunitoperation (
+    id uuid NOT NULL,
+    initial_state varchar(32) NOT NULL,
+    final_state varchar(32) NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    employee_id uuid NOT NULL
+        REFERENCES pocket_storage_employee (id) DEFERRABLE INITIALLY DEFERRED,
+    storage_unit_id uuid NOT NULL
+        REFERENCES pocket_storage_storageunit (id) DEFERRABLE INITIALLY DEFERRED,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX operation_unit_created
+    ON pocket_storage_storageunitoperation (storage_unit_id, created_at DESC);
+CREATE INDEX operation_employee
+    ON pocket_storage_storageunitoperation (employee_id);
+
+CREATE TABLE pocket_storage_storageunitoperation_default
+    PARTITION OF pocket_storage_storageunitoperation DEFAULT;
+
+DO $$
+DECLARE
+    month timestamp;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', coalesce(
+                (SELECT min(created_at) FROM pocket_storage_storageunitoperation_plain),
+                now()
+            ) AT TIME ZONE 'UTC'),
+            date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months',
+            interval '1 month'
+        )
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF pocket_storage_storageunitoperation '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'pocket_storage_storageunitoperation_p' || to_char(month, 'YYYYMM'),
+            month AT TIME ZONE 'UTC',
+            (month + interval '1 month') AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO pocket_storage_storageunitoperation
+    (id, initial_state, final_state, created_at, employee_id, storage_unit_id)
+SELECT id, initial_state, final_state, created_at, employee_id, storage_unit_id
+FROM pocket_storage_storageunitoperation_plain;
+
+DROP TABLE pocket_storage_storageunitoperation_plain;
+"""
+
+UNPARTITION = """
+LOCK TABLE pocket_storage_storageunitoperation IN ACCESS EXCLUSIVE MODE;
+
+CREATE TABLE pocket_storage_storageunitoperation_plain (
+    id uuid NOT NULL PRIMARY KEY,
+    initial_state varchar(32) NOT NULL,
+    final_state varchar(32) NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    employee_id uuid NOT NULL
+        REFERENCES pocket_storage_employee (id) DEFERRABLE INITIALLY DEFERRED,
+    storage_unit_id uuid NOT NULL
+        REFERENCES pocket_storage_storageunit (id) DEFERRABLE INITIALLY DEFERRED
+);
+
+INSERT INTO pocket_storage_storageunitoperation_plain
+    (id, initial_state, final_state, created_at, employee_id, storage_unit_id)
+SELECT id, initial_state, final_state, created_at, employee_id, storage_unit_id
+FROM pocket_storage_storageunitoperation;
+
+DROP TABLE pocket_storage_storageunitoperation;
+ALTER TABLE pocket_storage_storageunitoperation_plain
+    RENAME TO pocket_storage_storageunitoperation;
+
+CREATE INDEX operation_unit_created
+    ON pocket_storage_storageunitoperation (storage_unit_id, created_at DESC);
+CREATE INDEX operation_employee
+    ON pocket_storage_storageunitoperation (employee_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pocket_storage", "0008_stock_aggregate"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="storageunitoperation",
+                    name="storage_unit",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="operations",
+                        to="pocket_storage.storageunit",
+                        verbose_name="Единица хранения",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="storageunitoperation",
+                    index=models.Index(
+                        fields=["storage_unit", "-created_at"],
+                        name="operation_unit_created",
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(PARTITION, UNPARTITION),
+            ],
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.1.3 on 2026-10-19 19:28
+
+from django.db import migrations, models
+
+STATE_CHOICES = [
+    ("new", "новая"),
+    ("stored", "на хранении"),
+    ("reserved", "зарезервирована"),
+    ("picked", "отобрана"),
+    ("written_off", "списана"),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pocket_storage", "0009_partition_operations"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="stockaggregate",
+            name="state",
+            field=models.CharField(
+                choices=STATE_CHOICES,
+                max_length=32,
+                verbose_name="Состояние",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="storageunit",
+            name="state",
+            field=models.CharField(
+                choices=STATE_CHOICES,
+                default="new",
+                max_length=32,
+                verbose_name="Состояние",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="storageunitoperation",
+            name="final_state",
+            field=models.CharField(
+                choices=STATE_CHOICES,
+                help_text="Состояние единицы хранения после совершения действия",
+                max_length=32,
+                verbose_name="Конечное состояние",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="storageunitoperation",
+            name="initial_state",
+            field=models.CharField(
+                choices=STATE_CHOICES,
+                help_text="Состояние единицы хранения до совершения действия",
+                max_length=32,
+                verbose_name="Начальное состояние",
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.1.3 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+# Django не оставляет в базе значения по умолчанию, а строки вставляются и в обход
+# ORM: COPY в generate_load_data, INSERT в product_import. Без DEFAULT такие вставки
+# нарушат NOT NULL. При AlterField этих полей DEFAULT нужно восстановить.
+SET_DEFAULTS = """
+ALTER TABLE pocket_storage_product ALTER COLUMN version SET DEFAULT 1;
+ALTER TABLE pocket_storage_storageunit ALTER COLUMN version SET DEFAULT 1;
+"""
+
+DROP_DEFAULTS = """
+ALTER TABLE pocket_storage_product ALTER COLUMN version DROP DEFAULT;
+ALTER TABLE pocket_storage_storageunit ALTER COLUMN version DROP DEFAULT;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pocket_storage", "0010_storage_unit_states"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text="Увеличивается при каждом изменении записи",
+                verbose_name="Версия",
+            ),
+        ),
+        migrations.AddField(
+            model_name="storageunit",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text="Увеличивается при каждом изменении записи",
+                verbose_name="Версия",
+            ),
+        ),
+        migrations.RunSQL(SET_DEFAULTS, DROP_DEFAULTS),
+    ]
@@ -1,6 +1,8 @@
 import uuid
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 
@@ -19,6 +21,37 @@ class BaseModel(models.Model):
         abstract = True
 
 
+class VersionedModel(BaseModel):
+    """Модель с версией строки для оптимистичных изменений, см. versioning.
+
+    save() увеличивает версию в самом UPDATE (version = version + 1) и перечитывает
+    ее: сохранение устаревшего объекта, например из админки, не повторит уже
+    записанную версию. Изменения с проверкой версии клиента применяются через
+    versioning.update_versioned.
+    """
+
+    class Meta:
+        abstract = True
+
+    version = models.PositiveIntegerField(
+        "Версия",
+        default=1,
+        help_text="Увеличивается при каждом изменении записи",
+    )
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        self.version = models.F("version") + 1
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = [*kwargs["update_fields"], "version"]
+
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=["version"])
+
+
 class Warehouse(BaseModel):
     """Склад."""
 
@@ -79,12 +112,20 @@ class ProductCategory(BaseModel):
         return self.name
 
 
-class Product(BaseModel):
+class Product(VersionedModel):
     """Товар."""
 
     class Meta:
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
+        # Для подстрочного поиска (search.py): icontains сравнивает UPPER(поле)
+        indexes = [
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="product_name_trgm"),
+            GinIndex(OpClass(Upper("SKU"), name="gin_trgm_ops"), name="product_sku_trgm"),
+            GinIndex(
+                OpClass(Upper("barcode"), name="gin_trgm_ops"), name="product_barcode_trgm"
+            ),
+        ]
 
     id = models.UUIDField(
         primary_key=True,
@@ -179,15 +220,26 @@ class Employee(BaseModel):
 
 
 class StorageUnitState(models.TextChoices):
+    """Состояния единицы хранения, переходы между ними - в transitions."""
+
     NEW = "new", "новая"
+    STORED = "stored", "на хранении"
+    RESERVED = "reserved", "зарезервирована"
+    PICKED = "picked", "отобрана"
+    WRITTEN_OFF = "written_off", "списана"
 
 
-class StorageUnit(BaseModel):
+class StorageUnit(VersionedModel):
     """Единица хранения."""
 
     class Meta:
         verbose_name = "Единица хранения"
         verbose_name_plural = "Единицы хранения"
+        indexes = [
+            GinIndex(
+                OpClass(Upper("ext_id"), name="gin_trgm_ops"), name="storageunit_ext_id_trgm"
+            ),
+        ]
 
     State = StorageUnitState
 
@@ -233,12 +285,57 @@ class StorageUnit(BaseModel):
     )
 
 
+class StockAggregate(BaseModel):
+    """Количество единиц хранения товара на складе в каждом состоянии.
+
+    Ведется триггерами на таблице единиц хранения (миграция 0008), в том числе при
+    COPY и массовых UPDATE/DELETE, поэтому из кода не изменяется.
+    """
+
+    class Meta:
+        verbose_name = "Остаток"
+        verbose_name_plural = "Остатки"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "warehouse", "state"],
+                name="stockaggregate_product_warehouse_state",
+            ),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+    product = models.ForeignKey(
+        Product,
+        verbose_name="Товар",
+        on_delete=models.CASCADE,
+        related_name="stock",
+    )
+    warehouse = models.ForeignKey(
+        Warehouse,
+        verbose_name="Склад",
+        on_delete=models.CASCADE,
+        related_name="stock",
+    )
+    state = models.CharField(
+        "Состояние",
+        max_length=32,
+        choices=StorageUnitState.choices,
+    )
+    count = models.IntegerField("Количество", default=0)
+
+
 class StorageUnitOperation(BaseModel):
-    """Действие с единицей хранения."""
+    """Действие с единицей хранения.
+
+    Таблица секционирована по месяцам created_at (миграция 0009, operation_partitions),
+    первичный ключ в базе - (id, created_at).
+    """
 
     class Meta:
         verbose_name = "Действие с единицей хранения"
         verbose_name_plural = "Действия с единицей хранения"
+        indexes = [
+            models.Index(fields=["storage_unit", "-created_at"], name="operation_unit_created"),
+        ]
 
     id = models.UUIDField(
         primary_key=True,
@@ -249,6 +346,8 @@ class StorageUnitOperation(BaseModel):
         on_delete=models.CASCADE,
         verbose_name="Единица хранения",
         related_name="operations",
+        # Покрывается индексом operation_unit_created
+        db_index=False,
     )
     employee = models.ForeignKey(
         Employee,
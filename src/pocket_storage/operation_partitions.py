@@ -0,0 +1,168 @@
+"""Помесячные партиции истории действий с единицами хранения.
+
+Таблица действий секционирована по created_at (миграция 0009): по партиции на
+календарный месяц (UTC) и DEFAULT-партиция для строк вне созданных месяцев.
+Партиции создаются заранее, пока DEFAULT пуста: партицию на месяц, строки которого
+уже попали в DEFAULT, Postgres создать не даст. Если создание пропустили, DEFAULT
+отсоединяется, строки месяца переносятся в новую партицию и DEFAULT присоединяется
+обратно - в одной транзакции, с блокировкой всей таблицы на время переноса.
+
+Партиции старше срока хранения выгружаются в gzip-CSV в каталог архива,
+отсоединяются и удаляются. Вернуть архив в базу:
+
+    CREATE TABLE <партиция> PARTITION OF pocket_storage_storageunitoperation
+        FOR VALUES FROM ('<начало месяца>') TO ('<начало следующего>');
+    zcat <партиция>.csv.gz | psql -c "COPY <партиция> FROM STDIN WITH (FORMAT csv, HEADER)"
+"""
+import datetime as dt
+import gzip
+import logging
+import os
+import re
+from pathlib import Path
+
+from django.db import connection, transaction
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+TABLE = models.StorageUnitOperation._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+_PARTITION_RE = re.compile(rf"{TABLE}_p(\d{{4}})(\d{{2}})")
+
+
+def add_months(month: dt.date, months: int) -> dt.date:
+    index = month.year * 12 + month.month - 1 + months
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(value: dt.date) -> dt.date:
+    return value.replace(day=1)
+
+
+def partition_name(month: dt.date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _bound(month: dt.date) -> dt.datetime:
+    return dt.datetime.combine(month, dt.time(), tzinfo=dt.timezone.utc)
+
+
+def list_partitions() -> dict[dt.date, str]:
+    """Месячные партиции: {первый день месяца: имя таблицы}."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        if match := _PARTITION_RE.fullmatch(name):
+            partitions[dt.date(int(match[1]), int(match[2]), 1)] = name
+
+    return partitions
+
+
+def _create_partition(cursor, month: dt.date):
+    quote_name = connection.ops.quote_name
+    name = partition_name(month)
+    bounds = [_bound(month), _bound(add_months(month, 1))]
+
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {quote_name(DEFAULT_PARTITION)} "
+        "WHERE created_at >= %s AND created_at < %s)",
+        bounds,
+    )
+    [in_default] = cursor.fetchone()
+    if not in_default:
+        cursor.execute(
+            f"CREATE TABLE {quote_name(name)} PARTITION OF {quote_name(TABLE)} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+        return
+
+    with transaction.atomic():
+        cursor.execute(
+            f"ALTER TABLE {quote_name(TABLE)} DETACH PARTITION {quote_name(DEFAULT_PARTITION)}"
+        )
+        cursor.execute(
+            f"CREATE TABLE {quote_name(name)} PARTITION OF {quote_name(TABLE)} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {quote_name(DEFAULT_PARTITION)} "
+            "WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {quote_name(name)} SELECT * FROM moved",
+            bounds,
+        )
+        moved = cursor.rowcount
+        cursor.execute(
+            f"ALTER TABLE {quote_name(TABLE)} "
+            f"ATTACH PARTITION {quote_name(DEFAULT_PARTITION)} DEFAULT"
+        )
+
+    logger.warning("Партиция %s создана с опозданием, из DEFAULT перенесено строк: %s", name, moved)
+
+
+def create_partitions(first_month: dt.date, last_month: dt.date) -> list[str]:
+    """Создать недостающие партиции с first_month по last_month включительно."""
+    existing = list_partitions()
+    created = []
+
+    month = month_start(first_month)
+    with connection.cursor() as cursor:
+        while month <= last_month:
+            if month not in existing:
+                _create_partition(cursor, month)
+                created.append(partition_name(month))
+            month = add_months(month, 1)
+
+    return created
+
+
+def archive_partitions(before_month: dt.date, archive_dir: Path) -> list[Path]:
+    """Выгрузить в архив и удалить партиции месяцев до before_month.
+
+    Вызывается вне транзакции. Партиция выгружается под блокировкой SHARE только
+    самой партиции: запись в остальные месяцы и чтение продолжаются. Отсоединение
+    и удаление выполняются после выгрузки в отдельной короткой транзакции, и
+    ACCESS EXCLUSIVE на всю таблицу действий не держится во время COPY и сжатия.
+    Если выгрузка не удалась, партиция остается в таблице.
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    quote_name = connection.ops.quote_name
+    archived = []
+
+    for month, name in sorted(list_partitions().items()):
+        if month >= before_month:
+            continue
+
+        path = archive_dir / f"{name}.csv.gz"
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {quote_name(name)} IN SHARE MODE")
+            with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as stream:
+                with connection.wrap_database_errors:
+                    cursor.copy_expert(
+                        f"COPY {quote_name(name)} TO STDOUT WITH (FORMAT csv, HEADER)", stream
+                    )
+        os.replace(tmp_path, path)
+
+        # В прошедшие месяцы действия не пишутся, поэтому между выгрузкой и
+        # удалением партиция не меняется
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {quote_name(TABLE)} DETACH PARTITION {quote_name(name)}")
+            cursor.execute(f"DROP TABLE {quote_name(name)}")
+
+        logger.info("Партиция %s выгружена в %s", name, path)
+        archived.append(path)
+
+    return archived
@@ -0,0 +1,56 @@
+"""Быстрая вставка большого количества строк через COPY FROM STDIN."""
+import csv
+import io
+import typing as tp
+
+from django.db import connection
+
+from pocket_storage import models
+
+DEFAULT_BATCH_SIZE = 50_000
+
+
+def copy_rows(
+    model: tp.Type[models.BaseModel],
+    fields: tp.Sequence[str],
+    rows: tp.Iterable[tp.Sequence[tp.Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Вставить строки в таблицу модели, не накапливая больше batch_size строк в памяти.
+
+    Значения пишутся в CSV как есть: None становится NULL, остальное - str(value).
+    Значения по умолчанию и сигналы модели не применяются.
+
+    :param fields: имена полей модели в порядке значений в строке
+    :return: количество вставленных строк
+    """
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(quote_name(model._meta.get_field(f).column) for f in fields)
+    sql = (
+        f"COPY {quote_name(model._meta.db_table)} ({columns}) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+
+    count = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    with connection.cursor() as cursor:
+
+        def flush():
+            buffer.seek(0)
+            with connection.wrap_database_errors:
+                cursor.copy_expert(sql, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if count % batch_size == 0:
+                flush()
+
+        if buffer.tell():
+            flush()
+
+    return count
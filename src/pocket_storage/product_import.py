@@ -0,0 +1,208 @@
+"""Массовый импорт товаров из CSV через COPY во временную таблицу."""
+import csv
+import dataclasses
+import logging
+import typing as tp
+
+import django.db
+from django.db import connection, transaction
+
+from pocket_storage import models
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ("name", "SKU", "barcode", "category_id")
+
+_UUID_REGEX = "^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
+
+_PRODUCT_MAX_LENGTHS = {
+    column: models.Product._meta.get_field(field).max_length
+    for column, field in (("name", "name"), ("sku", "SKU"), ("barcode", "barcode"))
+}
+
+
+class ProductImportError(Exception):
+    """Файл не может быть импортирован целиком (формат, заголовок, конфликт)."""
+
+
+@dataclasses.dataclass
+class ImportRowError:
+    # Номер записи CSV без заголовка, начиная с 1. С номером строки файла не совпадает,
+    # если в значениях в кавычках есть переводы строк
+    record: int
+    message: str
+
+
+@dataclasses.dataclass
+class ImportResult:
+    created: int
+    updated: int
+    errors: list[ImportRowError]
+
+
+def import_products(stream: tp.TextIO) -> ImportResult:
+    """Импортировать товары из CSV с колонками CSV_COLUMNS.
+
+    Файл целиком загружается во временную таблицу одним COPY, проверки выполняются
+    над всем набором строк, а корректные строки вставляются или обновляются (по SKU)
+    одним INSERT ... ON CONFLICT. Записи с ошибками пропускаются и возвращаются в отчете.
+
+    :raises ProductImportError: файл нельзя импортировать; подробности ошибки Postgres
+        пишутся в лог, а в сообщение не попадают
+
+    """
+    header = next(csv.reader([stream.readline()]), [])
+    if tuple(column.strip() for column in header) != CSV_COLUMNS:
+        raise ProductImportError(
+            f"Ожидается заголовок {','.join(CSV_COLUMNS)}, получен {','.join(header)}"
+        )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            """
+            CREATE TEMP TABLE product_import (
+                record_no bigserial,
+                name text,
+                sku text,
+                barcode text,
+                category_id text,
+                category_uuid uuid,
+                error text
+            ) ON COMMIT DROP
+            """
+        )
+
+        try:
+            with connection.wrap_database_errors:
+                cursor.copy_expert(
+                    "COPY product_import (name, sku, barcode, category_id) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    stream,
+                )
+        except django.db.DataError as exc:
+            # Текст ошибки Postgres с SQL и фрагментом файла - только в лог
+            logger.warning("Некорректный CSV при импорте товаров: %s", exc)
+            raise ProductImportError("Некорректный формат CSV") from exc
+
+        _validate(cursor)
+
+        try:
+            created, updated = _upsert(cursor)
+        except django.db.IntegrityError as exc:
+            logger.warning("Конфликт при сохранении импортируемых товаров: %s", exc)
+            raise ProductImportError(
+                "Товары изменены одновременно с импортом, повторите импорт"
+            ) from exc
+
+        cursor.execute(
+            "SELECT record_no, error FROM product_import "
+            "WHERE error IS NOT NULL ORDER BY record_no"
+        )
+        errors = [
+            ImportRowError(record=record_no, message=error)
+            for record_no, error in cursor.fetchall()
+        ]
+
+    return ImportResult(created=created, updated=updated, errors=errors)
+
+
+def _validate(cursor):
+    """Проставить error для некорректных строк. Сохраняется первая найденная ошибка."""
+    product_table = connection.ops.quote_name(models.Product._meta.db_table)
+    category_table = connection.ops.quote_name(models.ProductCategory._meta.db_table)
+
+    cursor.execute(
+        """
+        UPDATE product_import SET
+            name = NULLIF(btrim(name), ''),
+            sku = NULLIF(btrim(sku), ''),
+            barcode = NULLIF(btrim(barcode), ''),
+            category_id = NULLIF(btrim(category_id), '')
+        """
+    )
+    cursor.execute(
+        """
+        UPDATE product_import SET category_uuid = CASE
+            WHEN category_id ~* %s THEN category_id::uuid
+        END
+        """,
+        [_UUID_REGEX],
+    )
+
+    checks = [
+        ("Не указано название", "name IS NULL", []),
+        ("Не указан SKU", "sku IS NULL", []),
+        ("Не указана категория", "category_id IS NULL", []),
+        *(
+            (
+                f"Слишком длинное значение {column} (макс. {max_length})",
+                f"length({column}) > %s",
+                [max_length],
+            )
+            for column, max_length in _PRODUCT_MAX_LENGTHS.items()
+        ),
+        ("Некорректный ID категории", "category_uuid IS NULL", []),
+        (
+            "Категория не найдена",
+            f"NOT EXISTS (SELECT 1 FROM {category_table} c WHERE c.id = category_uuid)",
+            [],
+        ),
+        (
+            "Штрих-код уже используется другим товаром",
+            f"""EXISTS (
+                SELECT 1 FROM {product_table} p
+                WHERE p.barcode = product_import.barcode AND p."SKU" <> product_import.sku
+            )""",
+            [],
+        ),
+    ]
+    for message, condition, params in checks:
+        cursor.execute(
+            f"UPDATE product_import SET error = %s WHERE error IS NULL AND {condition}",
+            [message, *params],
+        )
+
+    for column, message in (
+        ("sku", "SKU повторяется в файле"),
+        ("barcode", "Штрих-код повторяется в файле"),
+    ):
+        cursor.execute(
+            f"""
+            UPDATE product_import SET error = %s || ' (запись ' || d.first_record_no || ')'
+            FROM (
+                SELECT record_no, min(record_no) OVER (PARTITION BY {column}) AS first_record_no
+                FROM product_import
+                WHERE error IS NULL AND {column} IS NOT NULL
+            ) d
+            WHERE product_import.record_no = d.record_no AND d.record_no <> d.first_record_no
+            """,
+            [message],
+        )
+
+
+def _upsert(cursor) -> tuple[int, int]:
+    product_table = connection.ops.quote_name(models.Product._meta.db_table)
+    cursor.execute(
+        f"""
+        WITH upserted AS (
+            INSERT INTO {product_table} AS p
+                (id, name, "SKU", barcode, category_id, crated_at, version)
+            SELECT gen_random_uuid(), name, sku, barcode, category_uuid, now(), 1
+            FROM product_import
+            WHERE error IS NULL
+            ORDER BY record_no
+            ON CONFLICT ("SKU") DO UPDATE SET
+                name = EXCLUDED.name,
+                barcode = EXCLUDED.barcode,
+                category_id = EXCLUDED.category_id,
+                updated_at = now(),
+                version = p.version + 1
+            RETURNING xmax = 0 AS is_created
+        )
+        SELECT
+            count(*) FILTER (WHERE is_created),
+            count(*) FILTER (WHERE NOT is_created)
+        FROM upserted
+        """
+    )
+    return cursor.fetchone()
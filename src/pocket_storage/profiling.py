@@ -0,0 +1,65 @@
+"""Профилирование JSON-RPC вызовов по запросу.
+
+Профиль (cProfile) снимается в потоке пула, где выполняется метод: ORM, построение
+запросов и from_model схем ответа. Файлы .prof сохраняются в PROFILES_DIR и
+скачиваются через views.download_profile. В каталоге хранятся только последние
+PROFILES_MAX_FILES профилей, более старые удаляются при сохранении нового.
+"""
+import cProfile
+import datetime as dt
+import logging
+import random
+import re
+import typing as tp
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-profile"
+PROFILE_ID_HEADER = "X-profile-id"
+
+_PROFILE_ID_RE = re.compile(r"[\w.-]+")
+
+_T = tp.TypeVar("_T")
+
+
+def is_sampled() -> bool:
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def profile_path(profile_id: str) -> Path | None:
+    if not _PROFILE_ID_RE.fullmatch(profile_id):
+        return None
+
+    return Path(settings.PROFILES_DIR, f"{profile_id}.prof")
+
+
+def _remove_old_profiles(profiles_dir: Path):
+    # Имя профиля начинается с времени, сортировка по имени - по возрасту
+    paths = sorted(profiles_dir.glob("*.prof"), reverse=True)
+    for path in paths[settings.PROFILES_MAX_FILES :]:
+        # Файл мог удалить параллельный вызов
+        path.unlink(missing_ok=True)
+
+
+def run_profiled(stats: instrumentation.CallStats, func: tp.Callable[[], _T]) -> _T:
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        return func()
+    finally:
+        profile.disable()
+        profile_id = "{:%Y%m%dT%H%M%S}-{}.{}-{}".format(
+            dt.datetime.now(), stats.entrypoint, stats.method, uuid.uuid4().hex[:8]
+        )
+        path = profile_path(profile_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(path)
+        _remove_old_profiles(path.parent)
+        stats.profile_id = profile_id
+        logger.info("Сохранен профиль %s", path)
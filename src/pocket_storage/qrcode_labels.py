@@ -0,0 +1,295 @@
+"""Листы этикеток с QR-кодами единиц хранения для печати.
+
+QR-коды берутся из кэша картинок (storage_unit_qrcode.qrcode_image_path) и
+масштабируются параллельно в пуле процессов, страницы собираются по одной и сразу
+дописываются в файл, так что память не растет с количеством этикеток.
+
+PDF пишется потоково (iter_pdf): страница - черно-белая картинка на весь лист,
+которая записывается один раз; дерево страниц и таблица xref добавляются в конце.
+Дописывание страниц через Pillow (save(append=True)) на каждой странице заново
+разбирает и переписывает дерево страниц, и время растет квадратично.
+"""
+import collections
+import concurrent.futures
+import contextlib
+import dataclasses
+import enum
+import functools
+import itertools
+import logging
+import os
+import typing as tp
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import QuerySet
+from PIL import Image, ImageDraw, ImageFont
+
+from . import models, storage_unit_qrcode
+
+logger = logging.getLogger(__name__)
+
+MM_PER_INCH = 25.4
+
+# Сколько страниц рисуется в пуле впереди страницы, которая собирается и записывается
+PAGES_AHEAD = 4
+
+POINTS_PER_INCH = 72
+
+_PDF_HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+_PDF_CATALOG = 1
+_PDF_PAGES = 2
+
+
+class LabelsFormat(str, enum.Enum):
+    PDF = "pdf"
+    PNG = "png"
+
+
+@dataclasses.dataclass(frozen=True)
+class LabelsLayout:
+    columns: int = 3
+    rows: int = 8
+    dpi: int = 200
+    page_size_mm: tuple[float, float] = (210, 297)  # A4
+    margin_mm: float = 8
+
+    def px(self, mm: float) -> int:
+        return round(mm / MM_PER_INCH * self.dpi)
+
+    @property
+    def page_size(self) -> tuple[int, int]:
+        width, height = self.page_size_mm
+        return self.px(width), self.px(height)
+
+    @property
+    def label_size(self) -> tuple[int, int]:
+        width, height = self.page_size
+        margin = self.px(self.margin_mm)
+        return (width - 2 * margin) // self.columns, (height - 2 * margin) // self.rows
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+
+@dataclasses.dataclass
+class _Label:
+    qrcode_content: str
+    caption: list[str]
+
+
+def render_qrcode(content: str, size: int, cache_dir: Path) -> Image.Image:
+    """Выполняется в дочернем процессе: QR-код размером не больше size x size."""
+    with Image.open(storage_unit_qrcode.qrcode_image_path(content, cache_dir)) as image:
+        image = image.convert("1")
+
+    box_size = max(1, size // image.width)
+    return image.resize((image.width * box_size,) * 2, Image.NEAREST)
+
+
+@functools.lru_cache
+def _font(size: int) -> tuple[ImageFont.ImageFont, bool]:
+    """Шрифт подписей и поддерживает ли он кириллицу."""
+    for path in filter(None, (settings.LABEL_FONT_PATH, "DejaVuSans.ttf")):
+        try:
+            return ImageFont.truetype(path, size), True
+        except OSError:
+            continue
+
+    logger.warning("TrueType-шрифт не найден, подписи этикеток только латиницей")
+    return ImageFont.load_default(), False
+
+
+def _fit_text(text: str, font: ImageFont.ImageFont, width: int) -> str:
+    if font.getlength(text) <= width:
+        return text
+
+    while text and font.getlength(text + "…") > width:
+        text = text[:-1]
+
+    return text + "…"
+
+
+def _draw_page(
+    layout: LabelsLayout, labels: list[_Label], qrcodes: tp.Iterator[Image.Image]
+) -> Image.Image:
+    page = Image.new("1", layout.page_size, 1)
+    draw = ImageDraw.Draw(page)
+    margin = layout.px(layout.margin_mm)
+    label_width, label_height = layout.label_size
+    font, unicode_font = _font(max(8, label_height // 9))
+
+    for i, (label, qr) in enumerate(zip(labels, qrcodes)):
+        x = margin + (i % layout.columns) * label_width
+        y = margin + (i // layout.columns) * label_height
+        page.paste(qr, (x, y + (label_height - qr.height) // 2))
+
+        text_x = x + qr.width + layout.px(2)
+        text_width = label_width - qr.width - layout.px(4)
+        line_height = label_height // 6
+        for line_no, line in enumerate(label.caption):
+            if not unicode_font:
+                line = line.encode("latin-1", "replace").decode("latin-1")
+            line = _fit_text(line, font, text_width)
+            draw.text((text_x, y + line_height * (line_no + 1)), line, font=font, fill=0)
+
+    return page
+
+
+def _make_label(storage_unit: models.StorageUnit) -> _Label:
+    return _Label(
+        qrcode_content=storage_unit_qrcode.make_qrcode_content(storage_unit),
+        caption=[storage_unit.ext_id, storage_unit.product.name, storage_unit.product.SKU],
+    )
+
+
+def _iter_pages(
+    storage_units: QuerySet[models.StorageUnit],
+    layout: LabelsLayout,
+    processes: int | None,
+) -> tp.Iterator[Image.Image]:
+    labels = map(
+        _make_label,
+        storage_units.select_related("product").order_by("ext_id").iterator(),
+    )
+    qr_size = min(layout.label_size[0] // 2, layout.label_size[1])
+    chunksize = max(1, layout.per_page // (processes or os.cpu_count() or 1))
+    pending = collections.deque()
+
+    with contextlib.ExitStack() as stack:
+        if processes == 0:
+            map_qrcodes = map
+        else:
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(max_workers=processes)
+            )
+            map_qrcodes = functools.partial(executor.map, chunksize=chunksize)
+
+        while page_labels := list(itertools.islice(labels, layout.per_page)):
+            qrcodes = map_qrcodes(
+                render_qrcode,
+                [label.qrcode_content for label in page_labels],
+                itertools.repeat(qr_size),
+                itertools.repeat(settings.QRCODE_CACHE_DIR),
+            )
+            pending.append((page_labels, qrcodes))
+            if len(pending) > PAGES_AHEAD:
+                yield _draw_page(layout, *pending.popleft())
+
+        while pending:
+            yield _draw_page(layout, *pending.popleft())
+
+
+def _pdf_object(number: int, entries: str, stream: bytes | None = None) -> bytes:
+    if stream is None:
+        body = f"<< {entries} >>".encode()
+    else:
+        body = (
+            f"<< {entries} /Length {len(stream)} >>\nstream\n".encode()
+            + stream
+            + b"\nendstream"
+        )
+
+    return f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+
+def iter_pdf(pages: tp.Iterable[Image.Image], dpi: int) -> tp.Iterator[bytes]:
+    """PDF из страниц-картинок по частям, по мере отрисовки страниц."""
+    offsets: dict[int, int] = {}
+    position = 0
+
+    def put(number: int, chunk: bytes) -> bytes:
+        nonlocal position
+        offsets[number] = position
+        position += len(chunk)
+        return chunk
+
+    yield _PDF_HEADER
+    position = len(_PDF_HEADER)
+
+    page_ids = []
+    for index, page in enumerate(pages):
+        image_id, content_id, page_id = (3 + 3 * index + i for i in range(3))
+        page = page.convert("1")
+        width, height = (size / dpi * POINTS_PER_INCH for size in page.size)
+
+        # В режиме "1" Pillow упаковывает строки по 8 пикселей, 1 - белый, как в DeviceGray
+        yield put(
+            image_id,
+            _pdf_object(
+                image_id,
+                f"/Type /XObject /Subtype /Image /Width {page.width} /Height {page.height} "
+                "/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /FlateDecode",
+                zlib.compress(page.tobytes()),
+            ),
+        )
+        yield put(
+            content_id,
+            _pdf_object(
+                content_id, "", f"q {width:.2f} 0 0 {height:.2f} 0 0 cm /Im0 Do Q".encode()
+            ),
+        )
+        yield put(
+            page_id,
+            _pdf_object(
+                page_id,
+                f"/Type /Page /Parent {_PDF_PAGES} 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] "
+                f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R",
+            ),
+        )
+        page_ids.append(page_id)
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    yield put(
+        _PDF_PAGES,
+        _pdf_object(_PDF_PAGES, f"/Type /Pages /Kids [{kids}] /Count {len(page_ids)}"),
+    )
+    yield put(_PDF_CATALOG, _pdf_object(_PDF_CATALOG, f"/Type /Catalog /Pages {_PDF_PAGES} 0 R"))
+
+    size = len(offsets) + 1
+    xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+    xref.extend(f"{offsets[number]:010d} 00000 n \n" for number in range(1, size))
+    xref.append(f"trailer\n<< /Size {size} /Root {_PDF_CATALOG} 0 R >>\n")
+    xref.append(f"startxref\n{position}\n%%EOF\n")
+    yield "".join(xref).encode()
+
+
+def labels_pdf(
+    storage_units: QuerySet[models.StorageUnit], layout: LabelsLayout = LabelsLayout()
+) -> bytes:
+    """PDF небольшого количества этикеток целиком, без пула процессов (для админки)."""
+    return b"".join(iter_pdf(_iter_pages(storage_units, layout, processes=0), layout.dpi))
+
+
+def write_labels(
+    storage_units: QuerySet[models.StorageUnit],
+    output: Path,
+    labels_format: LabelsFormat = LabelsFormat.PDF,
+    layout: LabelsLayout = LabelsLayout(),
+    processes: int | None = None,
+) -> int:
+    """Записать листы этикеток, вернуть количество страниц.
+
+    PDF - один файл output, PNG - по файлу на страницу в каталоге output.
+    processes=0 - рисовать QR-коды в текущем процессе, без пула.
+    """
+    pages = 0
+
+    def count_pages(images: tp.Iterable[Image.Image]) -> tp.Iterator[Image.Image]:
+        nonlocal pages
+        for pages, image in enumerate(images, start=1):
+            yield image
+
+    images = count_pages(_iter_pages(storage_units, layout, processes))
+    if labels_format is LabelsFormat.PNG:
+        output.mkdir(parents=True, exist_ok=True)
+        for image in images:
+            image.save(output / f"labels-{pages:04}.png", optimize=True)
+    else:
+        with open(output, "wb") as stream:
+            for chunk in iter_pdf(images, layout.dpi):
+                stream.write(chunk)
+
+    return pages
@@ -0,0 +1,67 @@
+"""Поиск товаров и единиц хранения, общий для API и админки.
+
+Подстрочный поиск (icontains) по названию, SKU, штрих-коду и номеру ячейки
+обслуживается триграммными GIN-индексами по UPPER(поле) (миграция 0007). UUID
+сравниваются на равенство по первичному ключу. Полный штрих-код дополнительно
+сравнивается на равенство по уникальному индексу, но находит и товары, в штрих-коде
+которых он встречается подстрокой.
+
+Условия по разным таблицам не объединяются через OR по JOIN: такой запрос
+Postgres выполняет только полным перебором. Единицы хранения ищутся через
+UNION двух индексируемых выборок.
+"""
+import re
+import uuid
+
+from django.db.models import Q
+
+from . import models
+
+# EAN-8 ... GTIN-14
+_BARCODE_RE = re.compile(r"\d{8,14}")
+
+
+def _as_uuid(value: str) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return None
+
+
+def _product_condition(search_str: str) -> Q:
+    condition = (
+        Q(name__icontains=search_str)
+        | Q(SKU__icontains=search_str)
+        | Q(barcode__icontains=search_str)
+    )
+    if _BARCODE_RE.fullmatch(search_str):
+        return condition | Q(barcode=search_str)
+
+    return condition
+
+
+def search_products(
+    query: models.QuerySet[models.Product], search_str: str
+) -> models.QuerySet[models.Product]:
+    """Товары по ID, подстроке названия, SKU или штрих-кода."""
+    search_str = search_str.strip()
+    if (product_id := _as_uuid(search_str)) is not None:
+        return query.filter(id=product_id)
+
+    return query.filter(_product_condition(search_str))
+
+
+def search_storage_units(
+    query: models.QuerySet[models.StorageUnit], search_str: str
+) -> models.QuerySet[models.StorageUnit]:
+    """Единицы хранения по ID (своему или товара), номеру ячейки или по поиску товара."""
+    search_str = search_str.strip()
+    if (object_id := _as_uuid(search_str)) is not None:
+        return query.filter(Q(id=object_id) | Q(product_id=object_id))
+
+    by_product = models.StorageUnit.objects.filter(
+        product__in=models.Product.objects.filter(_product_condition(search_str)).values("id"),
+    ).values("id")
+    by_ext_id = models.StorageUnit.objects.filter(ext_id__icontains=search_str).values("id")
+
+    return query.filter(id__in=by_product.union(by_ext_id))
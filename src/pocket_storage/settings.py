@@ -21,8 +21,36 @@ class _Settings(BaseSettings):
     DEBUG: bool = True
     VERSION: str = "unknown"
     THREADS: int = 4
+    # Адаптивный размер пула: от THREADS_MIN до THREADS потоков по времени ожидания задач
+    # (цель - THREADS_TARGET_WAIT_MS) и числу свободных соединений Postgres
+    THREADS_ADAPTIVE: bool = False
+    THREADS_MIN: int = 2
+    THREADS_TARGET_WAIT_MS: int = 10
+    # Лимиты одновременных вызовов JSON-RPC, сверх лимита - ошибка 9001.
+    # Ключ - точка входа ("mobile") или метод ("web.get_storage_units")
+    RPC_CONCURRENCY_LIMITS: dict[str, int] = {}
+    # statement_timeout (мс) для SQL-запросов вызовов, ключи как в RPC_CONCURRENCY_LIMITS.
+    # Лимит метода важнее лимита точки входа, 0 - без ограничения
+    RPC_STATEMENT_TIMEOUTS_MS: dict[str, int] = {}
     LOG_LEVEL: str = "DEBUG"
 
+    # Вызовы JSON-RPC дольше порога пишутся в лог pocket_storage.slow_calls со всеми SQL-запросами.
+    # 0 - отключено
+    SLOW_CALL_THRESHOLD_MS: int = 1000
+    # Дополнительно выполнять EXPLAIN (ANALYZE, BUFFERS) самого долгого SELECT медленного вызова
+    SLOW_CALL_EXPLAIN: bool = False
+    # Файл для лога медленных вызовов. Пусто - только консоль
+    SLOW_CALL_LOG_FILE: str = ""
+    # Метрика размера ответа каждого вызова. Ответ для нее сериализуется повторно
+    RPC_RESPONSE_SIZE_METRIC: bool = False
+
+    # Доля вызовов JSON-RPC, профилируемых без заголовка X-profile (0..1)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    # Каталог для файлов профилей. Пусто - src/profiles
+    PROFILES_DIR: str = ""
+    # Сколько последних профилей хранить в PROFILES_DIR
+    PROFILES_MAX_FILES: int = 1000
+
     PORT: int = 8000
     HOST: str = "0.0.0.0"
 
@@ -31,9 +59,27 @@ class _Settings(BaseSettings):
     DB_NAME: str = "pocket_storage"
     DB_USER: str = "pocket_storage"
     DB_PASSWORD: str = "pocket_storage"
+    # Соединения Postgres, которые адаптивный пул потоков оставляет свободными
+    DB_CONNECTIONS_RESERVE: int = 10
 
     MEMCACHED_HOST: str = "localhost"
     MEMCACHED_PORT: int = 11211
+    # TrueType-шрифт подписей на этикетках. Пусто - DejaVuSans из системных шрифтов
+    LABEL_FONT_PATH: str = ""
+    # Каталог кэша PNG QR-кодов. Пусто - src/qrcodes
+    QRCODE_CACHE_DIR: str = ""
+
+    # Время жизни закэшированной единицы хранения в mobile API, секунды
+    STORAGE_UNIT_CACHE_TIMEOUT: int = 30
+    # Сколько секунд хранится результат вызова mobile API с ключом идемпотентности
+    IDEMPOTENCY_KEY_TIMEOUT: int = 24 * 60 * 60
+
+    # Партиции истории действий (см. operation_partitions): на сколько месяцев вперед
+    # создавать, сколько месяцев хранить в базе (0 - все) и куда выгружать старые.
+    # Пустой каталог архива - src/archive
+    OPERATIONS_PARTITIONS_AHEAD: int = 3
+    OPERATIONS_RETENTION_MONTHS: int = 0
+    OPERATIONS_ARCHIVE_DIR: str = ""
 
     class Config:
         env_file = dotenv.find_dotenv(".env") or ".env"
@@ -117,6 +163,10 @@ CACHES = {
         "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
         "LOCATION": f"{_settings.MEMCACHED_HOST}:{_settings.MEMCACHED_PORT}",
         "TIMEOUT": 120,
+        "OPTIONS": {
+            # Недоступный memcached - промах кэша, а не ошибка запроса
+            "ignore_exc": True,
+        },
     }
 }
 
@@ -152,6 +202,17 @@ LOGGING = {
             "class": "logging.StreamHandler",
             "level": "DEBUG",
         },
+        **(
+            {
+                "slow_calls_file": {
+                    "class": "logging.handlers.WatchedFileHandler",
+                    "filename": _settings.SLOW_CALL_LOG_FILE,
+                    "level": "INFO",
+                },
+            }
+            if _settings.SLOW_CALL_LOG_FILE
+            else {}
+        ),
     },
     "loggers": {
         "": {
@@ -165,6 +226,9 @@ LOGGING = {
         "django.db.backends.schema": {
             "level": "INFO",
         },
+        "PIL": {
+            "level": "INFO",
+        },
         "django.security.DisallowedHost": {
             "handlers": ["null"],
             "propagate": False,
@@ -173,6 +237,11 @@ LOGGING = {
             "handlers": ["null"],
             "propagate": False,
         },
+        "pocket_storage.slow_calls": {
+            "handlers": ["console"] + (["slow_calls_file"] if _settings.SLOW_CALL_LOG_FILE else []),
+            "level": "INFO",
+            "propagate": False,
+        },
         "faker.factory": {
             "handlers": ["null"],
             "propagate": False,
@@ -203,6 +272,12 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = Path(BASE_DIR, "staticfiles")
 
+PROFILES_DIR = Path(_settings.PROFILES_DIR or Path(BASE_DIR, "profiles"))
+
+QRCODE_CACHE_DIR = Path(_settings.QRCODE_CACHE_DIR or Path(BASE_DIR, "qrcodes"))
+
+OPERATIONS_ARCHIVE_DIR = Path(_settings.OPERATIONS_ARCHIVE_DIR or Path(BASE_DIR, "archive"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,71 @@
+"""Ограничение времени SQL-запросов JSON-RPC вызова и их отмена.
+
+Таймаут задается в settings.RPC_STATEMENT_TIMEOUTS_MS для точки входа или метода и
+выставляется на соединение потока, выполняющего метод, только на время вызова.
+Запрос, прерванный таймаутом или отменой, завершается ошибкой с кодом 57014.
+"""
+import contextlib
+import logging
+import typing as tp
+
+import django.db
+from django.conf import settings
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+QUERY_CANCELED_PGCODE = "57014"
+
+_T = tp.TypeVar("_T")
+
+
+def get_timeout_ms(entrypoint: str, method: str) -> int:
+    timeouts = settings.RPC_STATEMENT_TIMEOUTS_MS
+    return timeouts.get(f"{entrypoint}.{method}", timeouts.get(entrypoint, 0))
+
+
+@contextlib.contextmanager
+def statement_timeout(timeout_ms: int) -> tp.Iterator[None]:
+    """statement_timeout на соединении текущего потока, 0 - без изменений."""
+    if not timeout_ms:
+        yield
+        return
+
+    connection = django.db.connection
+    with connection.cursor() as cursor:
+        cursor.execute("SET statement_timeout = %s", [timeout_ms])
+
+    try:
+        yield
+    finally:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("RESET statement_timeout")
+        except django.db.Error:
+            # Соединение не пригодно для работы, таймаут не должен достаться следующему вызову
+            connection.close()
+
+
+def run_with_statement_timeout(timeout_ms: int, func: tp.Callable[[], _T]) -> _T:
+    with statement_timeout(timeout_ms):
+        return func()
+
+
+def is_query_canceled(exc: BaseException) -> bool:
+    return getattr(exc.__cause__, "pgcode", None) == QUERY_CANCELED_PGCODE
+
+
+def cancel(stats: instrumentation.CallStats):
+    """Прервать выполняющийся запрос вызова (например, клиент отключился).
+
+    Вызывается из event loop, psycopg2 connection.cancel() потокобезопасен.
+    """
+    stats.canceled = True
+    with stats.connection_lock:
+        connection = stats.connection
+        if connection is None or connection.connection is None:
+            return
+
+        logger.info("Отмена запроса %s.%s", stats.entrypoint, stats.method)
+        connection.connection.cancel()
@@ -1,11 +1,47 @@
-import qrcode
+"""Содержимое QR-кодов единиц хранения.
+
+Текущий формат - компактный: COMPACT_PREFIX + base32(UUID (16 байт) + HMAC-SHA256,
+обрезанный до COMPACT_MAC_SIZE байт). Он укладывается в алфавитно-цифровой режим QR,
+поэтому коды получаются меньше и быстрее сканируются. Старые этикетки содержат JWT
+(HS256) и продолжают приниматься.
+
+PNG QR-кодов кэшируются на диске под ключом - хэшем содержимого, так что файл
+по ключу никогда не меняется и может отдаваться с бессрочным кэшированием.
+"""
+import base64
+import binascii
+import functools
+import hashlib
+import hmac
+import os
+import tempfile
+import uuid
 from io import BytesIO
+from pathlib import Path
+
 import jwt
+import qrcode
 from django.conf import settings
 from pydantic import BaseModel
 
 from pocket_storage import models
 
+# Подписанных токенов, для которых запоминается результат проверки
+VERIFIED_TOKENS_CACHE_SIZE = 10_000
+
+# Версия формата входит в префикс, буквы и цифры - для алфавитно-цифрового режима QR
+COMPACT_PREFIX = "PS1"
+COMPACT_MAC_SIZE = 10
+
+# Входит в ключ кэша картинок: при изменении отрисовки старые файлы не используются
+QRCODE_IMAGE_VERSION = 1
+# Картинка в кэше - модуль QR на пиксель, масштабируется при показе и печати
+QRCODE_BORDER = 4
+
+
+class InvalidQrCodeContent(ValueError):
+    pass
+
 
 class QrCodeContentPayload(BaseModel):
     storage_unit_id: str
@@ -17,15 +53,47 @@ class QrCodeContentPayload(BaseModel):
         )
 
 
-def make_qrcode(storage_unit: models.StorageUnit) -> bytes:
-    content = make_qrcode_content(storage_unit)
+def make_qrcode(content: str) -> bytes:
+    qr = qrcode.QRCode(box_size=1, border=QRCODE_BORDER)
+    qr.add_data(content)
+    qr.make(fit=True)
     buffer = BytesIO()
-    qr = qrcode.make(content)
-    qr.save(buffer)
+    qr.make_image().save(buffer)
     return buffer.getvalue()
 
 
+def qrcode_image_key(content: str) -> str:
+    return hashlib.sha256(f"{QRCODE_IMAGE_VERSION}:{content}".encode()).hexdigest()
+
+
+def qrcode_image_path(content: str, cache_dir: Path | None = None) -> Path:
+    """PNG QR-кода из кэша на диске, отрисовывается при первом обращении.
+
+    cache_dir передается явно из дочерних процессов, где настройки Django
+    могут быть не загружены.
+    """
+    key = qrcode_image_key(content)
+    path = Path(cache_dir or settings.QRCODE_CACHE_DIR, key[:2], key[2:4], f"{key}.png")
+    if path.is_file():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Пишем во временный файл и переименовываем, чтобы параллельные читатели
+    # не увидели недописанную картинку
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+        tmp.write(make_qrcode(content))
+    os.replace(tmp.name, path)
+    return path
+
+
 def make_qrcode_content(storage_unit: models.StorageUnit) -> str:
+    storage_unit_id = storage_unit.id.bytes
+    data = storage_unit_id + _compact_mac(storage_unit_id)
+    return COMPACT_PREFIX + base64.b32encode(data).decode("ascii").rstrip("=")
+
+
+def make_legacy_qrcode_content(storage_unit: models.StorageUnit) -> str:
+    """JWT, как на этикетках, напечатанных до компактного формата."""
     payload = QrCodeContentPayload.from_storage_unit(storage_unit).dict()
     return jwt.encode(
         payload,
@@ -35,11 +103,52 @@ def make_qrcode_content(storage_unit: models.StorageUnit) -> str:
 
 
 def parse_qrcode_content(content: str) -> QrCodeContentPayload:
-    payload = jwt.decode(
-        content,
-        key=settings.SECRET_KEY,
-        algorithms=["HS256"],
-        options={"verify_signature": True},
-    )
+    if content.startswith(COMPACT_PREFIX):
+        return _parse_compact_content(content)
+
+    try:
+        payload = jwt.decode(
+            content,
+            key=settings.SECRET_KEY,
+            algorithms=["HS256"],
+            options={"verify_signature": True},
+        )
+    except jwt.exceptions.InvalidTokenError as exc:
+        raise InvalidQrCodeContent(str(exc)) from exc
 
     return QrCodeContentPayload.parse_obj(payload)
+
+
+def _compact_mac(storage_unit_id: bytes) -> bytes:
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(),
+        COMPACT_PREFIX.encode() + storage_unit_id,
+        hashlib.sha256,
+    ).digest()
+    return digest[:COMPACT_MAC_SIZE]
+
+
+def _parse_compact_content(content: str) -> QrCodeContentPayload:
+    encoded = content[len(COMPACT_PREFIX) :]
+    try:
+        data = base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+    except binascii.Error as exc:
+        raise InvalidQrCodeContent("Invalid base32") from exc
+
+    storage_unit_id, mac = data[:16], data[16:]
+    if len(mac) != COMPACT_MAC_SIZE or not hmac.compare_digest(
+        mac, _compact_mac(storage_unit_id)
+    ):
+        raise InvalidQrCodeContent("Signature verification failed")
+
+    return QrCodeContentPayload(storage_unit_id=str(uuid.UUID(bytes=storage_unit_id)))
+
+
+@functools.lru_cache(maxsize=VERIFIED_TOKENS_CACHE_SIZE)
+def get_storage_unit_id(content: str) -> str:
+    """storage_unit_id из QR-кода с кэшем по полному тексту токена.
+
+    В кэш попадают только токены, прошедшие проверку подписи, так что подделанный
+    токен всегда проверяется заново.
+    """
+    return parse_qrcode_content(content).storage_unit_id
@@ -0,0 +1,126 @@
+"""Переходы единиц хранения между состояниями с записью в историю действий.
+
+Пакет переходов применяется целиком или не применяется вовсе, за постоянное число
+запросов независимо от размера: блокировка всех единиц одним SELECT ... FOR NO KEY
+UPDATE, один UPDATE с CASE по целевым состояниям и складам и одна вставка действий
+через bulk_create. Остатки (StockAggregate) пересчитывает триггер уровня оператора.
+"""
+import dataclasses
+import enum
+import uuid
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from . import models
+
+State = models.StorageUnitState
+
+
+class Action(str, enum.Enum):
+    MOVE = "move"
+    RESERVE = "reserve"
+    PICK = "pick"
+    WRITE_OFF = "write_off"
+
+
+# Действие: (состояния, из которых оно допустимо, конечное состояние)
+TRANSITIONS: dict[Action, tuple[frozenset[State], State]] = {
+    Action.MOVE: (frozenset({State.NEW, State.STORED}), State.STORED),
+    Action.RESERVE: (frozenset({State.NEW, State.STORED}), State.RESERVED),
+    Action.PICK: (frozenset({State.STORED, State.RESERVED}), State.PICKED),
+    Action.WRITE_OFF: (frozenset(State) - {State.WRITTEN_OFF}, State.WRITTEN_OFF),
+}
+
+
+class StorageUnitsNotFound(Exception):
+    def __init__(self, storage_unit_ids: list[uuid.UUID]):
+        super().__init__(f"Storage units not found: {storage_unit_ids}")
+        self.storage_unit_ids = storage_unit_ids
+
+
+class TransitionNotAllowed(Exception):
+    def __init__(self, storage_unit_id: uuid.UUID, state: State, action: Action):
+        super().__init__(f"Storage unit {storage_unit_id}: {action.value} from {state.value}")
+        self.storage_unit_id = storage_unit_id
+        self.state = state
+        self.action = action
+
+
+@dataclasses.dataclass(frozen=True)
+class Transition:
+    storage_unit_id: uuid.UUID
+    action: Action
+    # Склад назначения, только для MOVE
+    warehouse_id: uuid.UUID | None = None
+
+    def __post_init__(self):
+        if (self.action == Action.MOVE) != (self.warehouse_id is not None):
+            raise ValueError("warehouse_id is required for move and only for move")
+
+
+def apply_transitions(
+    employee_id: uuid.UUID, transitions: list[Transition]
+) -> list[models.StorageUnitOperation]:
+    """Применить переходы от имени сотрудника и вернуть записанные действия.
+
+    Единицы хранения блокируются в порядке ID, чтобы параллельные пакеты
+    не взаимоблокировались. Одна единица хранения может встречаться в пакете один раз.
+    """
+    ids = [item.storage_unit_id for item in transitions]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Duplicate storage units in transitions")
+    if not transitions:
+        return []
+
+    with transaction.atomic():
+        states = dict(
+            models.StorageUnit.objects.select_for_update(no_key=True)
+            .filter(id__in=ids)
+            .order_by("id")
+            .values_list("id", "state")
+        )
+        if missing := [unit_id for unit_id in ids if unit_id not in states]:
+            raise StorageUnitsNotFound(missing)
+
+        now = timezone.now()
+        operations = []
+        by_state: dict[State, list[uuid.UUID]] = {}
+        by_warehouse: dict[uuid.UUID, list[uuid.UUID]] = {}
+        for item in transitions:
+            state = State(states[item.storage_unit_id])
+            allowed_from, final_state = TRANSITIONS[item.action]
+            if state not in allowed_from:
+                raise TransitionNotAllowed(item.storage_unit_id, state, item.action)
+
+            by_state.setdefault(final_state, []).append(item.storage_unit_id)
+            if item.warehouse_id is not None:
+                by_warehouse.setdefault(item.warehouse_id, []).append(item.storage_unit_id)
+
+            operations.append(
+                models.StorageUnitOperation(
+                    storage_unit_id=item.storage_unit_id,
+                    employee_id=employee_id,
+                    initial_state=state,
+                    final_state=final_state,
+                    created_at=now,
+                )
+            )
+
+        models.StorageUnit.objects.filter(id__in=ids).update(
+            state=Case(
+                *(When(id__in=group, then=Value(target)) for target, group in by_state.items()),
+                default=F("state"),
+            ),
+            warehouse_id=Case(
+                *(
+                    When(id__in=group, then=Value(warehouse_id))
+                    for warehouse_id, group in by_warehouse.items()
+                ),
+                default=F("warehouse_id"),
+            ),
+            updated_at=now,
+            version=F("version") + 1,
+        )
+        return models.StorageUnitOperation.objects.bulk_create(operations)
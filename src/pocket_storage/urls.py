@@ -16,6 +16,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from . import views
+
 urlpatterns = [
+    path("profiles/<str:profile_id>/", views.download_profile, name="download_profile"),
+    path(
+        "qrcodes/<uuid:storage_unit_id>/<str:key>.png",
+        views.storage_unit_qrcode_image,
+        name="storage_unit_qrcode_image",
+    ),
     path("admin/", admin.site.urls),
 ]
@@ -0,0 +1,40 @@
+"""Оптимистичные изменения записей с версией (models.VersionedModel).
+
+Вместо SELECT ... FOR UPDATE и UPDATE в одной транзакции выполняется один
+
+    UPDATE ... SET version = version + 1 WHERE id = %s AND version = %s
+
+без явной транзакции: строка блокируется только на время этого оператора, и
+параллельные изменения одной записи с разных устройств не выстраиваются в очередь
+на блокировке. Если запись успели изменить, клиент получает конфликт с текущей
+версией, перечитывает запись и повторяет изменение.
+"""
+import typing as tp
+
+from django.db.models import F
+
+from . import models
+
+
+class VersionConflict(Exception):
+    def __init__(self, current_version: int):
+        super().__init__(f"Record was changed, current version is {current_version}")
+        self.current_version = current_version
+
+
+def update_versioned(
+    query: models.QuerySet[models.VersionedModel], pk: tp.Any, version: int, **values
+) -> bool:
+    """Изменить запись, если ее версия равна version, и увеличить версию.
+
+    :return: False, если записи нет
+    :raises VersionConflict: запись изменена после чтения клиентом
+    """
+    if query.filter(pk=pk, version=version).update(version=F("version") + 1, **values):
+        return True
+
+    current_version = query.filter(pk=pk).values_list("version", flat=True).first()
+    if current_version is None:
+        return False
+
+    raise VersionConflict(current_version)
@@ -0,0 +1,31 @@
+import uuid
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
+from django.views.decorators.cache import cache_control
+
+from . import models, profiling, storage_unit_qrcode
+
+# Картинка по ключу не меняется, браузер может не перезапрашивать ее год
+QRCODE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@staff_member_required
+def download_profile(request, profile_id: str):
+    path = profiling.profile_path(profile_id)
+    if path is None or not path.is_file():
+        raise Http404
+
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
+
+
+@staff_member_required
+@cache_control(private=True, max_age=QRCODE_MAX_AGE, immutable=True)
+def storage_unit_qrcode_image(request, storage_unit_id: uuid.UUID, key: str):
+    # Содержимое QR-кода зависит только от ID, в базу ходить не нужно
+    content = storage_unit_qrcode.make_qrcode_content(models.StorageUnit(id=storage_unit_id))
+    if key != storage_unit_qrcode.qrcode_image_key(content):
+        raise Http404
+
+    path = storage_unit_qrcode.qrcode_image_path(content)
+    return FileResponse(path.open("rb"), content_type="image/png")
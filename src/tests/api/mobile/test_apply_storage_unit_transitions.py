@@ -0,0 +1,161 @@
+import uuid
+
+import factory
+import pytest
+from dirty_equals import IsPartialDict
+
+from pocket_storage import factories, models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture
+def storage_units():
+    return factories.StorageUnitFactory.create_batch(
+        3,
+        warehouse=factories.WarehouseFactory.create(),
+        ext_id=factory.Sequence(lambda n: f"T{n}"),
+        state=models.StorageUnitState.STORED,
+    )
+
+
+@pytest.fixture
+def employee():
+    return factories.EmployeeFactory.create()
+
+
+def test_ok(mobile_request, storage_units, employee):
+    warehouse = factories.WarehouseFactory.create(name="Новый склад")
+
+    resp = mobile_request(
+        "apply_storage_unit_transitions",
+        {
+            "employee_id": str(employee.id),
+            "transitions": [
+                {
+                    "storage_unit_id": str(storage_units[0].id),
+                    "action": "move",
+                    "warehouse_id": str(warehouse.id),
+                },
+                {"storage_unit_id": str(storage_units[1].id), "action": "reserve"},
+                {"storage_unit_id": str(storage_units[2].id), "action": "pick"},
+            ],
+        },
+    )
+
+    assert resp.get("result") == [
+        IsPartialDict({"storage_unit_id": str(storage_units[0].id), "final_state": "stored"}),
+        IsPartialDict({"storage_unit_id": str(storage_units[1].id), "final_state": "reserved"}),
+        IsPartialDict({"storage_unit_id": str(storage_units[2].id), "final_state": "picked"}),
+    ], resp.get("error")
+
+    states = dict(
+        models.StorageUnit.objects.filter(
+            id__in=[storage_unit.id for storage_unit in storage_units]
+        ).values_list("id", "state")
+    )
+    assert states == {
+        storage_units[0].id: models.StorageUnitState.STORED,
+        storage_units[1].id: models.StorageUnitState.RESERVED,
+        storage_units[2].id: models.StorageUnitState.PICKED,
+    }
+    assert set(models.StorageUnit.objects.values_list("id", "warehouse_id")) == {
+        (storage_units[0].id, warehouse.id),
+        (storage_units[1].id, storage_units[1].warehouse_id),
+        (storage_units[2].id, storage_units[2].warehouse_id),
+    }
+    assert models.StorageUnitOperation.objects.filter(employee=employee).count() == 3
+
+
+def test_not_allowed__nothing_applied(mobile_request, storage_units, employee):
+    storage_units[2].state = models.StorageUnitState.WRITTEN_OFF
+    storage_units[2].save()
+
+    resp = mobile_request(
+        "apply_storage_unit_transitions",
+        {
+            "employee_id": str(employee.id),
+            "transitions": [
+                {"storage_unit_id": str(storage_unit.id), "action": "write_off"}
+                for storage_unit in storage_units
+            ],
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 7003,
+        "message": "Storage unit transition not allowed",
+        "data": {
+            "storage_unit_id": str(storage_units[2].id),
+            "state": "written_off",
+            "action": "write_off",
+        },
+    }
+    assert not models.StorageUnit.objects.filter(
+        state=models.StorageUnitState.WRITTEN_OFF
+    ).exclude(id=storage_units[2].id).exists()
+    assert not models.StorageUnitOperation.objects.exists()
+
+
+def test_storage_units_not_found(mobile_request, storage_units, employee):
+    missing_id = uuid.uuid4()
+
+    resp = mobile_request(
+        "apply_storage_unit_transitions",
+        {
+            "employee_id": str(employee.id),
+            "transitions": [
+                {"storage_unit_id": str(storage_units[0].id), "action": "reserve"},
+                {"storage_unit_id": str(missing_id), "action": "reserve"},
+            ],
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 7004,
+        "message": "Storage units not found",
+        "data": {"storage_unit_ids": [str(missing_id)]},
+    }
+
+
+def test_duplicate_storage_units__invalid_params(mobile_request, storage_units, employee):
+    resp = mobile_request(
+        "apply_storage_unit_transitions",
+        {
+            "employee_id": str(employee.id),
+            "transitions": [
+                {"storage_unit_id": str(storage_units[0].id), "action": "reserve"},
+                {"storage_unit_id": str(storage_units[0].id), "action": "pick"},
+            ],
+        },
+    )
+
+    assert resp.get("error", {}).get("code") == -32602
+
+
+def test_move_without_warehouse__invalid_params(mobile_request, storage_units, employee):
+    resp = mobile_request(
+        "apply_storage_unit_transitions",
+        {
+            "employee_id": str(employee.id),
+            "transitions": [{"storage_unit_id": str(storage_units[0].id), "action": "move"}],
+        },
+    )
+
+    assert resp.get("error", {}).get("code") == -32602
+
+
+def test_retry_with_idempotency_key(mobile_request, storage_units, employee):
+    params = {
+        "employee_id": str(employee.id),
+        "transitions": [{"storage_unit_id": str(storage_units[0].id), "action": "pick"}],
+        "idempotency_key": str(uuid.uuid4()),
+    }
+
+    first = mobile_request("apply_storage_unit_transitions", params)
+    retry = mobile_request("apply_storage_unit_transitions", params)
+
+    assert retry.get("result") == first.get("result"), retry.get("error")
+    assert models.StorageUnitOperation.objects.count() == 1
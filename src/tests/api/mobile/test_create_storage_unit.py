@@ -39,6 +39,7 @@ def test_create_with_id__ok(freezer, warehouse, mobile_request):
         "product_category_name": product.category.name,
         "product_id": str(product.id),
         "product_name": product.name,
+        "version": 1,
     }
 
 
@@ -100,6 +101,7 @@ def test_create_with_barcode__ok(freezer, warehouse, mobile_request):
         "product_category_name": product.category.name,
         "product_id": str(product.id),
         "product_name": product.name,
+        "version": 1,
     }
 
 
@@ -132,3 +134,33 @@ def test_create_with_barcode__storage_unit_already_exists(mobile_request):
 
     assert resp.get("error") == {"code": 7001, "message": "Storage unit already exists"}
     assert not models.StorageUnit.objects.exclude(id=storage_unit.id).exists()
+
+
+def test_create_with_barcode__retry_with_idempotency_key(warehouse, mobile_request):
+    product = factories.ProductFactory.create()
+    params = {
+        "barcode": product.barcode,
+        "ext_id": "Z123",
+        "idempotency_key": str(uuid.uuid4()),
+    }
+
+    first = mobile_request("create_storage_unit_with_product_barcode", params)
+    retry = mobile_request("create_storage_unit_with_product_barcode", params)
+
+    assert retry.get("result") == first.get("result"), retry.get("error")
+    assert models.StorageUnit.objects.count() == 1
+
+
+def test_create_with_barcode__error_not_saved(warehouse, mobile_request):
+    params = {
+        "barcode": "4600702084566",
+        "ext_id": "Z123",
+        "idempotency_key": str(uuid.uuid4()),
+    }
+
+    resp = mobile_request("create_storage_unit_with_product_barcode", params)
+    assert resp.get("error", {}).get("code") == 4002
+
+    factories.ProductFactory.create(barcode="4600702084566")
+    resp = mobile_request("create_storage_unit_with_product_barcode", params)
+    assert resp.get("result", {}).get("ext_id") == "Z123", resp.get("error")
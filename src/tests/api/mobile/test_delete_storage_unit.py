@@ -3,6 +3,7 @@ import uuid
 import pytest
 
 from pocket_storage import factories, models
+from pocket_storage.api.idempotency import Idempotency
 
 pytestmark = [
     pytest.mark.django_db(transaction=True),
@@ -24,6 +25,16 @@ def test_ok(mobile_request):
     assert not models.StorageUnit.objects.filter(id=storage_unit.id).exists()
 
 
+def test_cached_storage_unit_invalidated(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create()
+    mobile_request("get_storage_unit_with_id", {"id": str(storage_unit.id)})
+
+    mobile_request("delete_storage_unit", {"storage_unit_id": str(storage_unit.id)})
+    resp = mobile_request("get_storage_unit_with_id", {"id": str(storage_unit.id)})
+
+    assert resp.get("error", {}).get("code") == 7002
+
+
 def test_not_found(mobile_request):
     resp = mobile_request(
         "delete_storage_unit",
@@ -36,3 +47,33 @@ def test_not_found(mobile_request):
         "code": 7002,
         "message": "Storage unit not found",
     }
+
+
+def test_retry_with_idempotency_key(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create()
+    params = {
+        "storage_unit_id": str(storage_unit.id),
+        "idempotency_key": str(uuid.uuid4()),
+    }
+
+    mobile_request("delete_storage_unit", params)
+    resp = mobile_request("delete_storage_unit", params)
+
+    assert resp.get("result") is True, resp.get("error")
+
+
+def test_same_idempotency_key_in_progress(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create()
+    idempotency_key = str(uuid.uuid4())
+
+    with Idempotency("delete_storage_unit", idempotency_key):
+        resp = mobile_request(
+            "delete_storage_unit",
+            {
+                "storage_unit_id": str(storage_unit.id),
+                "idempotency_key": idempotency_key,
+            },
+        )
+
+    assert resp.get("error", {}).get("code") == 9003
+    assert models.StorageUnit.objects.filter(id=storage_unit.id).exists()
@@ -28,6 +28,7 @@ def test_ok(mobile_request):
         "product_category_name": storage_unit.product.category.name,
         "product_id": str(storage_unit.product.id),
         "product_name": storage_unit.product.name,
+        "version": 1,
     }, resp.get("error")
 
 
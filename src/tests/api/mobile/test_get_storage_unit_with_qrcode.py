@@ -3,7 +3,10 @@ import uuid
 import pytest
 
 from pocket_storage import models, factories
-from pocket_storage.storage_unit_qrcode import make_qrcode_content
+from pocket_storage.storage_unit_qrcode import (
+    make_legacy_qrcode_content,
+    make_qrcode_content,
+)
 
 pytestmark = [
     pytest.mark.django_db(transaction=True),
@@ -29,9 +32,23 @@ def test_ok(mobile_request):
         "product_category_name": storage_unit.product.category.name,
         "product_id": str(storage_unit.product.id),
         "product_name": storage_unit.product.name,
+        "version": 1,
     }, resp.get("error")
 
 
+def test_legacy_jwt(mobile_request):
+    storage_unit: models.StorageUnit = factories.StorageUnitFactory.create()
+
+    resp = mobile_request(
+        "get_storage_unit_with_qrcode",
+        {
+            "qrcode_content": make_legacy_qrcode_content(storage_unit),
+        },
+    )
+
+    assert resp.get("result", {}).get("id") == str(storage_unit.id), resp.get("error")
+
+
 def test_not_found(mobile_request):
     resp = mobile_request(
         "get_storage_unit_with_qrcode",
@@ -46,6 +46,7 @@ def test_ok(mobile_request):
                 "product_category_name": storage_unit.product.category.name,
                 "product_id": str(storage_unit.product.id),
                 "product_name": storage_unit.product.name,
+                "version": 1,
             }
         ],
         "total_size": 1,
@@ -80,6 +81,7 @@ def test_filter_by_category_id(mobile_request):
                 "product_category_name": expected_storage_unit.product.category.name,
                 "product_id": str(expected_storage_unit.product.id),
                 "product_name": expected_storage_unit.product.name,
+                "version": 1,
             }
         ],
         "total_size": 1,
@@ -128,6 +130,7 @@ def test_search(mobile_request, search_query):
                 "product_category_name": expected_storage_unit.product.category.name,
                 "product_id": str(expected_storage_unit.product.id),
                 "product_name": expected_storage_unit.product.name,
+                "version": 1,
             }
         ],
         "total_size": 1,
@@ -0,0 +1,106 @@
+import uuid
+
+import pytest
+from dirty_equals import IsDatetime, IsUUID
+
+from pocket_storage import factories, models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_ok(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create()
+    warehouse = factories.WarehouseFactory.create(name="Новый склад")
+    employee = factories.EmployeeFactory.create()
+
+    resp = mobile_request(
+        "move_storage_unit",
+        {
+            "employee_id": str(employee.id),
+            "storage_unit_id": str(storage_unit.id),
+            "warehouse_id": str(warehouse.id),
+        },
+    )
+
+    assert resp.get("result") == {
+        "id": IsUUID,
+        "storage_unit_id": str(storage_unit.id),
+        "employee_id": str(employee.id),
+        "initial_state": "new",
+        "final_state": "stored",
+        "created_at": IsDatetime(iso_string=True),
+    }, resp.get("error")
+
+    storage_unit.refresh_from_db()
+    assert storage_unit.state == models.StorageUnitState.STORED
+    assert storage_unit.warehouse_id == warehouse.id
+    assert storage_unit.updated_at is not None
+
+    operation = models.StorageUnitOperation.objects.get(storage_unit=storage_unit)
+    assert str(operation.id) == resp["result"]["id"]
+    assert operation.employee_id == employee.id
+
+
+def test_stock_updated(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create()
+    warehouse = factories.WarehouseFactory.create(name="Новый склад")
+
+    mobile_request(
+        "move_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(storage_unit.id),
+            "warehouse_id": str(warehouse.id),
+        },
+    )
+
+    stock = models.StockAggregate.objects.filter(product=storage_unit.product, count__gt=0)
+    assert list(stock.values_list("warehouse_id", "state", "count")) == [
+        (warehouse.id, models.StorageUnitState.STORED, 1),
+    ]
+
+
+def test_warehouse_not_found(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create()
+
+    resp = mobile_request(
+        "move_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(storage_unit.id),
+            "warehouse_id": str(uuid.uuid4()),
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 2002,
+        "message": "Warehouse not found",
+    }
+
+
+def test_transition_not_allowed(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(
+        state=models.StorageUnitState.PICKED
+    )
+
+    resp = mobile_request(
+        "move_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(storage_unit.id),
+            "warehouse_id": str(storage_unit.warehouse_id),
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 7003,
+        "message": "Storage unit transition not allowed",
+        "data": {
+            "storage_unit_id": str(storage_unit.id),
+            "state": "picked",
+            "action": "move",
+        },
+    }
+    assert not models.StorageUnitOperation.objects.exists()
@@ -0,0 +1,46 @@
+import pytest
+from dirty_equals import IsPartialDict
+
+from pocket_storage import factories, models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_ok(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(
+        state=models.StorageUnitState.RESERVED
+    )
+
+    resp = mobile_request(
+        "pick_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(storage_unit.id),
+        },
+    )
+
+    assert resp.get("result") == IsPartialDict(
+        {"initial_state": "reserved", "final_state": "picked"}
+    ), resp.get("error")
+
+    storage_unit.refresh_from_db()
+    assert storage_unit.state == models.StorageUnitState.PICKED
+
+
+def test_new_storage_unit__not_allowed(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create()
+
+    resp = mobile_request(
+        "pick_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(storage_unit.id),
+        },
+    )
+
+    assert resp.get("error", {}).get("code") == 7003
+
+    storage_unit.refresh_from_db()
+    assert storage_unit.state == models.StorageUnitState.NEW
@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+from dirty_equals import IsPartialDict
+
+from pocket_storage import factories, models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_ok(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(
+        state=models.StorageUnitState.STORED
+    )
+
+    resp = mobile_request(
+        "reserve_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(storage_unit.id),
+        },
+    )
+
+    assert resp.get("result") == IsPartialDict(
+        {"initial_state": "stored", "final_state": "reserved"}
+    ), resp.get("error")
+
+    storage_unit.refresh_from_db()
+    assert storage_unit.state == models.StorageUnitState.RESERVED
+
+
+def test_employee_not_found(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create()
+
+    resp = mobile_request(
+        "reserve_storage_unit",
+        {
+            "employee_id": str(uuid.uuid4()),
+            "storage_unit_id": str(storage_unit.id),
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 6002,
+        "message": "Employee not found",
+    }
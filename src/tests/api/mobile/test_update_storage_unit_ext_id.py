@@ -31,6 +31,22 @@ def test_ok(mobile_request):
     assert storage_unit.ext_id == "new_ext_id"
 
 
+def test_cached_storage_unit_invalidated(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(ext_id="old_ext_id")
+    mobile_request("get_storage_unit_with_id", {"id": str(storage_unit.id)})
+
+    mobile_request(
+        "update_storage_unit_ext_id",
+        {
+            "storage_unit_id": str(storage_unit.id),
+            "ext_id": "new_ext_id",
+        },
+    )
+    resp = mobile_request("get_storage_unit_with_id", {"id": str(storage_unit.id)})
+
+    assert resp.get("result") == IsPartialDict({"ext_id": "new_ext_id"}), resp.get("error")
+
+
 def test_storage_unit_not_found(mobile_request):
     resp = mobile_request(
         "update_storage_unit_ext_id",
@@ -44,3 +60,73 @@ def test_storage_unit_not_found(mobile_request):
         "code": 7002,
         "message": "Storage unit not found",
     }
+
+
+def test_version_incremented(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(ext_id="old_ext_id")
+
+    resp = mobile_request(
+        "update_storage_unit_ext_id",
+        {
+            "storage_unit_id": str(storage_unit.id),
+            "ext_id": "new_ext_id",
+        },
+    )
+
+    assert resp.get("result") == IsPartialDict({"version": 2}), resp.get("error")
+
+
+def test_with_version(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(ext_id="old_ext_id")
+
+    resp = mobile_request(
+        "update_storage_unit_ext_id",
+        {
+            "storage_unit_id": str(storage_unit.id),
+            "ext_id": "new_ext_id",
+            "version": 1,
+        },
+    )
+
+    assert resp.get("result") == IsPartialDict(
+        {"ext_id": "new_ext_id", "version": 2}
+    ), resp.get("error")
+
+    storage_unit.refresh_from_db()
+    assert storage_unit.ext_id == "new_ext_id"
+    assert storage_unit.version == 2
+
+
+def test_with_stale_version__conflict(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(ext_id="old_ext_id", version=3)
+
+    resp = mobile_request(
+        "update_storage_unit_ext_id",
+        {
+            "storage_unit_id": str(storage_unit.id),
+            "ext_id": "new_ext_id",
+            "version": 2,
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 7005,
+        "message": "Storage unit was changed by someone else",
+        "data": {"version": 3},
+    }
+
+    storage_unit.refresh_from_db()
+    assert storage_unit.ext_id == "old_ext_id"
+
+
+def test_with_version__not_found(mobile_request):
+    resp = mobile_request(
+        "update_storage_unit_ext_id",
+        {
+            "storage_unit_id": str(uuid.uuid4()),
+            "ext_id": "new_ext_id",
+            "version": 1,
+        },
+    )
+
+    assert resp.get("error", {}).get("code") == 7002
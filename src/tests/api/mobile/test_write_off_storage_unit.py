@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+from dirty_equals import IsPartialDict
+
+from pocket_storage import factories, models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_ok(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(
+        state=models.StorageUnitState.PICKED
+    )
+
+    resp = mobile_request(
+        "write_off_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(storage_unit.id),
+        },
+    )
+
+    assert resp.get("result") == IsPartialDict(
+        {"initial_state": "picked", "final_state": "written_off"}
+    ), resp.get("error")
+
+    storage_unit.refresh_from_db()
+    assert storage_unit.state == models.StorageUnitState.WRITTEN_OFF
+
+
+def test_already_written_off(mobile_request):
+    storage_unit = factories.StorageUnitFactory.create(
+        state=models.StorageUnitState.WRITTEN_OFF
+    )
+
+    resp = mobile_request(
+        "write_off_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(storage_unit.id),
+        },
+    )
+
+    assert resp.get("error", {}).get("code") == 7003
+
+
+def test_not_found(mobile_request):
+    resp = mobile_request(
+        "write_off_storage_unit",
+        {
+            "employee_id": str(factories.EmployeeFactory.create().id),
+            "storage_unit_id": str(uuid.uuid4()),
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 7002,
+        "message": "Storage unit not found",
+    }
@@ -0,0 +1,36 @@
+import pytest
+
+from pocket_storage import factories
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_method_limit_rejects(mobile_request, settings):
+    settings.RPC_CONCURRENCY_LIMITS = {"mobile.get_product_with_barcode": 0}
+
+    resp = mobile_request("get_product_with_barcode", {"barcode": "123"})
+
+    assert resp.get("error") == {
+        "code": 9001,
+        "message": "Service overloaded, retry later",
+        "data": {"limit": "mobile.get_product_with_barcode"},
+    }
+
+
+def test_entrypoint_limit_rejects(mobile_request, settings):
+    settings.RPC_CONCURRENCY_LIMITS = {"mobile": 0}
+
+    resp = mobile_request("get_product_categories")
+
+    assert resp["error"]["data"] == {"limit": "mobile"}
+
+
+def test_sequential_calls_within_limit(mobile_request, settings):
+    settings.RPC_CONCURRENCY_LIMITS = {"mobile": 1, "mobile.get_product_with_barcode": 1}
+    product = factories.ProductFactory.create()
+
+    for _ in range(3):
+        resp = mobile_request("get_product_with_barcode", {"barcode": product.barcode})
+        assert "result" in resp, resp.get("error")
@@ -0,0 +1,55 @@
+import pytest
+
+from pocket_storage import factories, instrumentation
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_rpc_call_metrics(mobile_request, api_client, requests_mock, settings):
+    settings.RPC_RESPONSE_SIZE_METRIC = True
+    requests_mock.register_uri("GET", "http://testserver/metrics", real_http=True)
+    factories.ProductCategoryFactory.create()
+
+    resp = mobile_request("get_product_categories")
+    assert "result" in resp, resp.get("error")
+
+    metrics = api_client.get("/metrics").text
+
+    labels = 'entrypoint="mobile",method="get_product_categories"'
+    assert f'pocket_storage_rpc_calls_total{{{labels},status="ok"}}' in metrics
+    assert f"pocket_storage_rpc_db_queries_count{{{labels}}}" in metrics
+    assert f"pocket_storage_rpc_response_size_bytes_sum{{{labels}}}" in metrics
+
+
+def test_unknown_method_label(api_client, requests_mock):
+    requests_mock.register_uri("GET", "http://testserver/metrics", real_http=True)
+
+    resp = api_client.post(
+        "/api/v1/mobile/jsonrpc",
+        json={"id": 0, "jsonrpc": "2.0", "method": "no_such_method_1234", "params": {}},
+    )
+    assert resp.json()["error"]["code"] == -32601
+
+    metrics = api_client.get("/metrics").text
+
+    assert 'entrypoint="mobile",method="unknown",status="-32601"' in metrics
+    assert "no_such_method_1234" not in metrics
+
+
+def test_slow_call_log(mobile_request, caplog, monkeypatch):
+    monkeypatch.setattr(instrumentation.CallStats, "is_slow", True)
+    # В LOGGING у логгера свой обработчик, а caplog слушает корневой
+    monkeypatch.setattr(instrumentation.slow_calls_logger, "propagate", True)
+    category = factories.ProductCategoryFactory.create()
+
+    resp = mobile_request("get_product_categories", {"parent_id": str(category.id)})
+    assert "result" in resp, resp.get("error")
+
+    [record] = [r for r in caplog.records if r.name == "pocket_storage.slow_calls"]
+    message = record.getMessage()
+    assert "method=get_product_categories" in message
+    assert "params={'parent_id': 'str'}" in message
+    assert str(category.id) not in message
+    assert 'FROM "pocket_storage_productcategory"' in message
@@ -0,0 +1,77 @@
+import fastapi_jsonrpc
+import pytest
+
+from pocket_storage import app, factories, instrumentation, profiling
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture(autouse=True)
+def _profiles_dir(settings, tmp_path):
+    settings.PROFILES_DIR = tmp_path
+
+
+@pytest.fixture(autouse=True)
+def _default_executor(monkeypatch):
+    # Профиль снимается при выполнении метода в пуле приложения, а не в главном потоке
+    monkeypatch.setattr(
+        fastapi_jsonrpc, "call_sync_async", app.call_sync_in_default_executor
+    )
+
+
+def get_storage_units(api_client, session_key, headers=None):
+    storage_unit = factories.StorageUnitFactory.create()
+    return api_client.post(
+        "/api/v1/web/jsonrpc",
+        json={
+            "id": 0,
+            "jsonrpc": "2.0",
+            "method": "get_storage_units",
+            "params": {"product_id": str(storage_unit.product_id)},
+        },
+        headers={"X-session-key": session_key, **(headers or {})},
+    )
+
+
+def test_profile_by_header(api_client, user, user_session_key, tmp_path):
+    user.is_staff = True
+    user.save()
+
+    resp = get_storage_units(api_client, user_session_key, {"X-profile": "1"})
+
+    assert "result" in resp.json(), resp.json()
+    profile_id = resp.headers["X-profile-id"]
+    assert (tmp_path / f"{profile_id}.prof").is_file()
+
+
+def test_header_ignored_for_non_staff(api_client, user_session_key, tmp_path):
+    resp = get_storage_units(api_client, user_session_key, {"X-profile": "1"})
+
+    assert "result" in resp.json(), resp.json()
+    assert "X-profile-id" not in resp.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_sampled_profile(api_client, user_session_key, settings):
+    settings.PROFILE_SAMPLE_RATE = 1.0
+
+    resp = get_storage_units(api_client, user_session_key)
+
+    assert "result" in resp.json(), resp.json()
+    assert "X-profile-id" in resp.headers
+
+
+def test_old_profiles_removed(settings, tmp_path):
+    settings.PROFILES_MAX_FILES = 2
+    for name in ("20010101T000000-web.a-1", "20010102T000000-web.a-2", "20010103T000000-web.a-3"):
+        (tmp_path / f"{name}.prof").touch()
+    stats = instrumentation.CallStats(entrypoint="web", method="get_storage_units")
+
+    profiling.run_profiled(stats, lambda: None)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "20010103T000000-web.a-3.prof",
+        f"{stats.profile_id}.prof",
+    ]
@@ -0,0 +1,142 @@
+import factory
+import fastapi_jsonrpc
+import pytest
+
+from pocket_storage import factories
+from pocket_storage.api import mobile, web
+from tests.fixtures.queries import QUERY_BUDGETS
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+# Достаточно объектов, чтобы N+1 вышел за любой бюджет
+OBJECTS_COUNT = 5
+
+
+def test_every_method_has_budget():
+    methods = {
+        f"{entrypoint_name}.{route.name}"
+        for entrypoint_name, entrypoint in (("web", web.api_v1), ("mobile", mobile.api_v1))
+        for route in entrypoint.routes
+        if isinstance(route, fastapi_jsonrpc.MethodRoute)
+    }
+
+    assert methods == set(QUERY_BUDGETS)
+
+
+def test_web_get_products(web_request):
+    factories.ProductFactory.create_batch(
+        OBJECTS_COUNT, category=factories.ProductCategoryFactory.create()
+    )
+
+    resp = web_request("get_products", {"pagination": {"count": True}})
+
+    assert len(resp["result"]["items"]) == OBJECTS_COUNT, resp.get("error")
+
+
+def test_web_get_storage_units(web_request):
+    product = factories.ProductFactory.create()
+    factories.StorageUnitFactory.create_batch(
+        OBJECTS_COUNT,
+        product=product,
+        warehouse=factories.WarehouseFactory.create(),
+        ext_id=factory.Sequence(lambda n: f"F{n}"),
+    )
+
+    resp = web_request(
+        "get_storage_units",
+        {"product_id": str(product.id), "pagination": {"count": True}},
+    )
+
+    assert len(resp["result"]["items"]) == OBJECTS_COUNT, resp.get("error")
+
+
+def test_web_get_storage_unit_operations(web_request):
+    storage_unit = factories.StorageUnitFactory.create()
+    factories.StorageUnitOperationFactory.create_batch(
+        OBJECTS_COUNT,
+        storage_unit=storage_unit,
+        employee__position=factories.EmployeePositionFactory.create(),
+    )
+
+    resp = web_request(
+        "get_storage_unit_operations",
+        {"storage_unit_id": str(storage_unit.id), "pagination": {"count": True}},
+    )
+
+    assert len(resp["result"]["items"]) == OBJECTS_COUNT, resp.get("error")
+
+
+def test_web_get_employees(web_request):
+    factories.EmployeeFactory.create_batch(
+        OBJECTS_COUNT, position=factories.EmployeePositionFactory.create()
+    )
+
+    resp = web_request("get_employees", {"pagination": {"count": True}})
+
+    assert len(resp["result"]["items"]) == OBJECTS_COUNT, resp.get("error")
+
+
+def test_web_get_product_categories(web_request):
+    parent = factories.ProductCategoryFactory.create()
+    factories.ProductCategoryFactory.create_batch(
+        OBJECTS_COUNT, parent=parent, name=factory.Sequence(lambda n: f"Категория {n}")
+    )
+
+    resp = web_request("get_product_categories", {"parent_id": str(parent.id)})
+
+    assert len(resp["result"]) == OBJECTS_COUNT, resp.get("error")
+
+
+def test_mobile_get_storage_units(mobile_request):
+    factories.StorageUnitFactory.create_batch(
+        OBJECTS_COUNT,
+        product=factories.ProductFactory.create(),
+        warehouse=factories.WarehouseFactory.create(),
+        ext_id=factory.Sequence(lambda n: f"F{n}"),
+    )
+
+    resp = mobile_request("get_storage_units", {"pagination": {"count": True}})
+
+    assert len(resp["result"]["items"]) == OBJECTS_COUNT, resp.get("error")
+
+
+def test_mobile_get_products(mobile_request):
+    factories.ProductFactory.create_batch(
+        OBJECTS_COUNT, category=factories.ProductCategoryFactory.create()
+    )
+
+    resp = mobile_request("get_products", {"pagination": {"count": True}})
+
+    assert len(resp["result"]["items"]) == OBJECTS_COUNT, resp.get("error")
+
+
+def test_mobile_apply_storage_unit_transitions(mobile_request):
+    storage_units = factories.StorageUnitFactory.create_batch(
+        OBJECTS_COUNT,
+        product=factories.ProductFactory.create(),
+        warehouse=factories.WarehouseFactory.create(),
+        ext_id=factory.Sequence(lambda n: f"F{n}"),
+    )
+    warehouses = factories.WarehouseFactory.create_batch(
+        OBJECTS_COUNT, name=factory.Sequence(lambda n: f"Склад {n}")
+    )
+    employee = factories.EmployeeFactory.create()
+
+    resp = mobile_request(
+        "apply_storage_unit_transitions",
+        {
+            "employee_id": str(employee.id),
+            "transitions": [
+                {
+                    "storage_unit_id": str(storage_unit.id),
+                    "action": "move",
+                    "warehouse_id": str(warehouse.id),
+                }
+                for storage_unit, warehouse in zip(storage_units, warehouses)
+            ],
+        },
+    )
+
+    assert len(resp["result"]) == OBJECTS_COUNT, resp.get("error")
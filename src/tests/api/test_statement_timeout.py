@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+
+import fastapi_jsonrpc
+import pytest
+from asgiref.sync import sync_to_async
+from django.db import OperationalError, connection
+
+from pocket_storage import app
+from pocket_storage.api import middlewares
+from pocket_storage.statement_timeout import is_query_canceled, statement_timeout
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def sleep_with_timeout():
+    with statement_timeout(10), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_sleep(1)")
+
+
+def test_statement_timeout_is_reset():
+    with pytest.raises(OperationalError) as exc_info:
+        sleep_with_timeout()
+
+    assert is_query_canceled(exc_info.value)
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW statement_timeout")
+        assert cursor.fetchone() == ("0",)
+
+
+def test_timeout_error(api_client, monkeypatch):
+    async def call_sync_async(call, *args, **kwargs):
+        return await sync_to_async(sleep_with_timeout)()
+
+    monkeypatch.setattr(fastapi_jsonrpc, "call_sync_async", call_sync_async)
+
+    resp = api_client.post(
+        "/api/v1/mobile/jsonrpc",
+        json={"id": 0, "jsonrpc": "2.0", "method": "get_product_categories", "params": {}},
+    )
+
+    assert resp.json()["error"] == {
+        "code": 9002,
+        "message": "Query timed out or was canceled",
+    }
+
+
+def test_cancel_on_client_disconnect(monkeypatch):
+    def sleep():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_sleep(10)")
+
+    async def call_sync_async(call, *args, **kwargs):
+        return await app.call_sync_in_default_executor(sleep)
+
+    monkeypatch.setattr(fastapi_jsonrpc, "call_sync_async", call_sync_async)
+    monkeypatch.setattr(middlewares, "DISCONNECT_POLL_INTERVAL", 0.05)
+
+    body = json.dumps(
+        {"id": 0, "jsonrpc": "2.0", "method": "get_product_categories", "params": {}}
+    ).encode()
+    started_at = time.monotonic()
+    messages = []
+
+    async def receive():
+        if not messages:
+            messages.append(None)
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Клиент отключается, когда запрос уже выполняется
+        if time.monotonic() - started_at < 0.5:
+            await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/mobile/jsonrpc",
+        "raw_path": b"/api/v1/mobile/jsonrpc",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"testserver")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    asyncio.run(app.app(scope, receive, send))
+
+    assert time.monotonic() - started_at < 5
+    [response_body] = [m["body"] for m in messages[1:] if m["type"] == "http.response.body"]
+    assert json.loads(response_body)["error"] == {
+        "code": 9002,
+        "message": "Query timed out or was canceled",
+    }
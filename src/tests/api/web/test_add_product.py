@@ -37,6 +37,7 @@ def test_ok(web_request):
         "name": "Краска",
         "SKU": "SNI/01/136/0500",
         "barcode": "4600702084566",
+        "version": 1,
         "category": {
             "id": str(category.id),
             "name": category.name,
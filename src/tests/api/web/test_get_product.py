@@ -24,6 +24,7 @@ def test_ok(web_request):
         "name": product.name,
         "SKU": product.SKU,
         "barcode": product.barcode,
+        "version": 1,
         "category": {
             "id": str(product.category.id),
             "name": product.category.name,
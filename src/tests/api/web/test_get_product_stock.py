@@ -0,0 +1,71 @@
+import uuid
+
+import factory
+import pytest
+
+from pocket_storage import factories, models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_ok(web_request):
+    product = factories.ProductFactory.create()
+    warehouse_a = factories.WarehouseFactory.create(name="A")
+    warehouse_b = factories.WarehouseFactory.create(name="B")
+    # Случайные уникальные названия категорий и номера ячеек могут совпасть
+    ext_id = factory.Sequence(lambda n: f"A-{n}")
+    factories.StorageUnitFactory.create_batch(
+        2, product=product, warehouse=warehouse_a, ext_id=ext_id
+    )
+    factories.StorageUnitFactory.create(product=product, warehouse=warehouse_b, ext_id=ext_id)
+    factories.StorageUnitFactory.create(  # другой товар
+        warehouse=warehouse_a, product__category=product.category, ext_id=ext_id
+    )
+
+    resp = web_request("get_product_stock", {"product_id": str(product.id)})
+
+    assert resp.get("result") == [
+        {
+            "warehouse": {"id": str(warehouse_a.id), "name": "A"},
+            "state": "new",
+            "count": 2,
+        },
+        {
+            "warehouse": {"id": str(warehouse_b.id), "name": "B"},
+            "state": "new",
+            "count": 1,
+        },
+    ], resp.get("error")
+
+
+def test_follows_storage_unit_changes(web_request):
+    product = factories.ProductFactory.create()
+    warehouse_a = factories.WarehouseFactory.create(name="A")
+    warehouse_b = factories.WarehouseFactory.create(name="B")
+    moved, deleted, _ = factories.StorageUnitFactory.create_batch(
+        3, product=product, warehouse=warehouse_a, ext_id=factory.Sequence(lambda n: f"A-{n}")
+    )
+
+    moved.warehouse = warehouse_b
+    moved.save()
+    deleted.delete()
+    models.StorageUnit.objects.filter(warehouse=warehouse_b).update(warehouse=warehouse_a)
+    models.StorageUnit.objects.filter(id=moved.id).update(warehouse=warehouse_b)
+
+    resp = web_request("get_product_stock", {"product_id": str(product.id)})
+
+    assert [(item["warehouse"]["name"], item["count"]) for item in resp["result"]] == [
+        ("A", 1),
+        ("B", 1),
+    ]
+
+
+def test_product_not_found__return_error(web_request):
+    resp = web_request("get_product_stock", {"product_id": str(uuid.uuid4())})
+
+    assert resp.get("error") == {
+        "code": 4002,
+        "message": "Product not found",
+    }
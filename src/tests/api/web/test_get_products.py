@@ -47,6 +47,7 @@ def test_ok(web_request):
                 "name": expected_product.name,
                 "SKU": expected_product.SKU,
                 "barcode": expected_product.barcode,
+                "version": 1,
                 "category": {
                     "id": str(expected_product.category.id),
                     "name": expected_product.category.name,
@@ -1,3 +1,4 @@
+import factory
 import pytest
 
 from pocket_storage import factories
@@ -21,6 +22,8 @@ def test_ok(web_request):
     assert resp.get("result") == {
         "has_next": False,
         "total_size": 1,
+        "state_counts": {"new": 1},
+        "warehouse_counts": {str(storage_unit.warehouse_id): 1},
         "items": [
             {
                 "id": str(storage_unit.id),
@@ -62,6 +65,8 @@ def test_filter_filter_by_warehouse(web_request):
     assert resp.get("result") == {
         "has_next": False,
         "total_size": 1,
+        "state_counts": {"new": 1},
+        "warehouse_counts": {str(expected_storage_unit.warehouse_id): 1},
         "items": [
             {
                 "id": str(expected_storage_unit.id),
@@ -83,4 +88,43 @@ def test_filter_filter_by_warehouse(web_request):
     }, resp.get("error")
 
 
+def test_counts_cover_all_pages(web_request):
+    product = factories.ProductFactory.create()
+    warehouse_a = factories.WarehouseFactory.create(name="A")
+    warehouse_b = factories.WarehouseFactory.create(name="B")
+    ext_id = factory.Sequence(lambda n: f"C{n}")
+    factories.StorageUnitFactory.create_batch(
+        3, product=product, warehouse=warehouse_a, ext_id=ext_id
+    )
+    factories.StorageUnitFactory.create_batch(
+        2, product=product, warehouse=warehouse_b, ext_id=ext_id
+    )
+
+    resp = web_request(
+        "get_storage_units",
+        {
+            "product_id": str(product.id),
+            "pagination": {"per_page": 2, "count": True},
+        },
+    )
+
+    result = resp["result"]
+    assert len(result["items"]) == 2
+    assert result["has_next"] is True
+    assert result["total_size"] == 5
+    assert result["state_counts"] == {"new": 5}
+    assert result["warehouse_counts"] == {str(warehouse_a.id): 3, str(warehouse_b.id): 2}
+
+
+def test_counts_only_with_count(web_request):
+    storage_unit = factories.StorageUnitFactory.create()
+
+    resp = web_request("get_storage_units", {"product_id": str(storage_unit.product_id)})
+
+    result = resp["result"]
+    assert result["total_size"] is None
+    assert result["state_counts"] is None
+    assert result["warehouse_counts"] is None
+
+
 # TODO: добавить тесты для остальных фильтров
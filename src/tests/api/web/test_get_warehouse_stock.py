@@ -0,0 +1,78 @@
+import uuid
+
+import factory
+import pytest
+
+from pocket_storage import factories
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_ok(web_request):
+    # Случайные уникальные названия и номера ячеек на нескольких строках могут совпасть
+    category = factories.ProductCategoryFactory.create()
+    warehouse = factories.WarehouseFactory.create(name="Основной")
+    product_a = factories.ProductFactory.create(name="A", category=category)
+    product_b = factories.ProductFactory.create(name="B", category=category)
+    ext_id = factory.Sequence(lambda n: f"A-{n}")
+    factories.StorageUnitFactory.create_batch(
+        3, product=product_b, warehouse=warehouse, ext_id=ext_id
+    )
+    factories.StorageUnitFactory.create(product=product_a, warehouse=warehouse, ext_id=ext_id)
+    factories.StorageUnitFactory.create(  # другой склад
+        product=product_a, warehouse__name="Другой", ext_id=ext_id
+    )
+
+    resp = web_request(
+        "get_warehouse_stock",
+        {
+            "warehouse_id": str(warehouse.id),
+            "pagination": {
+                "count": True,
+            },
+        },
+    )
+
+    assert resp.get("result") == {
+        "has_next": False,
+        "total_size": 2,
+        "items": [
+            {
+                "product": {"id": str(product_a.id), "name": "A"},
+                "state": "new",
+                "count": 1,
+            },
+            {
+                "product": {"id": str(product_b.id), "name": "B"},
+                "state": "new",
+                "count": 3,
+            },
+        ],
+    }, resp.get("error")
+
+
+def test_empty_stock_is_hidden(web_request):
+    storage_unit = factories.StorageUnitFactory.create()
+    storage_unit.delete()
+
+    resp = web_request(
+        "get_warehouse_stock",
+        {"warehouse_id": str(storage_unit.warehouse_id)},
+    )
+
+    assert resp.get("result") == {
+        "has_next": False,
+        "total_size": None,
+        "items": [],
+    }, resp.get("error")
+
+
+def test_warehouse_not_found__return_error(web_request):
+    resp = web_request("get_warehouse_stock", {"warehouse_id": str(uuid.uuid4())})
+
+    assert resp.get("error") == {
+        "code": 2002,
+        "message": "Warehouse not found",
+    }
@@ -0,0 +1,131 @@
+import uuid
+
+import pytest
+
+from pocket_storage import factories, models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_ok(web_request):
+    category = factories.ProductCategoryFactory.create()
+    existing_product = factories.ProductFactory.create(
+        SKU="SNI/01/136/0500",
+        barcode="4600702084566",
+    )
+
+    resp = web_request(
+        "import_products",
+        {
+            "csv_content": (
+                "name,SKU,barcode,category_id\n"
+                f"Краска акриловая красная,SNI/01/136/0500,4600702084566,{category.id}\n"
+                f'"Краска акриловая, синяя",SNI/01/136/0512,,{category.id}\n'
+            ),
+        },
+    )
+
+    assert resp.get("result") == {
+        "created": 1,
+        "updated": 1,
+        "errors": [],
+    }, resp.get("error")
+
+    existing_product.refresh_from_db()
+    assert existing_product.name == "Краска акриловая красная"
+    assert existing_product.category_id == category.id
+    assert existing_product.updated_at is not None
+
+    created_product = models.Product.objects.get(SKU="SNI/01/136/0512")
+    assert created_product.name == "Краска акриловая, синяя"
+    assert created_product.barcode is None
+    assert created_product.category_id == category.id
+
+
+def test_invalid_rows__return_row_errors(web_request):
+    category = factories.ProductCategoryFactory.create()
+    factories.ProductFactory.create(SKU="SNI/03/213/1477", barcode="1800808073122")
+
+    resp = web_request(
+        "import_products",
+        {
+            "csv_content": (
+                "name,SKU,barcode,category_id\n"
+                f"Краска,SNI/01/136/0500,,{category.id}\n"
+                f"Краска,SNI/01/136/0500,,{category.id}\n"
+                f"Краска,SNI/01/136/0512,,{uuid.uuid4()}\n"
+                f"Краска,SNI/01/136/0547,,not-uuid\n"
+                f"Краска,SNI/01/136/0548,1800808073122,{category.id}\n"
+                f",SNI/01/136/0549,,{category.id}\n"
+            ),
+        },
+    )
+
+    assert resp.get("result") == {
+        "created": 1,
+        "updated": 0,
+        "errors": [
+            {"record": 2, "message": "SKU повторяется в файле (запись 1)"},
+            {"record": 3, "message": "Категория не найдена"},
+            {"record": 4, "message": "Некорректный ID категории"},
+            {"record": 5, "message": "Штрих-код уже используется другим товаром"},
+            {"record": 6, "message": "Не указано название"},
+        ],
+    }, resp.get("error")
+
+    assert models.Product.objects.filter(SKU="SNI/01/136/0500").exists()
+    assert models.Product.objects.count() == 2
+
+
+def test_wrong_header__return_error(web_request):
+    resp = web_request(
+        "import_products",
+        {
+            "csv_content": "SKU,name\nSNI/01/136/0500,Краска\n",
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 4003,
+        "message": "Product import file is invalid",
+        "data": {
+            "reason": "Ожидается заголовок name,SKU,barcode,category_id, получен SKU,name",
+        },
+    }
+    assert not models.Product.objects.exists()
+
+
+def test_multiline_value__errors_numbered_by_record(web_request):
+    category = factories.ProductCategoryFactory.create()
+
+    resp = web_request(
+        "import_products",
+        {
+            "csv_content": (
+                "name,SKU,barcode,category_id\n"
+                f'"Краска\nакриловая",SNI/01/136/0500,,{category.id}\n'
+                f"Краска,SNI/01/136/0512,,not-uuid\n"
+            ),
+        },
+    )
+
+    assert resp.get("result", {}).get("errors") == [
+        {"record": 2, "message": "Некорректный ID категории"},
+    ], resp.get("error")
+
+
+def test_malformed_csv__return_error_without_details(web_request):
+    resp = web_request(
+        "import_products",
+        {
+            "csv_content": "name,SKU,barcode,category_id\nКраска,SNI/01/136/0500,,,лишнее\n",
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 4003,
+        "message": "Product import file is invalid",
+        "data": {"reason": "Некорректный формат CSV"},
+    }
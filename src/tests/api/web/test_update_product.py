@@ -42,6 +42,7 @@ def test_ok(web_request, freezer):
         "name": "new_name",
         "SKU": new_sku,
         "barcode": "4600702084566",
+        "version": 2,
         "category": {
             "id": str(new_category.id),
             "name": new_category.name,
@@ -150,3 +151,75 @@ def test_category_not_found__return_error(web_request):
     product.refresh_from_db()
     actual_product = model_to_dict(product)
     assert actual_product == old_product
+
+
+def test_with_version(web_request, freezer):
+    product = factories.ProductFactory.create()
+    new_category = factories.ProductCategoryFactory.create()
+
+    resp = web_request(
+        "update_product",
+        {
+            "id": str(product.id),
+            "product_data": {
+                "name": "new_name",
+                "category_id": str(new_category.id),
+            },
+            "version": 1,
+        },
+    )
+
+    assert resp.get("result", {}).get("version") == 2, resp.get("error")
+
+    product.refresh_from_db()
+    assert product.name == "new_name"
+    assert product.category_id == new_category.id
+    assert product.version == 2
+    assert product.updated_at == timezone.now()
+
+
+def test_with_stale_version__return_error(web_request):
+    product = factories.ProductFactory.create(version=5)
+
+    resp = web_request(
+        "update_product",
+        {
+            "id": str(product.id),
+            "product_data": {
+                "name": "new_name",
+            },
+            "version": 4,
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 4004,
+        "message": "Product was changed by someone else",
+        "data": {"version": 5},
+    }
+
+    old_product = model_to_dict(product)
+    product.refresh_from_db()
+    actual_product = model_to_dict(product)
+    assert actual_product == old_product
+
+
+def test_with_version__sku_exists__return_error(web_request):
+    product = factories.ProductFactory.create()
+    other_product = factories.ProductFactory.create()
+
+    resp = web_request(
+        "update_product",
+        {
+            "id": str(product.id),
+            "product_data": {
+                "SKU": other_product.SKU,
+            },
+            "version": 1,
+        },
+    )
+
+    assert resp.get("error") == {
+        "code": 4001,
+        "message": "Product already exists",
+    }
@@ -4,6 +4,8 @@ import simplejson as json
 
 from starlette.testclient import TestClient
 
+from .queries import assert_query_budget, count_queries
+
 
 @pytest.fixture(autouse=True, scope="session")
 def _init_django():
@@ -33,19 +35,22 @@ class ApiClient(TestClient):
         if session_key is not None:
             headers["X-session-key"] = session_key
 
-        resp = self.post(
-            url=url,
-            data=json.dumps(
-                {
-                    "id": 0,
-                    "jsonrpc": "2.0",
-                    "method": method,
-                    "params": params or {},
-                },
-            ),
-            headers=headers,
-            cookies=cookies,
-        )
+        with count_queries() as queries:
+            resp = self.post(
+                url=url,
+                data=json.dumps(
+                    {
+                        "id": 0,
+                        "jsonrpc": "2.0",
+                        "method": method,
+                        "params": params or {},
+                    },
+                ),
+                headers=headers,
+                cookies=cookies,
+            )
+
+        assert_query_budget(url, method, queries)
 
         # return resp.json(use_decimal=use_decimal)  # FIXME: куда делся use_decimal?
         return resp.json()
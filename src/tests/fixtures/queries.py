@@ -0,0 +1,85 @@
+import contextlib
+import typing as tp
+from unittest import mock
+
+from django.db.backends.utils import CursorWrapper
+
+# Максимальное количество SQL-запросов на один вызов метода.
+# Бюджет не зависит от количества объектов в ответе: рост запросов вместе с размером
+# страницы (N+1) сразу роняет тесты. Проверяется в ApiClient.api_jsonrpc_request.
+# В web API первый запрос каждого метода, кроме login, - проверка сессии.
+QUERY_BUDGETS = {
+    "web.login": 2,
+    "web.add_warehouse": 2,
+    "web.rename_warehouse": 3,
+    "web.get_warehouses": 2,
+    "web.add_product_category": 3,
+    "web.rename_product_category": 3,
+    "web.get_product_categories": 2,
+    "web.add_product": 3,
+    "web.update_product": 5,
+    "web.import_products": 17,
+    "web.get_product": 2,
+    "web.get_products": 3,
+    "web.add_employee_position": 2,
+    "web.get_employee_positions": 2,
+    "web.add_employee": 3,
+    "web.get_employee": 2,
+    "web.get_employees": 3,
+    "web.update_employee": 4,
+    "web.get_storage_units": 4,
+    "web.get_storage_unit_operations": 4,
+    "web.get_product_stock": 3,
+    "web.get_warehouse_stock": 4,
+    "mobile.get_storage_units": 2,
+    "mobile.get_storage_unit_with_id": 1,
+    "mobile.get_storage_unit_with_qrcode": 1,
+    "mobile.get_product_categories": 1,
+    "mobile.update_storage_unit_ext_id": 3,
+    "mobile.delete_storage_unit": 3,
+    "mobile.get_products": 2,
+    "mobile.get_product_with_barcode": 1,
+    "mobile.create_storage_unit_with_product_id": 3,
+    "mobile.create_storage_unit_with_product_barcode": 3,
+    "mobile.move_storage_unit": 5,
+    "mobile.reserve_storage_unit": 4,
+    "mobile.pick_storage_unit": 4,
+    "mobile.write_off_storage_unit": 4,
+    "mobile.apply_storage_unit_transitions": 5,
+}
+
+ENTRYPOINTS = {
+    "/api/v1/web/jsonrpc": "web",
+    "/api/v1/mobile/jsonrpc": "mobile",
+}
+
+
+@contextlib.contextmanager
+def count_queries() -> tp.Iterator[list[str]]:
+    """Собрать SQL всех запросов через Django-курсоры во всех потоках.
+
+    Приложение выполняет запросы не в потоке теста, поэтому CaptureQueriesContext
+    (привязанный к соединению текущего потока) здесь не подходит.
+    """
+    queries = []
+    original = CursorWrapper._execute_with_wrappers
+
+    def _execute_with_wrappers(cursor, sql, params, many, executor):
+        queries.append(sql)
+        return original(cursor, sql, params, many, executor)
+
+    with mock.patch.object(
+        CursorWrapper, "_execute_with_wrappers", _execute_with_wrappers
+    ):
+        yield queries
+
+
+def assert_query_budget(url: str, method: str, queries: list[str]):
+    key = f"{ENTRYPOINTS[url]}.{method}"
+    assert key in QUERY_BUDGETS, f"Не задан бюджет запросов для {key}"
+
+    budget = QUERY_BUDGETS[key]
+    assert len(queries) <= budget, (
+        f"{key}: {len(queries)} SQL-запросов при бюджете {budget}:\n"
+        + "\n".join(queries)
+    )
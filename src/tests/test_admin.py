@@ -0,0 +1,90 @@
+import factory
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from pocket_storage import admin, factories, models
+
+pytestmark = [
+    pytest.mark.django_db(),
+]
+
+
+def test_storage_unit_changelist_queries(admin_client, django_assert_max_num_queries):
+    # Общие товар и склад: случайные уникальные названия на десятках строк совпадают
+    params = {
+        "product": factories.ProductFactory.create(),
+        "warehouse": factories.WarehouseFactory.create(),
+        "ext_id": factory.Sequence(lambda n: f"A-{n}"),
+    }
+    factories.StorageUnitFactory.create_batch(5, **params)
+    url = reverse("admin:pocket_storage_storageunit_changelist")
+    admin_client.get(url)  # прогрев сессии и кэшей
+
+    factories.StorageUnitFactory.create_batch(20, **params)
+    # Количество запросов не зависит от числа строк на странице
+    with django_assert_max_num_queries(8):
+        resp = admin_client.get(url)
+
+    assert resp.status_code == 200
+
+
+def test_product_changelist_queries(admin_client, django_assert_max_num_queries):
+    category = factories.ProductCategoryFactory.create()
+    factories.ProductFactory.create_batch(20, category=category)
+
+    with django_assert_max_num_queries(8):
+        resp = admin_client.get(reverse("admin:pocket_storage_product_changelist"))
+
+    assert resp.status_code == 200
+
+
+def test_estimated_count_paginator(monkeypatch):
+    factories.ProductFactory.create_batch(3, category=factories.ProductCategoryFactory.create())
+    queryset = models.Product.objects.order_by("id")
+
+    assert admin.EstimatedCountPaginator(queryset, 100).count == 3
+
+    monkeypatch.setattr(admin.EstimatedCountPaginator, "estimate_threshold", 0)
+    with CaptureQueriesContext(connection) as queries:
+        count = admin.EstimatedCountPaginator(queryset, 100).count
+
+    assert count >= 0
+    assert not [query for query in queries if "COUNT(" in query["sql"]]
+
+
+@pytest.fixture()
+def labels_storage_units(settings, tmp_path):
+    settings.QRCODE_CACHE_DIR = tmp_path / "qrcodes"
+    return factories.StorageUnitFactory.create_batch(
+        2,
+        product=factories.ProductFactory.create(),
+        warehouse=factories.WarehouseFactory.create(),
+        ext_id=factory.Sequence(lambda n: f"L-{n}"),
+    )
+
+
+def print_labels(admin_client, storage_units):
+    return admin_client.post(
+        reverse("admin:pocket_storage_storageunit_changelist"),
+        {"action": "print_labels", "_selected_action": [unit.id for unit in storage_units]},
+        follow=True,
+    )
+
+
+def test_print_labels(admin_client, labels_storage_units):
+    resp = print_labels(admin_client, labels_storage_units)
+
+    assert resp["Content-Type"] == "application/pdf"
+    assert resp.content.startswith(b"%PDF-")
+
+
+def test_print_labels_over_limit(admin_client, labels_storage_units, monkeypatch):
+    monkeypatch.setattr(admin.StorageUnitModelAdmin, "max_print_labels", 1)
+
+    resp = print_labels(admin_client, labels_storage_units)
+
+    assert resp["Content-Type"].startswith("text/html")
+    [message] = [str(message) for message in resp.context["messages"]]
+    assert "generate_labels" in message
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from pocket_storage import instrumentation, statement_timeout
+from pocket_storage.executor import DjangoThreadPoolExecutor, Priority, next_limit
+
+
+@pytest.fixture()
+def executor():
+    executor = DjangoThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown()
+
+
+def test_limit_bounds_concurrency(executor):
+    executor.limit = 2
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def task():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+
+    futures = [executor.submit(task) for _ in range(10)]
+
+    for future in futures:
+        future.result(timeout=5)
+    assert max_running == 2
+
+
+def test_exception_propagates(executor):
+    future = executor.submit(lambda: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        future.result(timeout=5)
+
+
+def test_call_connection_released_after_return(executor):
+    stats = instrumentation.CallStats(entrypoint="mobile", method="get_products")
+    token = instrumentation.current_call.set(stats)
+    try:
+        future = executor.submit(lambda: setattr(stats, "connection", object()))
+    finally:
+        instrumentation.current_call.reset(token)
+    future.result(timeout=5)
+
+    # Запоздалая отмена не трогает соединение, уже отданное следующему вызову
+    assert stats.connection is None
+    statement_timeout.cancel(stats)
+    assert stats.canceled
+
+
+def test_latency_critical_goes_first(executor):
+    executor.limit = 1
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    executor.submit(blocker)
+    started.wait(5)
+    futures = [
+        executor.submit_with_priority(Priority.BULK, order.append, "bulk"),
+        executor.submit_with_priority(Priority.DEFAULT, order.append, "default"),
+        executor.submit_with_priority(Priority.LATENCY_CRITICAL, order.append, "critical"),
+    ]
+    release.set()
+
+    for future in futures:
+        future.result(timeout=5)
+    assert order == ["critical", "default", "bulk"]
+
+
+def test_bulk_keeps_worker_for_others(executor):
+    executor.limit = 2
+    release = threading.Event()
+
+    bulk = [
+        executor.submit_with_priority(Priority.BULK, release.wait, 5) for _ in range(3)
+    ]
+    critical = executor.submit_with_priority(Priority.LATENCY_CRITICAL, lambda: "ok")
+
+    assert critical.result(timeout=1) == "ok"
+    release.set()
+    for future in bulk:
+        future.result(timeout=5)
+
+
+@pytest.mark.parametrize(
+    "avg_wait, db_headroom, expected",
+    [
+        (0.050, 5, 5),  # задачи ждут, соединения есть - растем
+        (0.050, 0, 4),  # задачи ждут, но соединений нет
+        (0.050, -1, 3),  # соединений меньше резерва - уменьшаемся
+        (0.001, 5, 3),  # пул простаивает
+        (0.005, 5, 4),
+    ],
+)
+def test_next_limit(avg_wait, db_headroom, expected):
+    limit = next_limit(
+        4,
+        min_workers=2,
+        max_workers=8,
+        avg_wait=avg_wait,
+        target_wait=0.010,
+        db_headroom=db_headroom,
+    )
+
+    assert limit == expected
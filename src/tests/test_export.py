@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+
+import factory
+import pytest
+from django.core.management import call_command
+
+from pocket_storage import factories
+
+pytestmark = [
+    pytest.mark.django_db(),
+]
+
+
+def test_export_products_csv(tmp_path):
+    category = factories.ProductCategoryFactory.create()
+    products = factories.ProductFactory.create_batch(3, category=category)
+    path = tmp_path / "products.csv"
+    stderr = io.StringIO()
+
+    # Порция меньше числа строк: выгрузка продолжается со второй порции курсора
+    call_command(
+        "export_data", "products", output=str(path), chunk_size=2, stderr=stderr
+    )
+
+    with open(path, encoding="utf-8", newline="") as stream:
+        rows = list(csv.DictReader(stream))
+    assert sorted(row["id"] for row in rows) == sorted(str(p.id) for p in products)
+    assert rows[0]["category__name"] == category.name
+    assert "Выгружено строк: 3" in stderr.getvalue()
+
+
+def test_export_storage_units_jsonl(tmp_path):
+    storage_units = factories.StorageUnitFactory.create_batch(
+        2,
+        product=factories.ProductFactory.create(),
+        warehouse=factories.WarehouseFactory.create(),
+        ext_id=factory.Sequence(lambda n: f"A-{n}"),
+    )
+    path = tmp_path / "storage_units.jsonl"
+
+    call_command(
+        "export_data", "storage_units", format="jsonl", output=str(path), stderr=io.StringIO()
+    )
+
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert {row["id"]: row["ext_id"] for row in rows} == {
+        str(unit.id): unit.ext_id for unit in storage_units
+    }
+    assert rows[0]["state"] == "new"
+    assert rows[0]["product__SKU"] == storage_units[0].product.SKU
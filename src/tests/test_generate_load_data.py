@@ -0,0 +1,50 @@
+import datetime as dt
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from pocket_storage import models, operation_partitions
+
+pytestmark = [
+    pytest.mark.django_db(),
+]
+
+
+def test_generate_load_data():
+    stdout = io.StringIO()
+
+    # batch_size меньше числа строк: COPY выполняется несколькими порциями
+    call_command(
+        "generate_load_data",
+        warehouses=2,
+        category_depth=2,
+        category_fanout=2,
+        products=5,
+        storage_units=7,
+        employees=3,
+        operations_per_unit=2,
+        until=dt.date(2002, 3, 1),
+        days=30,
+        batch_size=3,
+        stdout=stdout,
+    )
+
+    assert models.Warehouse.objects.count() == 2
+    assert models.ProductCategory.objects.count() == 2 + 2 * 2
+    # Товары ссылаются только на листовые категории
+    assert not models.Product.objects.filter(category__parent__isnull=True).exists()
+    assert models.Product.objects.count() == 5
+    assert models.Employee.objects.count() == 3
+    assert models.StorageUnit.objects.count() == 7
+
+    operations = models.StorageUnitOperation.objects.count()
+    assert operations > 0
+    assert f"{models.StorageUnitOperation._meta.verbose_name_plural}: {operations}" in (
+        stdout.getvalue()
+    )
+    # Все действия попали в месячные партиции, а не в DEFAULT
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {operation_partitions.TABLE}_default")
+        assert cursor.fetchone() == (0,)
@@ -0,0 +1,77 @@
+import datetime as dt
+import gzip
+
+import pytest
+from django.db import connection
+
+from pocket_storage import factories, models, operation_partitions
+
+MONTH = dt.date(2001, 1, 1)
+
+
+def test_add_months():
+    assert operation_partitions.add_months(dt.date(2026, 11, 1), 2) == dt.date(2027, 1, 1)
+    assert operation_partitions.add_months(dt.date(2026, 1, 1), -1) == dt.date(2025, 12, 1)
+
+
+@pytest.mark.django_db()
+def test_create_partitions_is_idempotent():
+    created = operation_partitions.create_partitions(MONTH, dt.date(2001, 2, 1))
+
+    assert created == [
+        operation_partitions.partition_name(MONTH),
+        operation_partitions.partition_name(dt.date(2001, 2, 1)),
+    ]
+    assert operation_partitions.create_partitions(MONTH, dt.date(2001, 2, 1)) == []
+    assert MONTH in operation_partitions.list_partitions()
+
+
+@pytest.fixture()
+def drop_partitions():
+    yield
+    with connection.cursor() as cursor:
+        for month, name in operation_partitions.list_partitions().items():
+            if month.year == MONTH.year:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+
+
+# Архивация выполняется вне транзакции: отложенные проверки внешних ключей
+# в транзакции теста не дали бы удалить партицию
+@pytest.mark.django_db(transaction=True)
+def test_archive_partitions(tmp_path, drop_partitions):
+    operation_partitions.create_partitions(MONTH, dt.date(2001, 2, 1))
+    old = factories.StorageUnitOperationFactory.create(
+        created_at=dt.datetime(2001, 1, 15, tzinfo=dt.timezone.utc)
+    )
+    recent = factories.StorageUnitOperationFactory.create(
+        created_at=dt.datetime(2001, 2, 15, tzinfo=dt.timezone.utc)
+    )
+
+    [path] = operation_partitions.archive_partitions(dt.date(2001, 2, 1), tmp_path)
+
+    assert path.name == f"{operation_partitions.partition_name(MONTH)}.csv.gz"
+    with gzip.open(path, "rt") as stream:
+        assert str(old.id) in stream.read()
+    assert list(models.StorageUnitOperation.objects.all()) == [recent]
+    assert MONTH not in operation_partitions.list_partitions()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_create_partition_with_rows_in_default(drop_partitions):
+    march = dt.date(2001, 3, 1)
+    operation = factories.StorageUnitOperationFactory.create(
+        created_at=dt.datetime(2001, 3, 15, tzinfo=dt.timezone.utc)
+    )
+
+    created = operation_partitions.create_partitions(march, dt.date(2001, 4, 1))
+
+    assert created == [
+        operation_partitions.partition_name(march),
+        operation_partitions.partition_name(dt.date(2001, 4, 1)),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT id FROM {operation_partitions.partition_name(march)}")
+        assert cursor.fetchall() == [(operation.id,)]
+        cursor.execute(f"SELECT count(*) FROM {operation_partitions.DEFAULT_PARTITION}")
+        assert cursor.fetchone() == (0,)
+    assert list(models.StorageUnitOperation.objects.all()) == [operation]
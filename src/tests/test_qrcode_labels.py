@@ -0,0 +1,86 @@
+import re
+import time
+
+import factory
+import pytest
+from PIL import Image
+
+from pocket_storage import factories, models, qrcode_labels
+
+
+@pytest.fixture(autouse=True)
+def _qrcode_cache_dir(settings, tmp_path):
+    settings.QRCODE_CACHE_DIR = tmp_path / "qrcodes"
+
+
+def test_render_qrcode_fits_size(tmp_path):
+    image = qrcode_labels.render_qrcode("PS1" + "A" * 42, 200, tmp_path)
+
+    assert image.width == image.height
+    assert 100 < image.width <= 200
+
+
+def test_caption_fits_label():
+    font, _ = qrcode_labels._font(24)
+
+    caption = qrcode_labels._fit_text("Очень длинное название товара" * 3, font, 200)
+
+    assert caption.endswith("…")
+    assert font.getlength(caption) <= 200
+    assert qrcode_labels._fit_text("SKU1", font, 200) == "SKU1"
+
+
+@pytest.mark.django_db()
+def test_write_labels_pdf(tmp_path):
+    factories.StorageUnitFactory.create_batch(
+        5,
+        product=factories.ProductFactory.create(),
+        warehouse=factories.WarehouseFactory.create(),
+        ext_id=factory.Sequence(lambda n: f"L{n}"),
+    )
+    layout = qrcode_labels.LabelsLayout(columns=2, rows=2, dpi=50)
+    output = tmp_path / "labels.pdf"
+
+    pages = qrcode_labels.write_labels(
+        models.StorageUnit.objects.all(), output, layout=layout, processes=1
+    )
+
+    assert pages == 2
+    assert re.findall(rb"/Count (\d+)", output.read_bytes()) == [b"2"]
+
+
+def test_iter_pdf_many_pages():
+    layout = qrcode_labels.LabelsLayout()
+    pages = (Image.new("1", layout.page_size, 1) for _ in range(300))
+
+    started_at = time.perf_counter()
+    content = b"".join(qrcode_labels.iter_pdf(pages, layout.dpi))
+
+    # Каждая страница пишется один раз: время и размер растут линейно
+    assert time.perf_counter() - started_at < 10
+    assert len(content) < 1024 * 1024
+    assert re.findall(rb"/Count (\d+)", content) == [b"300"]
+
+    xref_at = int(re.search(rb"startxref\n(\d+)", content)[1])
+    assert content[xref_at:].startswith(b"xref\n0 903\n")
+    offsets = re.findall(rb"(\d{10}) 00000 n ", content[xref_at:])
+    for number, offset in enumerate(offsets, start=1):
+        assert content[int(offset):].startswith(b"%d 0 obj" % number)
+
+
+@pytest.mark.django_db()
+def test_write_labels_png(tmp_path):
+    factories.StorageUnitFactory.create()
+    layout = qrcode_labels.LabelsLayout(dpi=50)
+
+    pages = qrcode_labels.write_labels(
+        models.StorageUnit.objects.all(),
+        tmp_path,
+        qrcode_labels.LabelsFormat.PNG,
+        layout=layout,
+        processes=1,
+    )
+
+    assert pages == 1
+    with Image.open(tmp_path / "labels-0001.png") as page:
+        assert page.size == layout.page_size
@@ -0,0 +1,74 @@
+import pytest
+from django.urls import reverse
+
+from pocket_storage import factories, models, search
+
+pytestmark = [
+    pytest.mark.django_db(),
+]
+
+
+@pytest.fixture()
+def storage_unit():
+    # Общие категория и склад: их случайные уникальные названия могут совпасть
+    category = factories.ProductCategoryFactory.create()
+    warehouse = factories.WarehouseFactory.create()
+    factories.StorageUnitFactory.create(  # не должна находиться
+        ext_id="G456",
+        warehouse=warehouse,
+        product__category=category,
+        product__barcode="2000000000017",
+    )
+    return factories.StorageUnitFactory.create(
+        ext_id="F123",
+        warehouse=warehouse,
+        product__category=category,
+        product__name="Ламинат",
+        product__SKU="SNI/01/136/0500",
+        product__barcode="4600702084566",
+    )
+
+
+@pytest.mark.parametrize(
+    "search_str",
+    ["ламинат", "136/05", "4600702084566", "0208", " F12 "],
+)
+def test_search_storage_units(storage_unit, search_str):
+    found = search.search_storage_units(models.StorageUnit.objects.all(), search_str)
+
+    assert list(found) == [storage_unit]
+
+
+def test_search_storage_units_by_id(storage_unit):
+    query = models.StorageUnit.objects.all()
+
+    assert list(search.search_storage_units(query, str(storage_unit.id))) == [storage_unit]
+    assert list(search.search_storage_units(query, str(storage_unit.product_id))) == [
+        storage_unit
+    ]
+
+
+def test_search_products_by_id(storage_unit):
+    found = search.search_products(models.Product.objects.all(), str(storage_unit.product_id))
+
+    assert list(found) == [storage_unit.product]
+
+
+def test_full_barcode_matches_as_substring_too():
+    category = factories.ProductCategoryFactory.create()
+    exact = factories.ProductFactory.create(barcode="4600702084566", category=category)
+    longer = factories.ProductFactory.create(barcode="14600702084566", category=category)
+    factories.ProductFactory.create(barcode="4600702084573", category=category)
+
+    found = search.search_products(models.Product.objects.order_by("barcode"), "4600702084566")
+
+    assert list(found) == [longer, exact]
+
+
+def test_admin_search(admin_client, storage_unit):
+    resp = admin_client.get(
+        reverse("admin:pocket_storage_storageunit_changelist"), {"q": "ламинат"}
+    )
+
+    assert resp.status_code == 200
+    assert list(resp.context["cl"].result_list) == [storage_unit]
@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+
+from pocket_storage import models
+from pocket_storage.storage_unit_qrcode import (
+    COMPACT_PREFIX,
+    InvalidQrCodeContent,
+    make_legacy_qrcode_content,
+    make_qrcode_content,
+    parse_qrcode_content,
+    qrcode_image_key,
+    qrcode_image_path,
+)
+
+# Символы алфавитно-цифрового режима QR
+QR_ALPHANUMERIC = set("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:")
+
+
+@pytest.fixture()
+def storage_unit():
+    return models.StorageUnit(id=uuid.uuid4())
+
+
+def test_compact_roundtrip(storage_unit):
+    content = make_qrcode_content(storage_unit)
+
+    assert content.startswith(COMPACT_PREFIX)
+    assert set(content) <= QR_ALPHANUMERIC
+    assert parse_qrcode_content(content).storage_unit_id == str(storage_unit.id)
+
+
+def test_legacy_jwt(storage_unit):
+    content = make_legacy_qrcode_content(storage_unit)
+
+    assert parse_qrcode_content(content).storage_unit_id == str(storage_unit.id)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "test",
+        COMPACT_PREFIX,
+        COMPACT_PREFIX + "not base32!",
+        COMPACT_PREFIX + "A" * 42,
+    ],
+)
+def test_invalid(content):
+    with pytest.raises(InvalidQrCodeContent):
+        parse_qrcode_content(content)
+
+
+def test_compact_tampered_id(storage_unit):
+    content = make_qrcode_content(storage_unit)
+    other = make_qrcode_content(models.StorageUnit(id=uuid.uuid4()))
+
+    # ID из одного кода с подписью из другого
+    forged = content[:29] + other[29:]
+
+    with pytest.raises(InvalidQrCodeContent):
+        parse_qrcode_content(forged)
+
+
+def test_qrcode_image_cache(storage_unit, tmp_path):
+    content = make_qrcode_content(storage_unit)
+
+    path = qrcode_image_path(content, tmp_path)
+
+    assert qrcode_image_key(content) in path.name
+    assert path.read_bytes().startswith(b"\x89PNG")
+    path.write_bytes(b"cached")
+    assert qrcode_image_path(content, tmp_path).read_bytes() == b"cached"
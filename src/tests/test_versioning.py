@@ -0,0 +1,21 @@
+import pytest
+
+from pocket_storage import factories, models
+
+pytestmark = [
+    pytest.mark.django_db(),
+]
+
+
+def test_save_stale_object_increments_stored_version():
+    product = factories.ProductFactory.create()
+    stale = models.Product.objects.get(id=product.id)
+
+    product.name = "Новое"
+    product.save()
+    stale.SKU = "NEW-SKU"
+    stale.save(update_fields=["SKU"])
+
+    assert product.version == 2
+    assert stale.version == 3
+    assert models.Product.objects.get(id=product.id).version == 3
@@ -0,0 +1,57 @@
+import pytest
+from django.urls import reverse
+
+from pocket_storage import factories, storage_unit_qrcode
+
+pytestmark = [
+    pytest.mark.django_db(),
+]
+
+
+@pytest.fixture(autouse=True)
+def _qrcode_cache_dir(settings, tmp_path):
+    settings.QRCODE_CACHE_DIR = tmp_path
+
+
+def qrcode_image_url(storage_unit, key=None):
+    content = storage_unit_qrcode.make_qrcode_content(storage_unit)
+    key = key or storage_unit_qrcode.qrcode_image_key(content)
+    return reverse("storage_unit_qrcode_image", args=[storage_unit.id, key])
+
+
+def test_storage_unit_qrcode_image(admin_client, tmp_path):
+    storage_unit = factories.StorageUnitFactory.create()
+
+    resp = admin_client.get(qrcode_image_url(storage_unit))
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "image/png"
+    assert "immutable" in resp["Cache-Control"]
+    assert b"".join(resp.streaming_content).startswith(b"\x89PNG")
+    assert len(list(tmp_path.rglob("*.png"))) == 1
+
+
+def test_storage_unit_qrcode_image_wrong_key(admin_client):
+    storage_unit = factories.StorageUnitFactory.create()
+
+    resp = admin_client.get(qrcode_image_url(storage_unit, key="0" * 64))
+
+    assert resp.status_code == 404
+
+
+def test_storage_unit_qrcode_image_requires_staff(client):
+    storage_unit = factories.StorageUnitFactory.create()
+
+    resp = client.get(qrcode_image_url(storage_unit))
+
+    assert resp.status_code == 302
+
+
+def test_admin_change_page_links_qrcode(admin_client):
+    storage_unit = factories.StorageUnitFactory.create()
+
+    resp = admin_client.get(
+        reverse("admin:pocket_storage_storageunit_change", args=[storage_unit.id])
+    )
+
+    assert qrcode_image_url(storage_unit) in resp.content.decode()